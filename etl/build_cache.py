@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of pipeline stage outputs.
+
+1. A stage's key is the hash of its code, arguments and input files (see
+   `stage_key` in main.py). After a successful run, the files the stage
+   wrote are copied into `<cache dir>/<stage>-<key>/` with a manifest of
+   their hashes.
+2. When the pipeline meets a key it has cached, the outputs are copied back
+   instead of running the stage, so switching an input back to a version
+   seen before (or undoing a code change) costs a file copy, not a re-run.
+   Restored files are checked against the manifest; a damaged entry is
+   dropped and the stage runs.
+3. Entries are copies, never hard links: stages rewrite their outputs in
+   place and must not be able to change a cached file.
+4. The cache is kept under a size limit by removing the least recently
+   used entries after every store.
+
+Usage:
+    python build_cache.py            # list cached entries
+    python build_cache.py --clear
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+ETL_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DIR = os.path.join(ETL_DIR, 'output', 'cache', 'artifacts')
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+MANIFEST = 'manifest.json'
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _copy(source: str, destination: str):
+    """Copy through a temporary file so readers never see a half-written destination."""
+    os.makedirs(os.path.dirname(destination) or '.', exist_ok=True)
+    temp_path = destination + '.tmp'
+    shutil.copyfile(source, temp_path)
+    os.replace(temp_path, destination)
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    size: int
+    # Last store or restore, for least-recently-used eviction
+    used: float
+    files: Dict[str, str]
+
+
+class ArtifactCache:
+    """
+    Stage outputs by key, on disk, with least-recently-used eviction above `max_bytes`.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def _read_manifest(self, key: str) -> Optional[CacheEntry]:
+        manifest = os.path.join(self._entry_dir(key), MANIFEST)
+        try:
+            with open(manifest, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return CacheEntry(key, data['size'], os.path.getmtime(manifest), data['files'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def entries(self) -> List[CacheEntry]:
+        """Complete entries, least recently used first."""
+        if not os.path.isdir(self.cache_dir):
+            return []
+        # Entries still being stored are in '.tmp' directories
+        entries = [self._read_manifest(key) for key in os.listdir(self.cache_dir) if '.tmp' not in key]
+        return sorted((entry for entry in entries if entry), key=lambda entry: entry.used)
+
+    def size(self) -> int:
+        return sum(entry.size for entry in self.entries())
+
+    def restore(self, key: str, outputs: Dict[str, str]) -> bool:
+        """
+        Copy the cached files of `key` to `outputs` (name -> destination path).
+        Returns False, leaving the destinations alone, if the entry is missing or damaged.
+        """
+        entry = self._read_manifest(key)
+        if entry is None or set(entry.files) != set(outputs):
+            return False
+        entry_dir = self._entry_dir(key)
+        sources = {name: os.path.join(entry_dir, str(i)) for i, name in enumerate(sorted(entry.files))}
+        for name, path in sources.items():
+            if not os.path.exists(path) or _file_hash(path) != entry.files[name]:
+                # Damaged entry: drop it, the stage runs instead
+                self.remove(key)
+                return False
+        for name, destination in outputs.items():
+            _copy(sources[name], destination)
+        os.utime(os.path.join(entry_dir, MANIFEST))
+        return True
+
+    def store(self, key: str, outputs: Dict[str, str]) -> bool:
+        """Cache the files in `outputs` (name -> path) under `key`, then evict down to the size limit."""
+        size = sum(os.path.getsize(path) for path in outputs.values())
+        if size > self.max_bytes:
+            self.evict()
+            return False
+        entry_dir = self._entry_dir(key)
+        # Build the entry in a temporary directory and rename it into place in one step
+        temp_dir = f"{entry_dir}.tmp{os.getpid()}"
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        os.makedirs(temp_dir)
+        files = {}
+        for i, name in enumerate(sorted(outputs)):
+            shutil.copyfile(outputs[name], os.path.join(temp_dir, str(i)))
+            files[name] = _file_hash(os.path.join(temp_dir, str(i)))
+        with open(os.path.join(temp_dir, MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump({'size': size, 'files': files, 'stored': time.time()}, f, indent=2)
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(temp_dir, entry_dir)
+        self.evict()
+        return True
+
+    def remove(self, key: str):
+        shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+
+    def evict(self) -> List[str]:
+        """Remove least recently used entries until the cache fits in `max_bytes`; returns their keys."""
+        entries = self.entries()
+        total = sum(entry.size for entry in entries)
+        removed = []
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            self.remove(entry.key)
+            total -= entry.size
+            removed.append(entry.key)
+        return removed
+
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Inspect or clear the pipeline's stage output cache.")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="Cache directory")
+    parser.add_argument('--clear', action='store_true', help="Remove every cached entry")
+    args = parser.parse_args(argv)
+
+    cache = ArtifactCache(args.cache_dir)
+    if args.clear:
+        cache.clear()
+        print(f"Cleared {args.cache_dir}")
+        return
+
+    entries = cache.entries()
+    for entry in reversed(entries):
+        used = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry.used))
+        print(f"{entry.key}  {entry.size / 1024:,.0f} KB  last used {used}  ({', '.join(sorted(entry.files))})")
+    print(f"{len(entries)} entries, {sum(entry.size for entry in entries) / 1024 / 1024:,.1f} MB in {args.cache_dir}")
+
+
+if __name__ == "__main__":
+    main()
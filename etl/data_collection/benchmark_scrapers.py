@@ -0,0 +1,251 @@
+"""
+Throughput benchmarks for the scrapers, run against the local mock registry.
+
+Starts a `MockRegistryServer` and drives each scraper against it:
+1. ConcurrentPlaywrightScraper: single-name searches with a sliding window.
+2. FilteredConcurrentScraper: filtered sessions walking letters and result pages.
+3. The federal requests crawler: paged result list.
+
+For each one it reports searches (or pages) per second, p50/p95 latency and CPU
+time per page. CPU covers this process and, if psutil is installed, the
+browser processes it launched.
+
+Usage:
+    python benchmark_scrapers.py [concurrent|filtered|federal ...]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from mock_registry import MockRegistry, MockRegistryServer
+from wait_strategies import WaitTimings
+
+# Mock registry behaviour
+MOCK_LATENCY = (0.02, 0.08)  # Seconds added to every mock response
+MOCK_ERROR_RATE = 0.0
+MOCK_FEDERAL_PAGES = 50
+
+# Workload sizes
+CONCURRENT_SEARCHES = 40
+MAX_CONCURRENT = 5
+FILTERED_BUSINESS_TYPES = ["Co-operative Non-Share", "Co-operative with Share", "Not-for-Profit Corporation"]
+FILTERED_LETTERS = list("abcde")
+
+HEADLESS = True
+RESULTS_FILE = None  # Set to a path to also write the results as JSON
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class CpuMeter:
+    """CPU seconds used by this process and, with psutil, its child processes."""
+
+    def __init__(self):
+        try:
+            import psutil
+            self._process = psutil.Process()
+        except ImportError:
+            self._process = None
+        self._children: Dict[int, float] = {}
+
+    def _children_cpu(self) -> float:
+        # Children are sampled while alive; browsers exit before the last reading
+        for child in self._process.children(recursive=True):
+            try:
+                times = child.cpu_times()
+                self._children[child.pid] = times.user + times.system
+            except Exception:
+                pass
+        return sum(self._children.values())
+
+    def read(self) -> float:
+        own = time.process_time()
+        if self._process is None:
+            return own
+        return own + self._children_cpu()
+
+
+@dataclass
+class BenchmarkResult:
+    """Summary of one scraper run."""
+    name: str
+    searches: int = 0
+    pages: int = 0
+    errors: int = 0
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+
+    @property
+    def searches_per_second(self) -> float:
+        return self.searches / self.wall_time if self.wall_time else 0.0
+
+    @property
+    def cpu_per_page_ms(self) -> float:
+        return 1000 * self.cpu_time / self.pages if self.pages else 0.0
+
+    def summary(self) -> str:
+        return (f"{self.name:<12} {self.searches:>5} searches {self.pages:>5} pages {self.errors:>3} errors  "
+                f"{self.searches_per_second:7.2f}/s  p50 {percentile(self.latencies, 50):6.3f}s  "
+                f"p95 {percentile(self.latencies, 95):6.3f}s  CPU/page {self.cpu_per_page_ms:7.1f}ms")
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data.pop('latencies')
+        data.update(
+            searches_per_second=self.searches_per_second,
+            p50=percentile(self.latencies, 50),
+            p95=percentile(self.latencies, 95),
+            cpu_per_page_ms=self.cpu_per_page_ms,
+        )
+        return data
+
+
+async def benchmark_concurrent(server: MockRegistryServer) -> BenchmarkResult:
+    """Single-name searches through ConcurrentPlaywrightScraper's sliding window."""
+    from playwright_scraper_utils import ConcurrentPlaywrightScraper
+
+    result = BenchmarkResult("concurrent")
+    names = [f"co-op {i}" for i in range(CONCURRENT_SEARCHES)]
+    cpu = CpuMeter()
+
+    async with ConcurrentPlaywrightScraper(max_concurrent=MAX_CONCURRENT, headless=HEADLESS,
+                                           search_url=server.onbis_url) as scraper:
+        cpu_start, start = cpu.read(), time.perf_counter()
+        async for res in scraper.iter_search_results(names):
+            result.searches += 1
+            result.pages += 1
+            result.latencies.append(res.search_time)
+            if not res.success:
+                result.errors += 1
+        result.wall_time = time.perf_counter() - start
+        result.cpu_time = cpu.read() - cpu_start
+        print(scraper.tracer.summary())
+    return result
+
+
+async def benchmark_filtered(server: MockRegistryServer) -> BenchmarkResult:
+    """One filtered session per business type, walking every letter's result pages."""
+    from scrape_ontario_corporations import FilteredConcurrentScraper
+
+    result = BenchmarkResult("filtered")
+    cpu = CpuMeter()
+
+    async def on_page(res):
+        result.pages += 1
+        result.latencies.append(res.search_time)
+        if not res.success:
+            result.errors += 1
+
+    async with FilteredConcurrentScraper(max_concurrent=len(FILTERED_BUSINESS_TYPES), headless=HEADLESS,
+                                         wait_timings=WaitTimings(), search_url=server.onbis_url) as scraper:
+        cpu_start, start = cpu.read(), time.perf_counter()
+        await asyncio.gather(*[
+            scraper.process_business_type_session(business_type, FILTERED_LETTERS, i, on_page)
+            for i, business_type in enumerate(FILTERED_BUSINESS_TYPES)
+        ])
+        result.wall_time = time.perf_counter() - start
+        result.cpu_time = cpu.read() - cpu_start
+        print(scraper.tracer.summary())
+    result.searches = len(FILTERED_BUSINESS_TYPES) * len(FILTERED_LETTERS)
+    return result
+
+
+class _TimedSession(requests.Session):
+    """requests session that records how long each request took."""
+
+    def __init__(self):
+        super().__init__()
+        self.durations: List[float] = []
+        self.failures = 0
+
+    def request(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = super().request(*args, **kwargs)
+        except requests.RequestException:
+            self.failures += 1
+            raise
+        self.durations.append(time.perf_counter() - start)
+        if not response.ok:
+            self.failures += 1
+        return response
+
+
+async def benchmark_federal(server: MockRegistryServer) -> BenchmarkResult:
+    """The federal crawler's paged requests, without the politeness delay."""
+    from scrape_federal_corporations import crawl_federal_corporations
+
+    result = BenchmarkResult("federal")
+    session = _TimedSession()
+    cpu = CpuMeter()
+
+    cpu_start, start = cpu.read(), time.perf_counter()
+    corporations = await asyncio.to_thread(
+        crawl_federal_corporations, base_url=server.federal_url, session=session,
+        page_delay=(0.0, 0.0), max_retries=1
+    )
+    result.wall_time = time.perf_counter() - start
+    result.cpu_time = cpu.read() - cpu_start
+    result.searches = result.pages = len(session.durations)
+    result.errors = session.failures
+    result.latencies = session.durations
+    print(f"Federal crawler collected {len(corporations)} corporations")
+    return result
+
+
+BENCHMARKS: Dict[str, Callable] = {
+    'concurrent': benchmark_concurrent,
+    'filtered': benchmark_filtered,
+    'federal': benchmark_federal,
+}
+
+
+async def run_benchmarks(names: Optional[List[str]] = None) -> List[BenchmarkResult]:
+    """Run the named benchmarks (all by default) against a fresh mock registry."""
+    registry = MockRegistry(latency=MOCK_LATENCY, error_rate=MOCK_ERROR_RATE, federal_pages=MOCK_FEDERAL_PAGES)
+    results = []
+    with MockRegistryServer(registry) as server:
+        print(f"Mock registry running at {server.base_url}")
+        for name in names or list(BENCHMARKS):
+            print(f"\n=== {name} ===")
+            try:
+                results.append(await BENCHMARKS[name](server))
+            except Exception as e:
+                print(f"❌ {name} benchmark failed: {e}")
+        print(f"\nMock registry served {registry.stats.requests} requests ({registry.stats.errors} injected errors)")
+    return results
+
+
+if __name__ == "__main__":
+    selected = sys.argv[1:] or None
+    unknown = [name for name in selected or [] if name not in BENCHMARKS]
+    if unknown:
+        print(f"Unknown benchmark(s): {', '.join(unknown)}. Choose from: {', '.join(BENCHMARKS)}")
+        sys.exit(1)
+
+    benchmark_results = asyncio.run(run_benchmarks(selected))
+
+    print("\n=== RESULTS ===")
+    for benchmark_result in benchmark_results:
+        print(benchmark_result.summary())
+
+    if RESULTS_FILE:
+        os.makedirs(os.path.dirname(RESULTS_FILE) or '.', exist_ok=True)
+        with open(RESULTS_FILE, 'w', encoding='utf-8') as f:
+            json.dump([r.to_dict() for r in benchmark_results], f, indent=2)
+        print(f"Saved results to {RESULTS_FILE}")
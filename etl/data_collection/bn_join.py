@@ -0,0 +1,250 @@
+"""
+Business-number join engine for any number of registries.
+
+Each registered source is indexed once into a single map of
+9-digit business number -> source name -> records. Records are kept as lists,
+so several rows sharing a business number (e.g. a charity's RR0001 and RR0002
+accounts) are all kept instead of the last one silently winning. Overlaps
+between any combination of sources then come out of one pass over the index;
+adding a registry costs one more `add_source` call, not another nested loop.
+
+The index can be saved between runs together with a content hash of each
+source. When one input file changes, `replace_source` swaps just that
+source's records and returns the business numbers it touched, so only
+those overlaps need to be recomputed.
+
+The business numbers held by two or more sources are tracked as records
+come and go, so listing every overlap visits only those (or, when a source
+is required, that source's numbers) instead of the whole index.
+"""
+
+import hashlib
+import os
+import pickle
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+# Any row object: a dict from csv.DictReader, a NamedTuple from a streaming reader, ...
+Record = Any
+
+_BUSINESS_NUMBER = re.compile(r'(\d{9})')
+
+HASH_CHUNK_SIZE = 1024 * 1024
+# Bump when the saved index layout changes; older saves are then ignored
+INDEX_VERSION = 2
+
+
+def extract_business_number(bn_string) -> Optional[str]:
+    """
+    Extract the 9-digit business number from various formats.
+    Examples:
+        - '733132559RR0001' -> '733132559'
+        - '749949871RC0001' -> '749949871'
+        - '766717813' -> '766717813'
+        - 'Not Available' -> None
+    """
+    if not bn_string or bn_string == 'Not Available':
+        return None
+
+    # Extract first 9 digits
+    match = _BUSINESS_NUMBER.match(str(bn_string).strip())
+    if match:
+        return match.group(1)
+    return None
+
+
+def content_hash(path, *params) -> str:
+    """SHA-1 of a file's bytes plus any parameters that change how it is read."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    for param in params:
+        digest.update(b'\0' + str(param).encode('utf-8'))
+    return digest.hexdigest()
+
+
+@dataclass
+class SourceStats:
+    """Indexing counts for one source."""
+    name: str
+    records: int = 0
+    indexed: int = 0
+    business_numbers: int = 0
+    # Business numbers that appear on more than one record in this source
+    collisions: int = 0
+    # Hash of the input the records came from, to tell whether it changed since the index was saved
+    content_hash: Optional[str] = None
+
+
+@dataclass
+class Overlap:
+    """One business number and its records in every source that has it."""
+    business_number: str
+    members: Dict[str, List[Record]]
+
+    @property
+    def sources(self) -> List[str]:
+        return list(self.members)
+
+
+class BusinessNumberIndex:
+    """
+    Multi-valued business-number index over several registries.
+    """
+
+    def __init__(self):
+        # business number -> source name -> records (in source order)
+        self._index: Dict[str, Dict[str, List[Record]]] = defaultdict(dict)
+        # source name -> business numbers it has records under
+        self._source_numbers: Dict[str, Set[str]] = {}
+        # source name -> records without a business number (kept for matching by other means)
+        self.unindexed: Dict[str, List[Record]] = {}
+        self.stats: Dict[str, SourceStats] = {}
+        # Business numbers with records in two or more sources
+        self._shared: Set[str] = set()
+
+    def __len__(self):
+        return len(self._index)
+
+    @property
+    def source_names(self) -> List[str]:
+        """Registered sources, in registration order."""
+        return list(self.stats)
+
+    def add_source(self, name: str, records: Iterable[Record],
+                   bn_of: Callable[[Record], Optional[str]], content_hash: Optional[str] = None) -> SourceStats:
+        """
+        Index every record of a source under the business number `bn_of` returns.
+        Records without a business number are counted and kept in `unindexed`.
+        """
+        if name in self.stats:
+            raise ValueError(f"Source '{name}' is already registered")
+        return self._index_source(name, records, bn_of, content_hash)
+
+    def _index_source(self, name: str, records: Iterable[Record],
+                      bn_of: Callable[[Record], Optional[str]], content_hash: Optional[str]) -> SourceStats:
+        stats = SourceStats(name, content_hash=content_hash)
+        business_numbers = set()
+        unindexed = []
+        for record in records:
+            stats.records += 1
+            bn = bn_of(record)
+            if not bn:
+                unindexed.append(record)
+                continue
+            stats.indexed += 1
+            business_numbers.add(bn)
+            members = self._index[bn]
+            entries = members.setdefault(name, [])
+            if len(entries) == 1:
+                stats.collisions += 1
+            entries.append(record)
+            if len(members) > 1:
+                self._shared.add(bn)
+        stats.business_numbers = len(business_numbers)
+        self._source_numbers[name] = business_numbers
+        self.unindexed[name] = unindexed
+        self.stats[name] = stats
+        return stats
+
+    def _drop_records(self, name: str) -> Set[str]:
+        """Remove a source's records from the index; returns the business numbers they were under."""
+        numbers = self._source_numbers.pop(name, set())
+        for bn in numbers:
+            members = self._index[bn]
+            members.pop(name, None)
+            if len(members) < 2:
+                self._shared.discard(bn)
+            if not members:
+                del self._index[bn]
+        self.unindexed.pop(name, None)
+        return numbers
+
+    def remove_source(self, name: str) -> Set[str]:
+        """Unregister a source; returns the business numbers whose overlaps may have changed."""
+        numbers = self._drop_records(name)
+        self.stats.pop(name, None)
+        return numbers
+
+    def replace_source(self, name: str, records: Iterable[Record],
+                       bn_of: Callable[[Record], Optional[str]], content_hash: Optional[str] = None) -> Set[str]:
+        """
+        Swap a source's records for new ones, keeping its place in the source order.
+        Returns the business numbers whose overlaps may have changed (old and new).
+        """
+        if name not in self.stats:
+            self._index_source(name, records, bn_of, content_hash)
+            return set(self._source_numbers[name])
+        old_numbers = self._drop_records(name)
+        self._index_source(name, records, bn_of, content_hash)
+        return old_numbers | self._source_numbers[name]
+
+    def business_numbers_of(self, name: str) -> Set[str]:
+        """Business numbers a source has records under."""
+        return set(self._source_numbers.get(name, ()))
+
+    def records_of(self, name: str) -> Iterator[Record]:
+        """Every record of a source, indexed or not (in no particular order)."""
+        for bn in self._source_numbers.get(name, ()):
+            yield from self._index[bn][name]
+        yield from self.unindexed.get(name, ())
+
+    def content_hash_of(self, name: str) -> Optional[str]:
+        stats = self.stats.get(name)
+        return stats.content_hash if stats else None
+
+    def save(self, path: str):
+        """Pickle the index (records, stats and content hashes) to `path`."""
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            pickle.dump((INDEX_VERSION, self), f, protocol=pickle.HIGHEST_PROTOCOL)
+        # Replace in one step so an interrupted save keeps the previous index
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["BusinessNumberIndex"]:
+        """The index saved at `path`, or None if there is none or it is from an older layout."""
+        try:
+            with open(path, 'rb') as f:
+                version, index = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError, TypeError):
+            return None
+        return index if version == INDEX_VERSION and isinstance(index, cls) else None
+
+    def get(self, business_number: str) -> Dict[str, List[Record]]:
+        """Records for one business number, by source."""
+        return self._index.get(business_number, {})
+
+    def overlaps(self, min_sources: int = 2, required: Iterable[str] = (),
+                 business_numbers: Optional[Iterable[str]] = None) -> Iterator[Overlap]:
+        """
+        Yield every business number present in at least `min_sources` sources
+        (and in all of `required`), in business-number order. Only
+        `business_numbers` are probed if given; otherwise only the numbers of
+        the smallest required source, or those shared by several sources.
+        """
+        required = tuple(required)
+        order = {name: i for i, name in enumerate(self.stats)}
+        if business_numbers is None:
+            if required:
+                business_numbers = min((self._source_numbers.get(name, set()) for name in required), key=len)
+            elif min_sources >= 2:
+                business_numbers = self._shared
+            else:
+                business_numbers = self._index
+        entries = ((bn, self._index[bn]) for bn in sorted(business_numbers) if bn in self._index)
+        for bn, members in entries:
+            if len(members) < min_sources or any(name not in members for name in required):
+                continue
+            ordered = dict(sorted(members.items(), key=lambda item: order[item[0]]))
+            yield Overlap(bn, ordered)
+
+    def overlap_counts(self, min_sources: int = 2) -> Dict[tuple, int]:
+        """Number of business numbers shared by each combination of sources."""
+        counts: Dict[tuple, int] = defaultdict(int)
+        for overlap in self.overlaps(min_sources):
+            counts[tuple(overlap.sources)] += 1
+        return dict(counts)
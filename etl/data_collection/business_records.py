@@ -0,0 +1,150 @@
+"""
+Streaming sink for normalised Ontario business records.
+
+Records are written to JSON Lines as soon as they are parsed, deduplicated on
+Ontario corporation number. The sink can also stream the same records to a
+Parquet file (needs pyarrow) and export the `all_businesses.json` list that
+`data_analysis/analyze_json_stats.py` and `data_analysis/app.py` read.
+"""
+
+import json
+import os
+import re
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# Field names used by all_businesses.json and the Flask app
+RECORD_FIELDS = [
+    'Business Name',
+    'Corporation Number',
+    'Business Type',
+    'Amalgamation/Inc. Date',
+    'Location',
+    'Status',
+]
+
+# Number of records buffered before each Parquet row group is written
+PARQUET_BATCH_SIZE = 1000
+
+# Result names end with the corporation number, e.g. "ACME CO-OPERATIVE INC. (1001128344)"
+_CORPORATION_NUMBER = re.compile(r'^(?P<name>.*?)\s*\((?P<number>\d+)\)\s*$')
+
+
+def normalize_business_record(raw: Dict[str, str]) -> Dict[str, str]:
+    """
+    Turn a parsed result block into a record with the standard fields.
+    The corporation number is split out of the business name; "N/A" becomes "".
+    """
+    record = {field: (raw.get(field) or '').strip() for field in RECORD_FIELDS}
+    for field, value in record.items():
+        if value == 'N/A':
+            record[field] = ''
+
+    match = _CORPORATION_NUMBER.match(record['Business Name'])
+    if match and not record['Corporation Number']:
+        record['Business Name'] = match.group('name')
+        record['Corporation Number'] = match.group('number')
+
+    # Collapse whitespace left by line breaks inside the address block
+    record['Location'] = re.sub(r'\s+', ' ', record['Location'])
+    return record
+
+
+def read_business_records(path: str) -> Iterator[Dict[str, str]]:
+    """Yield records from a JSON Lines file written by `BusinessRecordSink`."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def export_business_json(jsonl_path: str, json_path: str) -> int:
+    """Write the records in `jsonl_path` as a single JSON list. Returns the record count."""
+    records = list(read_business_records(jsonl_path))
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(records, f, ensure_ascii=False, indent=2)
+    return len(records)
+
+
+class BusinessRecordSink:
+    """
+    Deduplicating JSON Lines (and optional Parquet) writer for business records.
+    """
+
+    def __init__(self, jsonl_path: str, parquet_path: Optional[str] = None):
+        self.jsonl_path = jsonl_path
+        self.parquet_path = parquet_path
+        self.records_written = 0
+        self.duplicates_skipped = 0
+        self._seen = set()
+        self._file = open(jsonl_path, 'w', encoding='utf-8')
+        self._parquet_writer = None
+        self._parquet_batch: List[Dict[str, str]] = []
+
+        if parquet_path:
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                self._pa = pa
+                schema = pa.schema([(field, pa.string()) for field in RECORD_FIELDS])
+                self._parquet_writer = pq.ParquetWriter(parquet_path, schema)
+            except ImportError:
+                print("pyarrow is not installed; skipping Parquet output")
+                self.parquet_path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _key(self, record: Dict[str, str]):
+        if record['Corporation Number']:
+            return record['Corporation Number']
+        # Without a corporation number, only exact repeats are duplicates
+        return tuple(record[field] for field in RECORD_FIELDS)
+
+    def add(self, raw: Dict[str, str]) -> bool:
+        """Normalise and write one record. Returns False if it was a duplicate."""
+        record = normalize_business_record(raw)
+        key = self._key(record)
+        if key in self._seen:
+            self.duplicates_skipped += 1
+            return False
+        self._seen.add(key)
+
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.records_written += 1
+
+        if self._parquet_writer is not None:
+            self._parquet_batch.append(record)
+            if len(self._parquet_batch) >= PARQUET_BATCH_SIZE:
+                self._write_parquet_batch()
+        return True
+
+    def add_many(self, raws: Iterable[Dict[str, str]]) -> int:
+        """Write several records. Returns how many were new."""
+        added = sum(1 for raw in raws if self.add(raw))
+        self._file.flush()
+        return added
+
+    def _write_parquet_batch(self):
+        if self._parquet_batch:
+            table = self._pa.Table.from_pylist(self._parquet_batch, schema=self._parquet_writer.schema)
+            self._parquet_writer.write_table(table)
+            self._parquet_batch = []
+
+    def close(self):
+        """Flush outstanding records and close all outputs."""
+        if not self._file.closed:
+            self._file.close()
+        if self._parquet_writer is not None:
+            self._write_parquet_batch()
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+    def export_json(self, json_path: str) -> int:
+        """Close the sink and write `json_path` as the list the analysis tools expect."""
+        self.close()
+        os.makedirs(os.path.dirname(json_path) or '.', exist_ok=True)
+        return export_business_json(self.jsonl_path, json_path)
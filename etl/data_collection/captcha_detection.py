@@ -0,0 +1,155 @@
+"""
+Cheap detection of CAPTCHA and rate-limit pages.
+
+Rather than serialising the whole DOM and substring-searching it on every
+search, a `ChallengeDetector` watches each page for the signals a challenge
+actually produces:
+1. A main-frame navigation to a challenge URL (captcha/challenge endpoints).
+2. A first-party document/XHR response with status 403 or 429.
+3. One targeted in-page check (`CHALLENGE_CHECK_JS`): known CAPTCHA widgets,
+   the page title, and - only if the search form has disappeared - the first
+   part of the visible text.
+
+Steps 1 and 2 cost nothing until they fire; step 3 is a single small
+`evaluate`. `detect_challenge_selenium` runs the same checks for the Selenium
+scraper.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from playwright.async_api import Frame, Page, Response
+
+from rate_control import OUTCOME_CAPTCHA, OUTCOME_THROTTLED
+
+# Form that is always present on ONBIS search and result pages
+SEARCH_FORM_SELECTOR = "#QueryString"
+
+# Fragments of challenge page URLs
+CHALLENGE_URL_PATTERNS = (
+    "captcha",
+    "/challenge",
+    "/cdn-cgi/challenge-platform",
+    "validate.perfdrive.com",
+    "/blocked",
+)
+
+# Statuses that mean the site is refusing or throttling us
+CHALLENGE_STATUSES = {403: OUTCOME_CAPTCHA, 429: OUTCOME_THROTTLED}
+
+# Phrases that only appear on challenge pages (matched case-insensitively)
+CHALLENGE_PHRASES = [
+    "captcha",
+    "are you a robot",
+    "not a robot",
+    "verify you are human",
+    "verify you are a human",
+    "prove you are human",
+    "unusual traffic",
+    "automation detected",
+    "suspicious activity",
+    "security check",
+    "access denied",
+    "request unblock",
+]
+
+# Returns a short reason string if the page is a challenge, else null
+CHALLENGE_CHECK_JS = """
+([formSelector, phrases]) => {
+    const widgets = 'iframe[src*="captcha"], iframe[src*="challenge"], .g-recaptcha, .h-captcha, '
+        + '[id*="captcha" i], [class*="captcha" i], form[action*="captcha" i]';
+    if (document.querySelector(widgets)) return 'captcha widget';
+    const pattern = new RegExp(phrases.map(p => p.replace(/[.*+?^${}()|[\\]\\\\]/g, '\\\\$&')).join('|'), 'i');
+    const title = document.title.match(pattern);
+    if (title) return 'title: ' + title[0];
+    // Challenge pages replace the application, so only read text once the search form is gone
+    if (!document.querySelector(formSelector)) {
+        const text = ((document.body && document.body.innerText) || '').slice(0, 2000).match(pattern);
+        if (text) return 'text: ' + text[0];
+    }
+    return null;
+}
+"""
+
+
+@dataclass
+class Challenge:
+    """A detected challenge and the rate-control outcome it maps to."""
+    outcome: str
+    reason: str
+
+
+def challenge_from_url(url: str) -> Optional[Challenge]:
+    """A challenge if `url` looks like a challenge page."""
+    lowered = url.lower()
+    for pattern in CHALLENGE_URL_PATTERNS:
+        if pattern in lowered:
+            return Challenge(OUTCOME_CAPTCHA, f"navigated to {url}")
+    return None
+
+
+class ChallengeDetector:
+    """
+    Watches pages for challenge navigations and responses, and checks them on demand.
+    """
+
+    def __init__(self, form_selector: str = SEARCH_FORM_SELECTOR, phrases: Optional[List[str]] = None):
+        self.form_selector = form_selector
+        self.phrases = phrases or CHALLENGE_PHRASES
+        self.detections = 0
+        # Signals seen by the hooks since the page was last checked
+        self._flags: Dict[Page, Challenge] = {}
+
+    def watch(self, page: Page):
+        """Install the navigation and response hooks on a new page."""
+        def on_navigated(frame: Frame):
+            if frame == page.main_frame:
+                challenge = challenge_from_url(frame.url)
+                if challenge:
+                    self._flags[page] = challenge
+
+        def on_response(response: Response):
+            outcome = CHALLENGE_STATUSES.get(response.status)
+            if outcome and response.request.resource_type in ("document", "xhr", "fetch"):
+                self._flags[page] = Challenge(outcome, f"HTTP {response.status} from {response.url}")
+
+        page.on("framenavigated", on_navigated)
+        page.on("response", on_response)
+        page.on("close", lambda _: self._flags.pop(page, None))
+
+    def js_args(self) -> list:
+        """Arguments for CHALLENGE_CHECK_JS, for callers that embed it in a larger evaluate."""
+        return [self.form_selector, self.phrases]
+
+    def take_flag(self, page: Page) -> Optional[Challenge]:
+        """Challenge signalled by the hooks since the last check, if any."""
+        challenge = self._flags.pop(page, None)
+        if challenge:
+            self.detections += 1
+        return challenge
+
+    def from_check_result(self, reason: Optional[str]) -> Optional[Challenge]:
+        """Challenge for a CHALLENGE_CHECK_JS result evaluated by the caller."""
+        if not reason:
+            return None
+        self.detections += 1
+        return Challenge(OUTCOME_CAPTCHA, reason)
+
+    async def check(self, page: Page) -> Optional[Challenge]:
+        """Hook signals first; otherwise one targeted in-page check."""
+        challenge = self.take_flag(page)
+        if challenge:
+            return challenge
+        return self.from_check_result(await page.evaluate(CHALLENGE_CHECK_JS, self.js_args()))
+
+
+def detect_challenge_selenium(driver, form_selector: str = SEARCH_FORM_SELECTOR,
+                              phrases: Optional[List[str]] = None) -> Optional[Challenge]:
+    """Same checks for a Selenium driver: the current URL, then one in-page script."""
+    challenge = challenge_from_url(driver.current_url)
+    if challenge:
+        return challenge
+    reason = driver.execute_script(
+        f"return ({CHALLENGE_CHECK_JS})(arguments[0]);", [form_selector, phrases or CHALLENGE_PHRASES]
+    )
+    return Challenge(OUTCOME_CAPTCHA, reason) if reason else None
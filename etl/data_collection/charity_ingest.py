@@ -0,0 +1,139 @@
+"""
+Streaming reader for CRA charity search exports.
+
+The CRA "List of charities" export is a tab-separated text file with a header
+row. The national list runs to hundreds of thousands of rows, so instead of
+`readlines()` this module:
+1. Detects the encoding from a sample of the file (UTF-8, then Windows-1252,
+   then Latin-1, which accepts any byte). Exports from the CRA site are
+   Windows-1252; reading them as cp863 turns accented letters into symbols.
+2. Maps the columns it needs by header name, falling back to their usual
+   positions, and projects every row onto those columns only.
+3. Yields one small typed `CharityRecord` per row, so memory stays flat and
+   the records can go straight into `bn_join.BusinessNumberIndex.add_source`.
+"""
+
+import codecs
+import csv
+import os
+import sys
+from itertools import islice
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+from bn_join import extract_business_number
+
+# Encodings tried, in order, against a sample of the file
+CANDIDATE_ENCODINGS = ["utf-8", "cp1252", "latin-1"]
+ENCODING_SAMPLE_SIZE = 1024 * 1024  # Bytes read to detect the encoding
+
+READ_BUFFER_SIZE = 1024 * 1024
+CHUNK_SIZE = 10000  # Records per chunk for iter_charity_chunks
+
+# Field -> (header prefix, usual column position) in the CRA export
+CHARITY_COLUMNS = {
+    'bn_full': ("BN/Registration number", 0),
+    'name': ("Organization name", 1),
+    'status': ("Status", 2),
+    'type': ("Type of qualified donee", 3),
+    'city': ("City", 10),
+    'province': ("Province", 11),
+    'postal_code': ("Postal code", 13),
+}
+
+
+class CharityRecord(NamedTuple):
+    """The projected columns of one row of the CRA export."""
+    row: int
+    bn_full: str
+    business_number: Optional[str]
+    name: str
+    status: str
+    type: str
+    city: str
+    province: str
+    postal_code: str
+
+
+def detect_encoding(filepath, sample_size: int = ENCODING_SAMPLE_SIZE) -> str:
+    """First candidate encoding that decodes a sample of the file."""
+    with open(filepath, 'rb') as f:
+        sample = f.read(sample_size)
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    for encoding in CANDIDATE_ENCODINGS:
+        # Incremental decode so a multi-byte character cut off at the end of the sample is not an error
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            decoder.decode(sample, final=len(sample) < sample_size)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return CANDIDATE_ENCODINGS[-1]
+
+
+def _normalize_header(header: str) -> str:
+    return header.strip().rstrip(':').strip().lower()
+
+
+def map_columns(header: List[str]) -> Dict[str, int]:
+    """Column index of each field, by header name where present, else by usual position."""
+    normalized = [_normalize_header(h) for h in header]
+    positions = {}
+    for field, (prefix, default) in CHARITY_COLUMNS.items():
+        prefix = prefix.lower()
+        positions[field] = next((i for i, h in enumerate(normalized) if h.startswith(prefix)), default)
+    return positions
+
+
+def iter_charities(filepath, encoding: Optional[str] = None) -> Iterator[CharityRecord]:
+    """
+    Stream the rows of a CRA charity export as CharityRecords.
+    Rows without a BN/registration number are skipped.
+    """
+    encoding = encoding or detect_encoding(filepath)
+    with open(filepath, 'r', encoding=encoding, newline='', buffering=READ_BUFFER_SIZE) as f:
+        # Names contain stray quotes, so fields are split on tabs only
+        reader = csv.reader(f, delimiter='\t', quoting=csv.QUOTE_NONE)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = map_columns(header)
+        getters = [(field, columns[field]) for field in CHARITY_COLUMNS]
+
+        row = 0
+        for parts in reader:
+            if not parts or not parts[0]:
+                continue
+            width = len(parts)
+            values = {field: parts[i].strip() if i < width else '' for field, i in getters}
+            yield CharityRecord(
+                row=row,
+                business_number=extract_business_number(values['bn_full']),
+                **values
+            )
+            row += 1
+
+
+def iter_charity_chunks(filepath, chunk_size: int = CHUNK_SIZE,
+                        encoding: Optional[str] = None) -> Iterator[List[CharityRecord]]:
+    """The same records in lists of up to `chunk_size`, for batch consumers."""
+    records = iter_charities(filepath, encoding)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python charity_ingest.py <charities_export.txt>")
+        sys.exit(1)
+
+    path = sys.argv[1]
+    detected = detect_encoding(path)
+    count = with_bn = 0
+    for record in iter_charities(path, detected):
+        count += 1
+        with_bn += record.business_number is not None
+    print(f"{os.path.basename(path)}: {detected}, {count} charities, {with_bn} with business numbers")
@@ -0,0 +1,258 @@
+"""
+Load-balanced pool of Playwright browser contexts.
+
+Work checks a context out of the pool and returns it when done. New work goes
+to the least-loaded healthy context (fewest pages in flight, then fastest
+recent searches, then longest idle). Contexts that hit a CAPTCHA or keep
+failing are quarantined for a cool-down period and recycled (closed and
+replaced by a fresh context on the same browser) once their in-flight work
+has drained, so one degraded context does not drag down the whole run.
+A context that cannot be recreated is retried with a growing delay and given
+up on after a few attempts; once no context is left, checkouts raise
+instead of waiting forever.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+
+from playwright.async_api import Browser, BrowserContext, Page
+
+from scrape_tracing import annotate, span
+
+# Consecutive errors before a context is quarantined
+MAX_CONSECUTIVE_ERRORS = 3
+# Seconds a quarantined context is kept out of rotation
+QUARANTINE_SECONDS = 60.0
+# Failed context recreations: first retry delay (doubling each time) and attempts before giving up
+RECREATE_RETRY_SECONDS = 5.0
+MAX_RECREATE_ATTEMPTS = 5
+# Weight of the newest search time in the moving average
+SEARCH_TIME_SMOOTHING = 0.3
+
+
+@dataclass
+class ContextSlot:
+    """A pooled context and its load/health bookkeeping."""
+    slot_id: int
+    browser: Browser
+    context: BrowserContext
+    in_use: int = 0
+    completed: int = 0
+    consecutive_errors: int = 0
+    total_errors: int = 0
+    captchas: int = 0
+    recycles: int = 0
+    avg_search_time: float = 0.0
+    idle_time: float = 0.0
+    last_released: float = field(default_factory=time.monotonic)
+    quarantined_until: float = 0.0
+    needs_recycle: bool = False
+    # A replacement context is being created (outside the pool lock)
+    recycling: bool = False
+    # Failed recreations since the last good context, and when to try again
+    recreate_failures: int = 0
+    retry_recycle_at: float = 0.0
+    # Could not be recreated after MAX_RECREATE_ATTEMPTS; out of the pool for good
+    dead: bool = False
+    # Loaded search pages kept open between searches
+    idle_pages: List[Page] = field(default_factory=list)
+
+    @property
+    def healthy(self) -> bool:
+        return not self.needs_recycle and not self.recycling and time.monotonic() >= self.quarantined_until
+
+
+class NoUsableContextError(RuntimeError):
+    """Every context in the pool failed to be recreated."""
+
+
+class ContextPool:
+    """
+    Check-out/check-in pool of browser contexts with health tracking.
+    """
+
+    def __init__(self, create_context: Callable[[Browser], Awaitable[BrowserContext]],
+                 max_pages_per_context: int = 1,
+                 max_consecutive_errors: int = MAX_CONSECUTIVE_ERRORS,
+                 quarantine_seconds: float = QUARANTINE_SECONDS):
+        self.create_context = create_context
+        self.max_pages_per_context = max(1, max_pages_per_context)
+        self.max_consecutive_errors = max_consecutive_errors
+        self.quarantine_seconds = quarantine_seconds
+        self.slots: List[ContextSlot] = []
+        self._condition = asyncio.Condition()
+
+    def __len__(self):
+        return len(self.slots)
+
+    @property
+    def contexts(self) -> List[BrowserContext]:
+        return [slot.context for slot in self.slots]
+
+    async def add(self, browser: Browser) -> ContextSlot:
+        """Create a new context on `browser` and add it to the pool."""
+        context = await self.create_context(browser)
+        slot = ContextSlot(slot_id=len(self.slots), browser=browser, context=context)
+        self.slots.append(slot)
+        return slot
+
+    def least_loaded(self) -> Optional[ContextSlot]:
+        """The healthy context with spare capacity that new work should go to, if any."""
+        candidates = [s for s in self.slots if s.healthy and s.in_use < self.max_pages_per_context]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda s: (s.in_use, s.avg_search_time, s.last_released))
+
+    def _awaiting_retry(self, slot: ContextSlot) -> bool:
+        """True for an idle slot whose context still has to be recreated."""
+        return slot.needs_recycle and not slot.recycling and not slot.dead and slot.in_use == 0
+
+    def _due_for_recycle(self) -> Optional[ContextSlot]:
+        """An idle slot whose recreation is due (again), if any."""
+        now = time.monotonic()
+        for slot in self.slots:
+            if self._awaiting_retry(slot) and slot.retry_recycle_at <= now:
+                return slot
+        return None
+
+    def _next_wakeup(self) -> Optional[float]:
+        """Seconds until the earliest quarantine ends or recreation retry is due, or None to wait for a release."""
+        now = time.monotonic()
+        waiting = [s.quarantined_until for s in self.slots if not s.needs_recycle and s.quarantined_until > now]
+        waiting += [s.retry_recycle_at for s in self.slots if self._awaiting_retry(s)]
+        if not waiting:
+            return None
+        return max(0.0, min(waiting) - now)
+
+    @asynccontextmanager
+    async def checkout(self) -> AsyncIterator[ContextSlot]:
+        """
+        Borrow the least-loaded healthy context for the duration of the block.
+        Waits if every context is busy or quarantined, retrying contexts whose
+        recreation failed; raises NoUsableContextError once none can come back.
+        """
+        with span("checkout"):
+            while True:
+                retry = None
+                async with self._condition:
+                    while True:
+                        slot = self.least_loaded()
+                        if slot is not None:
+                            break
+                        if self.slots and all(s.dead for s in self.slots):
+                            raise NoUsableContextError("No browser context could be recreated")
+                        retry = self._due_for_recycle()
+                        if retry is not None:
+                            retry.recycling = True
+                            break
+                        try:
+                            await asyncio.wait_for(self._condition.wait(), timeout=self._next_wakeup())
+                        except asyncio.TimeoutError:
+                            pass
+
+                    if slot is not None:
+                        if slot.in_use == 0:
+                            slot.idle_time += time.monotonic() - slot.last_released
+                        slot.in_use += 1
+                        break
+                await self._recycle_unlocked(retry)
+        annotate(context=slot.slot_id)
+
+        try:
+            yield slot
+        finally:
+            await self._release(slot)
+
+    async def _release(self, slot: ContextSlot):
+        async with self._condition:
+            slot.in_use -= 1
+            recycle = False
+            if slot.in_use == 0:
+                slot.last_released = time.monotonic()
+                if slot.needs_recycle and not slot.recycling:
+                    # Claimed here; the browser round-trips happen without holding the lock
+                    slot.recycling = recycle = True
+            self._condition.notify_all()
+        if recycle:
+            await self._recycle_unlocked(slot)
+
+    async def _recycle_unlocked(self, slot: ContextSlot):
+        """Recycle a slot claimed with `recycling`, then hand it back to waiting checkouts."""
+        try:
+            await self._recycle(slot)
+        finally:
+            async with self._condition:
+                slot.recycling = False
+                self._condition.notify_all()
+
+    async def _recycle(self, slot: ContextSlot):
+        """Replace a quarantined context with a fresh one on the same browser."""
+        print(f"[Pool] ♻️ Recycling context {slot.slot_id}")
+        # Warm pages belong to the old context and close with it
+        slot.idle_pages.clear()
+        try:
+            await slot.context.close()
+        except Exception as e:
+            print(f"[Pool] Error closing context {slot.slot_id}: {e}")
+        try:
+            slot.context = await self.create_context(slot.browser)
+            slot.needs_recycle = False
+            slot.consecutive_errors = 0
+            slot.recreate_failures = 0
+            slot.recycles += 1
+        except Exception as e:
+            # Leave it out of rotation rather than hand out a dead context; checkouts retry it later
+            slot.recreate_failures += 1
+            if slot.recreate_failures >= MAX_RECREATE_ATTEMPTS:
+                slot.dead = True
+                print(f"[Pool] Could not recreate context {slot.slot_id} ({e}); giving up after {slot.recreate_failures} attempts")
+            else:
+                delay = RECREATE_RETRY_SECONDS * 2 ** (slot.recreate_failures - 1)
+                slot.retry_recycle_at = time.monotonic() + delay
+                print(f"[Pool] Could not recreate context {slot.slot_id} ({e}); retrying in {delay:.0f}s")
+
+    def report_success(self, slot: ContextSlot, search_time: float):
+        """Record a completed search on `slot`."""
+        slot.completed += 1
+        slot.consecutive_errors = 0
+        if slot.avg_search_time == 0.0:
+            slot.avg_search_time = search_time
+        else:
+            slot.avg_search_time += SEARCH_TIME_SMOOTHING * (search_time - slot.avg_search_time)
+
+    def report_failure(self, slot: ContextSlot, captcha: bool = False):
+        """
+        Record a failed search on `slot`. A CAPTCHA, or too many errors in a
+        row, quarantines the context and marks it for recycling.
+        """
+        slot.total_errors += 1
+        slot.consecutive_errors += 1
+        if captcha:
+            slot.captchas += 1
+
+        if captcha or slot.consecutive_errors >= self.max_consecutive_errors:
+            reason = "CAPTCHA" if captcha else f"{slot.consecutive_errors} consecutive errors"
+            print(f"[Pool] 🚧 Quarantining context {slot.slot_id} for {self.quarantine_seconds:.0f}s ({reason})")
+            slot.quarantined_until = time.monotonic() + self.quarantine_seconds
+            slot.needs_recycle = True
+
+    async def close(self):
+        """Close every pooled context."""
+        for slot in self.slots:
+            try:
+                await slot.context.close()
+            except Exception as e:
+                print(f"Error closing context: {e}")
+
+    def summary(self) -> str:
+        """One line per context with its load and health counters."""
+        lines = []
+        for s in self.slots:
+            lines.append(
+                f"Context {s.slot_id}: {s.completed} done, {s.total_errors} errors, {s.captchas} captchas, "
+                f"{s.recycles} recycles, avg {s.avg_search_time:.2f}s, idle {s.idle_time:.1f}s"
+            )
+        return "\n".join(lines)
@@ -2,206 +2,451 @@
 """
 Cross-check federal non-profits and cooperatives against registered charities.
 Identifies overlaps based on business numbers.
+
+Business records without a usable business number are matched on name
+instead (n-gram blocked fuzzy matching, see name_matching.py).
+
+Any number of extra registries that carry business numbers can be added with
+--source NAME=PATH; every source goes into one business-number index and the
+overlaps between all of them are written alongside the charity overlaps.
+
+Runs are incremental: the index is saved with a content hash of every input.
+On the next run only the inputs whose hash changed are re-read, only the
+business numbers they touch are re-probed, and the overlap rows that
+appeared or disappeared are appended to a changelog CSV. The output CSVs
+are written on every run, from the index, even when no input changed.
 """
 
+import argparse
 import csv
-import re
-from collections import defaultdict
+import json
+import os
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import chain
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from bn_join import BusinessNumberIndex, content_hash, extract_business_number
+from charity_ingest import detect_encoding, iter_charities
+from name_matching import DEFAULT_THRESHOLD, NameIndex
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+INPUT_DIR = os.path.join(SCRIPT_DIR, '..', 'pre_req_input')
+OUTPUT_DIR = os.path.join(SCRIPT_DIR, '..', 'output')
+
+# Default inputs and outputs, relative to this script
+DEFAULT_CHARITIES_FILE = os.path.join(INPUT_DIR, 'Charities_results_2025-11-09-14-17-45.txt')
+DEFAULT_NONPROFITS_FILE = os.path.join(OUTPUT_DIR, 'federal-non-for-profit-Ontario.csv')
+DEFAULT_COOPERATIVES_FILE = os.path.join(OUTPUT_DIR, 'federal-cooperative-Ontario.csv')
+DEFAULT_OUTPUT_FILE = os.path.join(OUTPUT_DIR, 'charity_business_overlaps.csv')
+DEFAULT_ALL_OVERLAPS_FILE = os.path.join(OUTPUT_DIR, 'business_number_overlaps.csv')
+DEFAULT_NAME_MATCHES_FILE = os.path.join(OUTPUT_DIR, 'charity_business_name_matches.csv')
+DEFAULT_CHANGELOG_FILE = os.path.join(OUTPUT_DIR, 'charity_business_overlaps_changes.csv')
+DEFAULT_STATE_FILE = os.path.join(OUTPUT_DIR, 'cache', 'bn_index.pkl')
+
+CHARITIES = 'Charities'
+NONPROFITS = 'Federal Non-Profit'
+COOPERATIVES = 'Federal Cooperative'
+
+# Records printed per re-read source as a sanity check
+SAMPLE_SIZE = 5
+
+# Column holding the business number in registry CSV/JSON files
+BUSINESS_NUMBER_COLUMN = 'Business Number'
+
+OVERLAP_FIELDS = [
+    'business_number',
+    'business_type',
+    'charity_name',
+    'corporate_name',
+    'charity_bn_full',
+    'business_bn_full',
+    'charity_status',
+    'charity_type',
+    'charity_city',
+    'charity_province',
+    'corporation_number'
+]
+
+NAME_MATCH_FIELDS = [
+    'name_score',
+    'business_type',
+    'charity_name',
+    'corporate_name',
+    'charity_bn_full',
+    'business_bn_full',
+    'charity_city',
+    'charity_province',
+    'corporation_number'
+]
+
+CHANGELOG_FIELDS = ['run_at', 'change'] + OVERLAP_FIELDS
+
+
+def load_csv_businesses(filepath, business_type, bn_column: str = BUSINESS_NUMBER_COLUMN) -> List[Dict[str, str]]:
+    """Load businesses from a registry CSV (or a JSON list of records) with a business number column."""
+    if filepath.lower().endswith('.json'):
+        with open(filepath, 'r', encoding='utf-8') as f:
+            rows = json.load(f)
+    else:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+
+    businesses = []
+    for row in rows:
+        businesses.append({
+            'row': len(businesses),
+            'bn_full': row.get(bn_column) or '',
+            'corporate_name': row.get('Corporate Name') or row.get('Business Name') or '',
+            'corporation_number': row.get('Corporation Number') or '',
+            'business_type': business_type
+        })
+
+    return businesses
+
+
+def charity_bn(record) -> Optional[str]:
+    return record.business_number
+
+
+def business_bn(record) -> Optional[str]:
+    return extract_business_number(record['bn_full'])
+
 
-def extract_business_number(bn_string):
+def record_content(record) -> tuple:
+    """A record's fields without its row position, which shifts whenever an earlier row is added or removed."""
+    if isinstance(record, tuple):
+        return tuple(record._replace(row=None))
+    return tuple(sorted((key, value) for key, value in record.items() if key != 'row'))
+
+
+def changed_business_numbers(old: Dict[str, List], new: Dict[str, List]) -> Set[str]:
+    """Business numbers whose records (compared by content, as multisets) differ between two groupings."""
+    return {bn for bn in old.keys() | new.keys()
+            if Counter(map(record_content, old.get(bn, ()))) != Counter(map(record_content, new.get(bn, ())))}
+
+
+def group_records(records: Iterable, bn_of: Callable) -> Tuple[Dict[str, List], List, List]:
     """
-    Extract the 9-digit business number from various formats.
-    Examples:
-        - '733132559RR0001' -> '733132559'
-        - '749949871RC0001' -> '749949871'
-        - '766717813' -> '766717813'
-        - 'Not Available' -> None
+    Consume `records` once into (records by business number, records without one,
+    the first SAMPLE_SIZE records in file order).
     """
-    if not bn_string or bn_string == 'Not Available':
-        return None
-    
-    # Extract first 9 digits
-    match = re.match(r'(\d{9})', str(bn_string))
-    if match:
-        return match.group(1)
-    return None
-
-def load_charities(filepath):
-    """Load charities from tab-separated text file."""
-    charities = {}
-    
-    with open(filepath, 'r', encoding='latin-1') as f:
-        lines = f.readlines()
-        
-        # Skip header line
-        for line in lines[1:]:
-            # Split by tab
-            parts = line.strip().split('\t')
-            if len(parts) > 0 and parts[0]:
-                bn_full = parts[0]
-                bn = extract_business_number(bn_full)
-                
-                if bn:
-                    org_name = parts[1] if len(parts) > 1 else ''
-                    charities[bn] = {
-                        'bn_full': bn_full,
-                        'name': org_name,
-                        'status': parts[2] if len(parts) > 2 else '',
-                        'type': parts[3] if len(parts) > 3 else '',
-                        'city': parts[10] if len(parts) > 10 else '',
-                        'province': parts[11] if len(parts) > 11 else ''
-                    }
-    
-    return charities
-
-def load_csv_businesses(filepath, business_type):
-    """Load businesses from CSV file."""
-    businesses = {}
-    
-    with open(filepath, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        
-        for row in reader:
-            bn_full = row.get('Business Number', '')
-            bn = extract_business_number(bn_full)
-            
-            if bn:
-                businesses[bn] = {
-                    'bn_full': bn_full,
-                    'corporate_name': row.get('Corporate Name', ''),
-                    'corporation_number': row.get('Corporation Number', ''),
-                    'business_type': business_type
-                }
-    
-    return businesses
+    groups: Dict[str, List] = defaultdict(list)
+    unindexed = []
+    sample = []
+    for record in records:
+        if len(sample) < SAMPLE_SIZE:
+            sample.append(record)
+        bn = bn_of(record)
+        if bn:
+            groups[bn].append(record)
+        else:
+            unindexed.append(record)
+    return groups, unindexed, sample
 
-def find_overlaps(charities, nonprofits, cooperatives):
-    """Find businesses that appear in both charities and business registries."""
-    overlaps = []
-    
-    # Check non-profits
-    for bn, nonprofit_data in nonprofits.items():
-        if bn in charities:
-            overlaps.append({
-                'business_number': bn,
-                'charity_bn_full': charities[bn]['bn_full'],
-                'charity_name': charities[bn]['name'],
-                'charity_status': charities[bn]['status'],
-                'charity_type': charities[bn]['type'],
-                'charity_city': charities[bn]['city'],
-                'charity_province': charities[bn]['province'],
-                'business_type': 'Federal Non-Profit',
-                'business_bn_full': nonprofit_data['bn_full'],
-                'corporate_name': nonprofit_data['corporate_name'],
-                'corporation_number': nonprofit_data['corporation_number']
-            })
-    
-    # Check cooperatives
-    for bn, coop_data in cooperatives.items():
-        if bn in charities:
-            overlaps.append({
-                'business_number': bn,
-                'charity_bn_full': charities[bn]['bn_full'],
-                'charity_name': charities[bn]['name'],
-                'charity_status': charities[bn]['status'],
-                'charity_type': charities[bn]['type'],
-                'charity_city': charities[bn]['city'],
-                'charity_province': charities[bn]['province'],
-                'business_type': 'Federal Cooperative',
-                'business_bn_full': coop_data['bn_full'],
-                'corporate_name': coop_data['corporate_name'],
-                'corporation_number': coop_data['corporation_number']
+
+@dataclass
+class IndexUpdate:
+    """What has to change in a saved index to match the current input files."""
+    # source name -> (new records by business number, records without one, business-number function, content hash)
+    changed: Dict[str, Tuple[Dict[str, List], List, Callable, str]] = field(default_factory=dict)
+    # source name -> first records of each re-read source, for the printed sample
+    samples: Dict[str, List] = field(default_factory=dict)
+    removed: List[str] = field(default_factory=list)
+    # Registration order of the wanted sources (drives output order)
+    order: List[str] = field(default_factory=list)
+    # Business numbers whose overlaps may differ after the update
+    affected: Set[str] = field(default_factory=set)
+
+    @property
+    def empty(self) -> bool:
+        return not self.changed and not self.removed
+
+
+def plan_index_update(index: BusinessNumberIndex, charities_file, business_files: List[Tuple[str, str, str]],
+                      encoding: Optional[str] = None) -> IndexUpdate:
+    """Re-read only the inputs whose content hash differs from the one saved in the index."""
+    wanted = [(CHARITIES, charities_file, encoding or '')] + list(business_files)
+    update = IndexUpdate(order=[name for name, _, _ in wanted])
+
+    for name, path, param in wanted:
+        digest = content_hash(path, param)
+        if digest == index.content_hash_of(name):
+            continue
+        if name == CHARITIES:
+            # Streamed straight into the grouping; the export is never held as one list
+            records, bn_of = iter_charities(path, encoding), charity_bn
+        else:
+            records, bn_of = load_csv_businesses(path, name, param), business_bn
+        new_groups, unindexed, update.samples[name] = group_records(records, bn_of)
+        update.changed[name] = (new_groups, unindexed, bn_of, digest)
+        # Only business numbers whose records were added, removed or edited are re-probed
+        old_groups = {bn: index.get(bn).get(name, []) for bn in index.business_numbers_of(name)}
+        update.affected |= changed_business_numbers(old_groups, new_groups)
+
+    update.removed = [name for name in index.source_names if name not in update.order]
+    for name in update.removed:
+        update.affected |= index.business_numbers_of(name)
+    return update
+
+
+def apply_index_update(index: BusinessNumberIndex, update: IndexUpdate):
+    for name in update.removed:
+        index.remove_source(name)
+    for name in update.order:
+        if name in update.changed:
+            groups, unindexed, bn_of, digest = update.changed[name]
+            index.replace_source(name, chain(chain.from_iterable(groups.values()), unindexed), bn_of, digest)
+
+
+def find_overlaps(index: BusinessNumberIndex, business_numbers: Optional[Set[str]] = None) -> List[Dict[str, str]]:
+    """
+    Find businesses that appear in both charities and business registries.
+    One row per (business record, charity record) pair, in source and file order.
+    Only `business_numbers` are probed if given.
+    """
+    source_order = {name: i for i, name in enumerate(index.source_names)}
+    keyed = []
+    for overlap in index.overlaps(required=[CHARITIES], business_numbers=business_numbers):
+        charity_records = overlap.members[CHARITIES]
+        for source_name, business_records in overlap.members.items():
+            if source_name == CHARITIES:
+                continue
+            for business in business_records:
+                for charity in charity_records:
+                    # Same order as the registries: by source, then by position in each file
+                    key = (source_order[source_name], business['row'], charity.row)
+                    keyed.append((key, {
+                        'business_number': overlap.business_number,
+                        'charity_bn_full': charity.bn_full,
+                        'charity_name': charity.name,
+                        'charity_status': charity.status,
+                        'charity_type': charity.type,
+                        'charity_city': charity.city,
+                        'charity_province': charity.province,
+                        'business_type': source_name,
+                        'business_bn_full': business['bn_full'],
+                        'corporate_name': business['corporate_name'],
+                        'corporation_number': business['corporation_number']
+                    }))
+
+    keyed.sort(key=lambda item: item[0])
+    return [row for _, row in keyed]
+
+
+def read_overlaps(filepath) -> List[Dict[str, str]]:
+    """Overlap rows from a previous run's output CSV (empty if there is none)."""
+    if not os.path.exists(filepath):
+        return []
+    with open(filepath, 'r', newline='', encoding='utf-8') as f:
+        return [{name: row.get(name) or '' for name in OVERLAP_FIELDS} for row in csv.DictReader(f)]
+
+
+def diff_overlaps(old_rows: List[Dict[str, str]], new_rows: List[Dict[str, str]]):
+    """(added, removed) rows between two sets of overlap rows, compared as whole rows."""
+    def key(row):
+        return tuple(row[name] for name in OVERLAP_FIELDS)
+
+    old_counts = Counter(map(key, old_rows))
+    new_counts = Counter(map(key, new_rows))
+    added = [dict(zip(OVERLAP_FIELDS, row)) for row in (new_counts - old_counts).elements()]
+    removed = [dict(zip(OVERLAP_FIELDS, row)) for row in (old_counts - new_counts).elements()]
+    return added, removed
+
+
+def append_changelog(filepath, added, removed, run_at: str):
+    """Append this run's added/removed overlap rows to the changelog CSV."""
+    is_new = not os.path.exists(filepath)
+    with open(filepath, 'a', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=CHANGELOG_FIELDS)
+        if is_new:
+            writer.writeheader()
+        for change, rows in (('added', added), ('removed', removed)):
+            for row in rows:
+                writer.writerow({'run_at': run_at, 'change': change, **row})
+
+
+def find_name_matches(index: BusinessNumberIndex, threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, str]]:
+    """
+    Match charities by name against business records that have no usable business number.
+    One row per (charity, business) pair scoring at least `threshold`, best first.
+    """
+    unnumbered = [record for name in index.source_names if name != CHARITIES
+                  for record in index.unindexed.get(name, [])]
+    if not unnumbered:
+        return []
+    name_index = NameIndex([record['corporate_name'] for record in unnumbered])
+
+    matches = []
+    for charity in sorted(index.records_of(CHARITIES), key=lambda record: record.row):
+        for position, score in name_index.query(charity.name, threshold):
+            business = unnumbered[position]
+            matches.append({
+                'name_score': round(score, 3),
+                'business_type': business['business_type'],
+                'charity_name': charity.name,
+                'corporate_name': business['corporate_name'],
+                'charity_bn_full': charity.bn_full,
+                'business_bn_full': business['bn_full'],
+                'charity_city': charity.city,
+                'charity_province': charity.province,
+                'corporation_number': business['corporation_number']
             })
-    
-    return overlaps
+    print(f"  - {len(unnumbered)} business records without a business number, "
+          f"{name_index.comparisons} candidate comparisons")
+
+    matches.sort(key=lambda row: -row['name_score'])
+    return matches
+
+
+def all_source_overlaps(index: BusinessNumberIndex) -> List[Dict[str, str]]:
+    """Every business number shared by two or more sources, with the names each source uses."""
+    rows = []
+    for overlap in index.overlaps():
+        names = []
+        for source_name, records in overlap.members.items():
+            for record in records:
+                name = record.name if isinstance(record, tuple) else record.get('corporate_name', '')
+                names.append(f"{source_name}: {name}")
+        rows.append({
+            'business_number': overlap.business_number,
+            'source_count': len(overlap.members),
+            'sources': '; '.join(overlap.sources),
+            'names': ' | '.join(names),
+        })
+    rows.sort(key=lambda row: (-row['source_count'], row['business_number']))
+    return rows
+
+
+def parse_source(spec: str):
+    """Parse a NAME=PATH[:COLUMN] --source argument."""
+    if '=' not in spec:
+        raise argparse.ArgumentTypeError(f"Expected NAME=PATH[:COLUMN], got '{spec}'")
+    name, path = spec.split('=', 1)
+    column = BUSINESS_NUMBER_COLUMN
+    if ':' in os.path.basename(path):
+        path, column = path.rsplit(':', 1)
+    return name, path, column
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Cross-check business registries against registered charities by business number.")
+    parser.add_argument('--charities', default=DEFAULT_CHARITIES_FILE, help="CRA charities search export (tab-separated)")
+    parser.add_argument('--nonprofits', default=DEFAULT_NONPROFITS_FILE, help="Federal not-for-profit CSV")
+    parser.add_argument('--cooperatives', default=DEFAULT_COOPERATIVES_FILE, help="Federal cooperative CSV")
+    parser.add_argument('--source', action='append', default=[], type=parse_source, metavar='NAME=PATH[:COLUMN]',
+                        help=f"Extra registry CSV/JSON with a business number column (default '{BUSINESS_NUMBER_COLUMN}'); repeatable")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT_FILE, help="Charity overlaps CSV")
+    parser.add_argument('--all-overlaps', default=DEFAULT_ALL_OVERLAPS_FILE, help="Overlaps between all sources CSV")
+    parser.add_argument('--name-matches', default=DEFAULT_NAME_MATCHES_FILE, help="Name matches for records without a business number")
+    parser.add_argument('--name-threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Minimum name similarity, 0-1 (default {DEFAULT_THRESHOLD})")
+    parser.add_argument('--changelog', default=DEFAULT_CHANGELOG_FILE,
+                        help="CSV that each run's added/removed overlaps are appended to")
+    parser.add_argument('--state', default=DEFAULT_STATE_FILE, help="Saved business-number index for incremental runs")
+    parser.add_argument('--full', action='store_true', help="Ignore the saved index and re-read every input")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    run_at = datetime.now().isoformat(timespec='seconds')
 
-def main():
     print("=" * 80)
     print("Cross-Checking Charities with Federal Businesses")
     print("=" * 80)
     print()
-    
-    # File paths
-    charities_file = 'Charities_results_2025-11-09-14-17-45.txt'
-    nonprofits_file = 'federal-non-for-profit-Ontario.csv'
-    cooperatives_file = 'federal-cooperative-Ontario.csv'
-    
-    # Load data
-    print("Loading charities data...")
-    charities = load_charities(charities_file)
-    print(f"  - Loaded {len(charities)} charities with valid business numbers")
-    
-    print("\nLoading federal non-profits data...")
-    nonprofits = load_csv_businesses(nonprofits_file, 'Federal Non-Profit')
-    print(f"  - Loaded {len(nonprofits)} non-profits with valid business numbers")
-    
-    print("\nLoading federal cooperatives data...")
-    cooperatives = load_csv_businesses(cooperatives_file, 'Federal Cooperative')
-    print(f"  - Loaded {len(cooperatives)} cooperatives with valid business numbers")
-    
+
+    business_files = [
+        (NONPROFITS, args.nonprofits, BUSINESS_NUMBER_COLUMN),
+        (COOPERATIVES, args.cooperatives, BUSINESS_NUMBER_COLUMN),
+    ] + list(args.source)
+
+    # Saved index from the last run, unless a full rebuild was asked for
+    index = None if args.full else BusinessNumberIndex.load(args.state)
+    incremental = index is not None
+    if not incremental:
+        index = BusinessNumberIndex()
+    print(f"{'Updating saved' if incremental else 'Building new'} business-number index...")
+
+    # Load data (only the inputs whose content changed)
+    encoding = detect_encoding(args.charities)
+    update = plan_index_update(index, args.charities, business_files, encoding)
+    for name in update.order:
+        print(f"  - {name}: {'re-read' if name in update.changed else 'unchanged'}")
+    for name in update.removed:
+        print(f"  - {name}: no longer an input, removed")
+
+    if incremental and update.empty:
+        # The outputs are still rewritten: their paths or the name threshold may differ from the last run
+        print("  - No input changed since the last run; writing outputs from the saved index")
+        added, removed = [], []
+    else:
+        # Overlaps of the affected business numbers before and after the update
+        old_rows = find_overlaps(index, update.affected) if incremental else read_overlaps(args.output)
+        apply_index_update(index, update)
+        new_rows = find_overlaps(index, update.affected) if incremental else find_overlaps(index)
+        added, removed = diff_overlaps(old_rows, new_rows)
+        print(f"  - {len(update.affected)} business numbers probed: {len(added)} overlaps added, {len(removed)} removed")
+
+        os.makedirs(os.path.dirname(args.state) or '.', exist_ok=True)
+        index.save(args.state)
+
     # Verify business number as unique identifier
     print("\n" + "=" * 80)
     print("Verification: Are business numbers unique within each dataset?")
     print("=" * 80)
-    
+    for stats in index.stats.values():
+        print(f"  - {stats.name}: {stats.records} records, {stats.indexed} with valid business numbers, "
+              f"{stats.business_numbers} unique, {stats.collisions} shared by several records")
+
     # Sample some business numbers for verification
-    print("\nSample Business Numbers from each dataset:")
-    print("\nCharities (first 5):")
-    for i, (bn, data) in enumerate(list(charities.items())[:5]):
-        print(f"  {data['bn_full']} -> {bn} ({data['name'][:50]}...)")
-    
-    print("\nNon-Profits (first 5):")
-    for i, (bn, data) in enumerate(list(nonprofits.items())[:5]):
-        print(f"  {data['bn_full']} -> {bn} ({data['corporate_name'][:50]}...)")
-    
-    print("\nCooperatives (first 5):")
-    for i, (bn, data) in enumerate(list(cooperatives.items())[:5]):
-        print(f"  {data['bn_full']} -> {bn} ({data['corporate_name'][:50]}...)")
-    
+    print("\nSample Business Numbers from each re-read dataset:")
+    for name, sample in update.samples.items():
+        bn_of = update.changed[name][2]
+        print(f"\n{name} (first {SAMPLE_SIZE}):")
+        for data in sample:
+            if name == CHARITIES:
+                print(f"  {data.bn_full} -> {bn_of(data)} ({data.name[:50]}...)")
+            else:
+                print(f"  {data['bn_full']} -> {bn_of(data)} ({data['corporate_name'][:50]}...)")
+
     # Find overlaps
     print("\n" + "=" * 80)
     print("Finding Overlaps...")
     print("=" * 80)
-    overlaps = find_overlaps(charities, nonprofits, cooperatives)
-    
+    overlaps = find_overlaps(index) if incremental else new_rows
+
     print(f"\nFound {len(overlaps)} overlaps!")
-    
+
     # Save to CSV
-    output_file = 'charity_business_overlaps.csv'
-    
+    output_file = args.output
+
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=OVERLAP_FIELDS)
+        writer.writeheader()
+        writer.writerows(overlaps)
+    print(f"\nResults saved to: {output_file}")
+
+    if added or removed:
+        append_changelog(args.changelog, added, removed, run_at)
+        print(f"Changes ({len(added)} added, {len(removed)} removed) appended to: {args.changelog}")
+
     if overlaps:
-        with open(output_file, 'w', newline='', encoding='utf-8') as f:
-            fieldnames = [
-                'business_number',
-                'business_type',
-                'charity_name',
-                'corporate_name',
-                'charity_bn_full',
-                'business_bn_full',
-                'charity_status',
-                'charity_type',
-                'charity_city',
-                'charity_province',
-                'corporation_number'
-            ]
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(overlaps)
-        
-        print(f"\nResults saved to: {output_file}")
-        
         # Display summary
         print("\n" + "=" * 80)
         print("Summary of Overlaps by Business Type:")
         print("=" * 80)
-        
+
         type_counts = defaultdict(int)
         for overlap in overlaps:
             type_counts[overlap['business_type']] += 1
-        
+
         for btype, count in type_counts.items():
             print(f"  {btype}: {count}")
-        
+
         # Display first few overlaps
         print("\n" + "=" * 80)
         print("Sample Overlaps (first 10):")
@@ -214,7 +459,37 @@ def main():
             print(f"   Location: {overlap['charity_city']}, {overlap['charity_province']}")
     else:
         print("\nNo overlaps found.")
-    
+
+    # Overlaps between every combination of sources, from the same index
+    all_overlaps = all_source_overlaps(index)
+    # Written even when empty: the pipeline runner expects it after every run
+    with open(args.all_overlaps, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=['business_number', 'source_count', 'sources', 'names'])
+        writer.writeheader()
+        writer.writerows(all_overlaps)
+    if all_overlaps:
+        print("\n" + "=" * 80)
+        print("Overlaps by Source Combination:")
+        print("=" * 80)
+        for combination, count in sorted(index.overlap_counts().items(), key=lambda item: -item[1]):
+            print(f"  {' + '.join(combination)}: {count}")
+    print(f"\nAll-source overlaps saved to: {args.all_overlaps}")
+
+    # Records the business-number join cannot see
+    print("\n" + "=" * 80)
+    print("Matching Names of Records Without Business Numbers...")
+    print("=" * 80)
+    name_matches = find_name_matches(index, args.name_threshold)
+    print(f"\nFound {len(name_matches)} name matches (similarity >= {args.name_threshold})")
+    # Written even when empty, so a stricter threshold does not leave the previous matches behind
+    with open(args.name_matches, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=NAME_MATCH_FIELDS)
+        writer.writeheader()
+        writer.writerows(name_matches)
+    for match in name_matches[:10]:
+        print(f"  {match['name_score']:.2f}  {match['charity_name']} <-> {match['corporate_name']} ({match['business_type']})")
+    print(f"\nName matches saved to: {args.name_matches}")
+
     print("\n" + "=" * 80)
     print("Analysis Complete!")
     print("=" * 80)
@@ -7,10 +7,22 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import Select
 from time import sleep
 import threading
-from bs4 import BeautifulSoup
-
-f = open("output.txt", "w")
-f.close()
+from result_collector import ResultCollector
+from result_parsing import ParsePool, parse_result_rows
+from rate_control import AdaptiveRateController
+from captcha_detection import detect_challenge_selenium
+
+OUTPUT_FILE = "output.txt"
+BUSINESS_TYPES = [
+    "Not-for-Profit Corporation",
+    "Co-operative with Share",
+    "Co-operative Non-Share",
+]
+# Number of new records between flushes of each business type's record log
+AUTOSAVE_EVERY = 10
+# Searches from all business type threads are paced by one AIMD controller:
+# it speeds up while results come back clean and backs off on CAPTCHAs and timeouts
+RATE_CONTROLLER = AdaptiveRateController(max_concurrency=len(BUSINESS_TYPES))
 
 def setup_driver():
     """Initialize and configure the Chrome WebDriver"""
@@ -36,74 +48,40 @@ def waitTillLoaded(driver):
         lambda d: d.execute_script('return document.readyState') == 'complete'
     )
 
-def check_for_captcha(driver):
+def check_for_captcha(driver, challenge=None):
     """
-    Check if the page contains CAPTCHA-related words.
-    If found, wait indefinitely while periodically checking until it's resolved.
+    Check whether the page is a CAPTCHA or block page (URL plus one targeted in-page check).
+    If so, slow every thread down through the rate controller and wait until
+    it's resolved, re-checking at the controller's back-off interval.
+    A `challenge` already detected inside a rate slot has been reported through
+    the slot's ticket, so only the wait is done for it.
     """
-    captcha_keywords = [
-        'captcha', 'recaptcha', 'verify you are human', 'security check',
-        'please verify', 'robot', 'automation detected', 'access denied',
-        'suspicious activity', 'prove you are human'
-    ]
-    
-    page_text = driver.page_source.lower()
-    
-    # Check if any captcha keywords are present
-    captcha_detected = any(keyword in page_text for keyword in captcha_keywords)
+    if challenge is None:
+        challenge = detect_challenge_selenium(driver)
+        if challenge:
+            RATE_CONTROLLER.report(challenge.outcome)
     
-    if captcha_detected:
+    if challenge:
         print("\n" + "="*60)
-        print("⚠️  CAPTCHA DETECTED!")
+        print(f"⚠️  CAPTCHA DETECTED! ({challenge.reason})")
         print("="*60)
         print("Please solve the CAPTCHA in the browser window.")
         print("The script will automatically continue once resolved...")
         print("="*60 + "\n")
         
-        # Wait indefinitely, checking every 15 seconds
+        # Wait indefinitely, re-checking after the current back-off
         while True:
-            sleep(15)
+            sleep(max(1.0, RATE_CONTROLLER.cooldown_remaining(), RATE_CONTROLLER.delay))
             
-            # Re-check page content
-            page_text = driver.page_source.lower()
-            captcha_still_present = any(keyword in page_text for keyword in captcha_keywords)
-            
-            if not captcha_still_present:
+            if detect_challenge_selenium(driver) is None:
                 print("✅ CAPTCHA resolved! Continuing...")
                 break
             else:
                 print("⏳ Still waiting for CAPTCHA to be solved...")
     
-    return not captcha_detected
-
-# Get all the results
-def process_data(source, write, allData):
-    soup = BeautifulSoup(source, 'html.parser')
-    first = soup.select(".appMinimalMenu.viewMenu.appItemSearchResult.noSave.viewInstanceUpdateStackPush")
-    second = soup.select(".appMinimalBox.addressSearchResultBox")
-    status = soup.select(".appMinimalBox.statusSearchResult")
-    registration = soup.select(".appMinimalAttr.RegistrationDate")
-    entityType = soup.select(".appMinimalAttr.EntitySubTypeCode")
-    for row in range(int(soup.select_one(".appPagerBanner").text.split(" ")[-2])):
-        entry = (
-            first[row].text,
-            second[row].text.replace("\n", ""),
-            list(status[row].children)[1].text,
-            list(registration[row].children)[1].text,
-            list(entityType[row].children)[1].text
-        )
-        allData.add(entry)
+    return challenge is None
 
-        if write:
-            f = open("output.txt", "w")
-            # Save progress after entry
-            for data in allData:
-                f.write("\n".join(data) + "\n\n")
-            f.close()
-
-
-
-def scrape_businesses(business_type):
+def scrape_businesses(business_type, collector):
     driver = setup_driver()
 
     # Open website
@@ -142,29 +120,31 @@ def scrape_businesses(business_type):
     selectTwo.select_by_index(1)
     waitTillLoaded(driver)
 
-    allData = set()
     adjustedPageSize = False
-    prevThread = None
-    alphabet = map(chr, range(65, 91))  # A-Z
     curWord = ["A"]
-    itCounter = 0
-    autoSave = 10
 
     # Go through searching all letters A-Z
     while len(curWord) > 0:  # ASCII values for A-Z
         search_input = wait.until(
             EC.presence_of_element_located((By.CSS_SELECTOR, "input#QueryString"))
         )
-        search_input.clear()
-        search_input.send_keys("".join(curWord))
-        search_input.send_keys(Keys.RETURN)
-
-        WebDriverWait(driver, 60).until(
-            EC.invisibility_of_element_located((By.ID, "catProcessing"))
-        )
+        # Wait for the shared rate controller; a timeout here counts as push-back
+        with RATE_CONTROLLER.slot() as ticket:
+            search_input.clear()
+            search_input.send_keys("".join(curWord))
+            search_input.send_keys(Keys.RETURN)
+
+            WebDriverWait(driver, 60).until(
+                EC.invisibility_of_element_located((By.ID, "catProcessing"))
+            )
+
+            # Check for CAPTCHA before the slot is released, so the search counts as blocked
+            challenge = detect_challenge_selenium(driver)
+            if challenge:
+                ticket.outcome = challenge.outcome
         
-        # Check for CAPTCHA after search
-        check_for_captcha(driver)
+        # Wait out the CAPTCHA, if any
+        check_for_captcha(driver, challenge)
 
         # Adjust page size to 200 if not already done
         if not adjustedPageSize:
@@ -195,18 +175,10 @@ def scrape_businesses(business_type):
         except:
             noEntry = True
             print("No results found for " + "".join(curWord))
-        
-        if prevThread is not None:
-            prevThread.join()
 
+        # Parsing and saving happen on the collector's writer thread
         if not noEntry:
-            itCounter += 1
-
-            prevThread = threading.Thread(target=process_data, args=(driver.page_source, itCounter>=autoSave, allData))
-            prevThread.start()
-
-            if itCounter >= autoSave:
-                itCounter = 0
+            collector.submit_page(business_type, driver.page_source)
 
         # Adjust the current search word
         while len(curWord) > 0:
@@ -216,34 +188,36 @@ def scrape_businesses(business_type):
                 curWord[-1] = chr(ord(curWord[-1]) + 1)
                 break
 
-    # Final save with all data sorted and removed duplicates
-    with open("output.txt", "w") as f:
-        for data in sorted(allData):
-            f.write("\n".join(data) + "\n\n")
     driver.quit()
 
 def main():
     """Main function to run all scrapers concurrently."""
+    # Result pages are parsed in worker processes, off the scraper threads
+    parse_pool = ParsePool()
+    collector = ResultCollector(OUTPUT_FILE, parse_result_rows, flush_every=AUTOSAVE_EVERY, parse_pool=parse_pool)
+    collector.start()
+
     # Create threads for each business type
-    thread1 = threading.Thread(target=scrape_businesses, args=("Not-for-Profit Corporation",))
-    thread2 = threading.Thread(target=scrape_businesses, args=("Co-operative with Share",))
-    thread3 = threading.Thread(target=scrape_businesses, args=("Co-operative Non-Share",))
+    threads = [threading.Thread(target=scrape_businesses, args=(business_type, collector)) for business_type in BUSINESS_TYPES]
     
     # Start all threads
     print("Starting concurrent scraping...")
-    thread1.start()
-    sleep(2)  # Stagger starts slightly to avoid resource conflicts
-    thread2.start()
-    sleep(2)
-    thread3.start()
+    for i, thread in enumerate(threads):
+        if i > 0:
+            sleep(2)  # Stagger starts slightly to avoid resource conflicts
+        thread.start()
     
     # Wait for all threads to complete
     print("Waiting for all scrapers to finish...")
-    thread1.join()
-    thread2.join()
-    thread3.join()
+    for thread in threads:
+        thread.join()
+
+    # Final save with all data sorted and removed duplicates
+    total = collector.close()
+    parse_pool.close()
     
-    print("All scraping complete!")
+    print(f"All scraping complete! {total} records saved to {OUTPUT_FILE}")
+    print(RATE_CONTROLLER.summary())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
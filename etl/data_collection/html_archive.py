@@ -0,0 +1,231 @@
+"""
+Compressed, deduplicated archive of scraped result pages.
+
+Instead of one HTML file per search, debug pages are appended to a single
+container file as zlib-compressed records, with a JSON Lines index alongside
+it (business type, letter, page number, timestamp, offset, and whether the
+search failed). Result pages from the registry share most of their markup, so:
+1. Pages are compressed against a preset dictionary taken from the first page
+   archived (its head and tail, where the page chrome lives).
+2. Pages with identical content are stored once; later copies only get an
+   index entry pointing at the stored record.
+
+Archives can be replayed into the parsers, e.g.
+    python html_archive.py business_lookup_output/non_profit_lookups/pages.htmlz [business type] [letter]
+"""
+
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+MAGIC = b"HTMLZ1\n"
+# Record header: kind (1 byte) and payload length (4 bytes)
+_RECORD_HEADER = struct.Struct(">BI")
+_KIND_DICTIONARY = 0
+_KIND_PAGE = 1
+
+# zlib only looks back 32 KiB, so a larger dictionary would not help
+DICTIONARY_SIZE = 32 * 1024
+COMPRESSION_LEVEL = 9
+
+
+@dataclass
+class ArchiveEntry:
+    """Index entry for one archived page."""
+    label: str
+    business_type: str
+    letter: str
+    page: int
+    timestamp: float
+    offset: int
+    length: int
+    sha1: str
+    raw_size: int
+    # "failed" for error and challenge pages, which hold no results
+    status: str = "ok"
+
+
+def build_dictionary(page: bytes, size: int = DICTIONARY_SIZE) -> bytes:
+    """Preset dictionary from the head and tail of a sample page."""
+    if len(page) <= size:
+        return page
+    half = size // 2
+    return page[:half] + page[-half:]
+
+
+def index_path(archive_path: str) -> str:
+    """Path of the JSON Lines index that sits next to an archive."""
+    return archive_path + ".idx.jsonl"
+
+
+class HtmlArchive:
+    """
+    Append-only page archive with a content-hash index.
+    Reopening an existing archive appends to it.
+    """
+
+    def __init__(self, path: str, dictionary_size: int = DICTIONARY_SIZE,
+                 level: int = COMPRESSION_LEVEL):
+        self.path = path
+        self.dictionary_size = dictionary_size
+        self.level = level
+        self.entries: List[ArchiveEntry] = []
+        self.duplicates = 0
+        self.raw_bytes = 0
+        self._dictionary: Optional[bytes] = None
+        self._by_hash: Dict[str, ArchiveEntry] = {}
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self._load()
+            self._file = open(path, 'r+b')
+            self._file.seek(0, os.SEEK_END)
+        else:
+            self._file = open(path, 'wb')
+            self._file.write(MAGIC)
+        self._index = open(index_path(path), 'a', encoding='utf-8')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _load(self):
+        with open(self.path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.path} is not an HTML archive")
+            header = f.read(_RECORD_HEADER.size)
+            if len(header) == _RECORD_HEADER.size:
+                kind, length = _RECORD_HEADER.unpack(header)
+                if kind == _KIND_DICTIONARY:
+                    self._dictionary = f.read(length)
+
+        if os.path.exists(index_path(self.path)):
+            with open(index_path(self.path), 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        self._remember(ArchiveEntry(**json.loads(line)))
+
+    def _remember(self, entry: ArchiveEntry):
+        if entry.sha1 in self._by_hash:
+            self.duplicates += 1
+        else:
+            self._by_hash[entry.sha1] = entry
+        self.entries.append(entry)
+        self.raw_bytes += entry.raw_size
+
+    def _write_record(self, kind: int, payload: bytes) -> int:
+        offset = self._file.tell()
+        self._file.write(_RECORD_HEADER.pack(kind, len(payload)))
+        self._file.write(payload)
+        return offset
+
+    def add(self, html: str, business_type: str = "", letter: str = "", page: int = 1,
+            label: str = "", timestamp: Optional[float] = None, status: str = "ok") -> ArchiveEntry:
+        """Archive one page. Identical content already in the archive is not stored again."""
+        data = html.encode('utf-8')
+        digest = hashlib.sha1(data).hexdigest()
+
+        stored = self._by_hash.get(digest)
+        if stored is not None:
+            offset, length = stored.offset, stored.length
+        else:
+            if self._dictionary is None:
+                self._dictionary = build_dictionary(data, self.dictionary_size)
+                self._write_record(_KIND_DICTIONARY, self._dictionary)
+            compressor = zlib.compressobj(self.level, zdict=self._dictionary)
+            payload = compressor.compress(data) + compressor.flush()
+            offset = self._write_record(_KIND_PAGE, payload)
+            length = len(payload)
+            self._file.flush()
+
+        entry = ArchiveEntry(
+            label=label, business_type=business_type, letter=letter, page=page,
+            timestamp=time.time() if timestamp is None else timestamp,
+            offset=offset, length=length, sha1=digest, raw_size=len(data), status=status
+        )
+        # Index after the record is on disk, so the index never points past the data
+        self._index.write(json.dumps(asdict(entry), ensure_ascii=False) + "\n")
+        self._index.flush()
+        self._remember(entry)
+        return entry
+
+    def read(self, entry: ArchiveEntry) -> str:
+        """Decompress the page behind an index entry."""
+        self._file.flush()
+        with open(self.path, 'rb') as f:
+            f.seek(entry.offset)
+            kind, length = _RECORD_HEADER.unpack(f.read(_RECORD_HEADER.size))
+            payload = f.read(length)
+        if kind != _KIND_PAGE:
+            raise ValueError(f"No page record at offset {entry.offset}")
+        decompressor = zlib.decompressobj(zdict=self._dictionary)
+        return (decompressor.decompress(payload) + decompressor.flush()).decode('utf-8')
+
+    def find(self, business_type: Optional[str] = None, letter: Optional[str] = None,
+             since: Optional[float] = None, until: Optional[float] = None,
+             status: Optional[str] = None) -> List[ArchiveEntry]:
+        """Index entries matching every filter given, in the order they were archived."""
+        return [
+            e for e in self.entries
+            if (business_type is None or e.business_type == business_type)
+            and (letter is None or e.letter == letter)
+            and (since is None or e.timestamp >= since)
+            and (until is None or e.timestamp <= until)
+            and (status is None or e.status == status)
+        ]
+
+    def replay(self, parse_fn: Callable[[str], T], **filters) -> Iterator[Tuple[ArchiveEntry, T]]:
+        """Run archived pages back through a parser, e.g. `parse_search_results`."""
+        for entry in self.find(**filters):
+            yield entry, parse_fn(self.read(entry))
+
+    def stored_bytes(self) -> int:
+        """Size of the container on disk."""
+        self._file.flush()
+        return os.path.getsize(self.path)
+
+    def summary(self) -> str:
+        stored = self.stored_bytes()
+        ratio = self.raw_bytes / stored if stored else 0.0
+        return (f"Archived {len(self.entries)} pages ({self.duplicates} duplicates): "
+                f"{self.raw_bytes / 1024:.0f} KiB -> {stored / 1024:.0f} KiB ({ratio:.1f}x)")
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+        if not self._index.closed:
+            self._index.close()
+
+
+if __name__ == "__main__":
+    from result_parsing import parse_search_results
+
+    if len(sys.argv) < 2:
+        print("Usage: python html_archive.py ARCHIVE [BUSINESS_TYPE] [LETTER]")
+        sys.exit(1)
+
+    archive_file = sys.argv[1]
+    type_filter = sys.argv[2] if len(sys.argv) > 2 else None
+    letter_filter = sys.argv[3] if len(sys.argv) > 3 else None
+
+    with HtmlArchive(archive_file) as archive:
+        print(archive.summary())
+        total = 0
+        for archived, results in archive.replay(parse_search_results, business_type=type_filter,
+                                                  letter=letter_filter, status="ok"):
+            total += len(results)
+            print(f"{archived.label or archived.sha1[:12]}: {len(results)} results")
+        print(f"Replayed {total} results")
@@ -0,0 +1,389 @@
+"""
+Local stand-in for the ONBIS and federal corporation search sites.
+
+Serves just enough of both sites for the scrapers to run end to end without
+touching the live registries:
+- `/onbis/master/entry.pub`: the ONBIS search form (#QueryString, Advanced
+  filters, #SourceAppCode/#EntitySubTypeCode/#Status, page-size selector and
+  the #catProcessing overlay). Searches are fetched from `/onbis/master/search`
+  and rendered as `.appMinimalBox.ItemBox` blocks under a pager banner, up to
+  200 per page.
+- `/cc/lgcy/fdrlCrpSrch.html`: the federal search result list, paged with `p`.
+
+Results are generated deterministically from the query, or taken from the
+result blocks of pages recorded in an `HtmlArchive`. Latency and failed
+responses can be injected to see how the scrapers cope.
+
+Run standalone with:
+    python mock_registry.py [port] [archive.htmlz]
+"""
+
+import hashlib
+import html
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+ONBIS_ENTRY_PATH = "/onbis/master/entry.pub"
+ONBIS_SEARCH_PATH = "/onbis/master/search"
+FEDERAL_SEARCH_PATH = "/cc/lgcy/fdrlCrpSrch.html"
+ONBIS_QUERY = "?applicationCode=onbis-master&businessService=registerItemSearch"
+
+# Option values of the page-size selector, as on the live site
+PAGE_SIZES = {"1": 10, "2": 25, "3": 50, "4": 200}
+BUSINESS_TYPES = [
+    "Co-operative Non-Share",
+    "Co-operative with Share",
+    "Not-for-Profit Corporation",
+    "Business Corporation",
+]
+CITIES = ["KITCHENER", "WATERLOO", "CAMBRIDGE", "GUELPH", "TORONTO", "OTTAWA"]
+
+_FORM_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Search for a Business - Ontario Business Registry</title>
+<style>
+  #catProcessing {{ display: none; position: fixed; inset: 0; background: rgba(255,255,255,0.6); }}
+  #advancedFilters {{ display: none; }}
+</style>
+</head>
+<body>
+<form id="searchForm">
+  <label for="QueryString">Business name or number</label>
+  <input id="QueryString" name="QueryString" type="text">
+  <a id="expandonodeW297" href="#">Advanced</a>
+  <div id="advancedFilters">
+    <select id="SourceAppCode"><option value="">All</option><option value="CORP">Corporations</option></select>
+    <select id="EntitySubTypeCode"><option value="">All</option></select>
+    <select id="Status"><option value="">All</option><option value="ACTIVE">Active</option><option value="INACTIVE">Inactive</option></select>
+  </div>
+  <button type="submit" id="nodeW303">Search</button>
+</form>
+<div class="appSearchPageSize"><select>{page_size_options}</select></div>
+<div id="results"></div>
+<div id="catProcessing">Processing...</div>
+<script>
+const BUSINESS_TYPES = {business_types};
+const processing = document.getElementById('catProcessing');
+const results = document.getElementById('results');
+const pageSize = document.querySelector('.appSearchPageSize select');
+const value = (id) => document.getElementById(id).value;
+
+async function runSearch(pageNumber) {{
+  processing.style.display = 'block';
+  const params = new URLSearchParams({{
+    q: value('QueryString'), type: value('EntitySubTypeCode'), status: value('Status'),
+    size: pageSize.value, page: pageNumber
+  }});
+  try {{
+    const response = await fetch('{search_path}?' + params);
+    results.innerHTML = response.ok ? await response.text() : '<div class="appError">Service temporarily unavailable</div>';
+  }} finally {{
+    processing.style.display = 'none';
+  }}
+}}
+
+document.getElementById('searchForm').addEventListener('submit', (e) => {{ e.preventDefault(); runSearch(1); }});
+document.getElementById('expandonodeW297').addEventListener('click', (e) => {{
+  e.preventDefault();
+  document.getElementById('advancedFilters').style.display = 'block';
+}});
+document.getElementById('SourceAppCode').addEventListener('change', (e) => {{
+  processing.style.display = 'block';
+  setTimeout(() => {{
+    const select = document.getElementById('EntitySubTypeCode');
+    select.innerHTML = '<option value="">All</option>';
+    if (e.target.value) {{
+      for (const type of BUSINESS_TYPES) select.add(new Option(type, type));
+    }}
+    processing.style.display = 'none';
+  }}, {filter_delay_ms});
+}});
+pageSize.addEventListener('change', () => runSearch(1));
+results.addEventListener('click', (e) => {{
+  const link = e.target.closest('[data-page]');
+  if (link) {{ e.preventDefault(); runSearch(Number(link.dataset.page)); }}
+}});
+</script>
+</body>
+</html>
+"""
+
+_RESULT_BLOCK = """<div class="appMinimalBox ItemBox">
+<a class="appMinimalMenu viewMenu appItemSearchResult noSave viewInstanceUpdateStackPush registerItemSearch-results-page-line-ItemBox-resultLeft-viewMenu" href="#"><span>{index}</span><span>{name} ({number})</span></a>
+<div class="appMinimalAttr EntitySubTypeCode">
+<span class="appMinimalValue">{business_type}</span></div>
+<div class="appMinimalAttr RegistrationDate">
+<span class="appMinimalValue">{date}</span></div>
+<div class="appMinimalBox addressSearchResultBox">
+<span class="appAttrValue">{street} {city} ON</span></div>
+<div class="appMinimalBox statusSearchResult">
+<div class="appMinimalAttr Status"><span class="appMinimalValue">{status}</span></div></div>
+</div>"""
+
+_FEDERAL_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="utf-8"><title>Search for a Federal Corporation</title></head>
+<body>
+<ol class="list-unstyled">
+{items}
+</ol>
+</body>
+</html>
+"""
+
+_FEDERAL_ITEM = """<li class="pad-md row">
+<a href="#">{name}<br>{name_fr}</a>
+<span>Corporation number: {number}</span>
+<span>Business Number: {business_number}</span>
+</li>"""
+
+
+def _seed(*parts) -> int:
+    """Stable seed for generated results (unlike hash(), the same across runs)."""
+    return int(hashlib.md5("|".join(str(p) for p in parts).encode('utf-8')).hexdigest()[:8], 16)
+
+
+@dataclass
+class MockStats:
+    """Request counters for a mock registry run."""
+    requests: int = 0
+    searches: int = 0
+    errors: int = 0
+    by_path: Dict[str, int] = field(default_factory=dict)
+
+
+class MockRegistry:
+    """
+    Result generation and fault injection shared by the request handlers.
+
+    Args:
+        latency: (min, max) seconds added to every response.
+        error_rate: Fraction of search requests answered with HTTP 503.
+        max_results: Upper bound on generated results per query.
+        federal_pages: Number of non-empty federal result pages.
+        federal_page_size: Corporations per federal page.
+        archive_path: HtmlArchive to take recorded result blocks from.
+        seed: Seed for the latency/error randomness.
+    """
+
+    def __init__(self, latency: Tuple[float, float] = (0.0, 0.0), error_rate: float = 0.0,
+                 max_results: int = 450, federal_pages: int = 5, federal_page_size: int = 10,
+                 archive_path: Optional[str] = None, seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.max_results = max_results
+        self.federal_pages = federal_pages
+        self.federal_page_size = federal_page_size
+        self.stats = MockStats()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._recorded_blocks = self._load_recorded_blocks(archive_path) if archive_path else []
+
+    @staticmethod
+    def _load_recorded_blocks(archive_path: str) -> List[str]:
+        from lxml import html as lxml_html
+        from html_archive import HtmlArchive
+        from result_parsing import RESULT_BLOCKS
+
+        blocks = []
+        with HtmlArchive(archive_path) as archive:
+            seen = set()
+            for entry in archive.entries:
+                if entry.sha1 in seen:
+                    continue
+                seen.add(entry.sha1)
+                tree = lxml_html.fromstring(archive.read(entry))
+                blocks.extend(lxml_html.tostring(b, encoding='unicode') for b in tree.xpath(RESULT_BLOCKS))
+        print(f"Loaded {len(blocks)} recorded result blocks from {archive_path}")
+        return blocks
+
+    def count(self, path: str):
+        with self._lock:
+            self.stats.requests += 1
+            self.stats.by_path[path] = self.stats.by_path.get(path, 0) + 1
+            if path == ONBIS_SEARCH_PATH:
+                self.stats.searches += 1
+
+    def delay(self):
+        with self._lock:
+            seconds = self._random.uniform(*self.latency) if self.latency[1] > 0 else 0.0
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            failed = self.error_rate > 0 and self._random.random() < self.error_rate
+            if failed:
+                self.stats.errors += 1
+            return failed
+
+    def form_page(self, filter_delay_ms: int = 50) -> str:
+        options = "".join(
+            f'<option value="{value}">{size}</option>' for value, size in PAGE_SIZES.items()
+        )
+        business_types = "[" + ", ".join(f'"{t}"' for t in BUSINESS_TYPES) + "]"
+        return _FORM_PAGE.format(page_size_options=options, business_types=business_types,
+                                 search_path=ONBIS_SEARCH_PATH, filter_delay_ms=filter_delay_ms)
+
+    def _result_total(self, query: str, business_type: str) -> int:
+        if not query:
+            return 0
+        if self._recorded_blocks:
+            return min(len(self._recorded_blocks), _seed(query, business_type) % (self.max_results + 1))
+        return _seed(query, business_type) % (self.max_results + 1)
+
+    def _result_block(self, query: str, business_type: str, status: str, index: int) -> str:
+        if self._recorded_blocks:
+            return self._recorded_blocks[(_seed(query, business_type) + index) % len(self._recorded_blocks)]
+        rng = random.Random(_seed(query, business_type, index))
+        number = 1000000 + _seed(query, business_type, index) % 9000000
+        return _RESULT_BLOCK.format(
+            index=index + 1,
+            name=html.escape(f"{query.upper()} {rng.choice(['HOUSING', 'FOOD', 'ARTS', 'CREDIT'])} "
+                             f"CO-OPERATIVE {index + 1} INC."),
+            number=number,
+            business_type=html.escape(business_type or rng.choice(BUSINESS_TYPES)),
+            date=f"{rng.randint(1950, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            street=f"{rng.randint(1, 999)} KING ST",
+            city=rng.choice(CITIES),
+            status="Active" if status != "INACTIVE" else "Inactive",
+        )
+
+    def search_fragment(self, params: Dict[str, str]) -> str:
+        """Result list for one ONBIS search: pager banner, result blocks and pager links."""
+        query = params.get('q', '').strip().lower()
+        business_type = params.get('type', '')
+        size = PAGE_SIZES.get(params.get('size', '1'), 10)
+        page = max(1, int(params.get('page', '1') or 1))
+        total = self._result_total(query, business_type)
+
+        if total == 0:
+            return '<p class="appNoResults">No results found</p>'
+
+        first = (page - 1) * size
+        last = min(total, first + size)
+        blocks = [self._result_block(query, business_type, params.get('status', ''), i) for i in range(first, last)]
+        pager = f'<div class="appPager"><span class="appPagerBanner">{first + 1} - {last} of {total} </span>'
+        if last < total:
+            pager += f'<span class="appPagerNext"><a href="#" data-page="{page + 1}">Next</a></span>'
+        pager += '</div>'
+        return pager + "\n" + "\n".join(blocks)
+
+    def federal_page(self, params: Dict[str, str]) -> str:
+        """One page of the federal search result list; empty past `federal_pages`."""
+        page = int(params.get('p', '0') or 0)
+        items = []
+        if page < self.federal_pages:
+            for i in range(self.federal_page_size):
+                index = page * self.federal_page_size + i
+                number = 1000000 + _seed('federal', index) % 9000000
+                items.append(_FEDERAL_ITEM.format(
+                    name=f"FEDERAL CO-OPERATIVE {index + 1}",
+                    name_fr=f"COOPÉRATIVE FÉDÉRALE {index + 1}",
+                    number=number,
+                    business_number=f"{_seed('bn', index) % 1000000000:09d}RC0001",
+                ))
+        return _FEDERAL_PAGE.format(items="\n".join(items))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    registry: MockRegistry = None  # Set on the per-server subclass
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output readable
+
+    def _send(self, status: int, body: str, content_type: str = "text/html; charset=utf-8"):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query, keep_blank_values=True).items()}
+        registry = self.registry
+        registry.count(url.path)
+        registry.delay()
+
+        if url.path == ONBIS_ENTRY_PATH:
+            self._send(200, registry.form_page())
+        elif url.path == ONBIS_SEARCH_PATH:
+            if registry.should_fail():
+                self._send(503, "Service temporarily unavailable")
+            else:
+                self._send(200, registry.search_fragment(params))
+        elif url.path == FEDERAL_SEARCH_PATH:
+            if registry.should_fail():
+                self._send(503, "Service temporarily unavailable")
+            else:
+                self._send(200, registry.federal_page(params))
+        else:
+            self._send(404, "Not found")
+
+
+class MockRegistryServer:
+    """
+    Runs a `MockRegistry` on a local port in a background thread.
+    Use as a context manager; port 0 picks a free port.
+    """
+
+    def __init__(self, registry: Optional[MockRegistry] = None, host: str = "127.0.0.1", port: int = 0):
+        self.registry = registry or MockRegistry()
+        handler = type("MockRegistryHandler", (_Handler,), {"registry": self.registry})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def onbis_url(self) -> str:
+        return self.base_url + ONBIS_ENTRY_PATH + ONBIS_QUERY
+
+    @property
+    def federal_url(self) -> str:
+        return self.base_url + FEDERAL_SEARCH_PATH
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    archive_file = sys.argv[2] if len(sys.argv) > 2 else None
+
+    server = MockRegistryServer(MockRegistry(latency=(0.05, 0.2), archive_path=archive_file), port=port)
+    server.start()
+    print(f"Mock ONBIS search:   {server.onbis_url}")
+    print(f"Mock federal search: {server.federal_url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+        print("\nStopped.")
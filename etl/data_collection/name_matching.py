@@ -0,0 +1,159 @@
+"""
+Fuzzy organisation-name matching with n-gram blocking.
+
+Comparing every name against every other name (e.g. with difflib) is
+quadratic: 47k federal corporations x thousands of charities is billions of
+comparisons. `NameIndex` instead:
+1. Normalises each name (accents, case, punctuation, "&", legal suffixes such
+   as "Inc."/"Ltd."/"Ltée") and breaks it into a set of character n-grams.
+2. Keeps an inverted index n-gram -> names (the blocking keys) and each name's
+   n-grams as one flat numpy array.
+3. For a query, only looks up the query's rarest n-grams. A name that reaches
+   the similarity threshold must share at least one of them (prefix
+   filtering), so no match is lost, while common n-grams such as " co" or
+   "ion" never pull in half the index.
+4. Scores the whole block at once with numpy: Dice similarity
+   2|A & B| / (|A| + |B|) over the n-gram sets.
+
+Work per query is proportional to the size of its block, so matching scales
+near-linearly with the number of names.
+"""
+
+import re
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+NGRAM_SIZE = 3
+DEFAULT_THRESHOLD = 0.85  # Dice similarity between n-gram sets
+
+# Dropped from names before comparison
+LEGAL_SUFFIXES = {
+    'inc', 'incorporated', 'corp', 'corporation', 'ltd', 'limited', 'ltee', 'limitee',
+    'co', 'company', 'llc', 'lp', 'llp', 'the',
+}
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_name(name) -> str:
+    """Lower-case, accent- and punctuation-free name without legal suffixes."""
+    if not name or not isinstance(name, str):
+        return ''
+    text = unicodedata.normalize('NFKD', name)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = text.replace('&', ' and ')
+    text = _PUNCTUATION.sub(' ', text)
+    tokens = [token for token in _WHITESPACE.split(text) if token and token not in LEGAL_SUFFIXES]
+    return ' '.join(tokens)
+
+
+def name_ngrams(normalized: str, n: int = NGRAM_SIZE) -> List[str]:
+    """Distinct character n-grams of a normalised name, padded so word edges count."""
+    if not normalized:
+        return []
+    padded = f" {normalized} "
+    if len(padded) <= n:
+        return [padded]
+    return list(dict.fromkeys(padded[i:i + n] for i in range(len(padded) - n + 1)))
+
+
+@dataclass
+class NameMatch:
+    """A pair of names whose similarity reached the threshold."""
+    query_index: int
+    index_position: int
+    score: float
+
+
+class NameIndex:
+    """
+    Blocking index over a list of names; `query` returns the similar ones.
+    """
+
+    def __init__(self, names: Sequence[str], n: int = NGRAM_SIZE):
+        self.n = n
+        self.names = list(names)
+        self.normalized = [normalize_name(name) for name in self.names]
+
+        vocabulary: Dict[str, int] = {}
+        postings: Dict[int, List[int]] = defaultdict(list)
+        gram_ids: List[int] = []
+        indptr = [0]
+        for position, normalized in enumerate(self.normalized):
+            for gram in name_ngrams(normalized, n):
+                gram_id = vocabulary.setdefault(gram, len(vocabulary))
+                postings[gram_id].append(position)
+                gram_ids.append(gram_id)
+            indptr.append(len(gram_ids))
+
+        self.vocabulary = vocabulary
+        # CSR layout: n-grams of name i are grams[indptr[i]:indptr[i + 1]]
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.grams = np.asarray(gram_ids, dtype=np.int64)
+        self.sizes = np.diff(self.indptr)
+        self.postings = {gram_id: np.asarray(positions, dtype=np.int64) for gram_id, positions in postings.items()}
+        self.comparisons = 0
+
+    def __len__(self):
+        return len(self.names)
+
+    def _block(self, query_ids: np.ndarray, query_size: int, threshold: float) -> np.ndarray:
+        """Names sharing at least one of the query's rarest n-grams (and of a size that can still match)."""
+        # Shared n-grams needed for Dice >= threshold, at the smallest size a match can have
+        min_overlap = max(1, int(np.ceil(threshold * query_size / (2 - threshold) - 1e-9)))
+        prefix_length = query_size - min_overlap + 1
+
+        known = query_ids[query_ids >= 0]
+        # Unknown n-grams are shared with no one, so they use up prefix without adding candidates
+        unknown = query_size - len(known)
+        frequencies = np.array([len(self.postings[g]) for g in known], dtype=np.int64)
+        rarest = known[np.argsort(frequencies, kind='stable')][:max(0, prefix_length - unknown)]
+        if len(rarest) == 0:
+            return np.empty(0, dtype=np.int64)
+        candidates = np.unique(np.concatenate([self.postings[g] for g in rarest]))
+
+        sizes = self.sizes[candidates]
+        low = threshold * query_size / (2 - threshold)
+        high = (2 - threshold) * query_size / threshold
+        return candidates[(sizes >= low - 1e-9) & (sizes <= high + 1e-9)]
+
+    def _score(self, candidates: np.ndarray, query_ids: np.ndarray, query_size: int) -> np.ndarray:
+        """Dice similarity of each candidate to the query, computed for the whole block at once."""
+        sizes = self.sizes[candidates]
+        starts = self.indptr[candidates]
+        # Gather every candidate's n-grams into one array, segment by segment
+        segment_starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        offsets = np.repeat(starts - segment_starts, sizes) + np.arange(sizes.sum())
+        hits = np.isin(self.grams[offsets], query_ids[query_ids >= 0])
+        shared = np.add.reduceat(hits.astype(np.int64), segment_starts)
+        return 2.0 * shared / (sizes + query_size)
+
+    def query(self, name: str, threshold: float = DEFAULT_THRESHOLD,
+              limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """(position, score) of indexed names at least `threshold` similar to `name`, best first."""
+        grams = name_ngrams(normalize_name(name), self.n)
+        if not grams:
+            return []
+        query_ids = np.array([self.vocabulary.get(g, -1) for g in grams], dtype=np.int64)
+        candidates = self._block(query_ids, len(grams), threshold)
+        if len(candidates) == 0:
+            return []
+        self.comparisons += len(candidates)
+
+        scores = self._score(candidates, query_ids, len(grams))
+        keep = scores >= threshold - 1e-9
+        candidates, scores = candidates[keep], scores[keep]
+        order = np.argsort(-scores, kind='stable')[:limit]
+        return [(int(candidates[i]), float(scores[i])) for i in order]
+
+    def match(self, names: Sequence[str], threshold: float = DEFAULT_THRESHOLD,
+              limit: Optional[int] = None) -> Iterator[NameMatch]:
+        """Every (query, indexed name) pair at or above `threshold`, query by query."""
+        for query_index, name in enumerate(names):
+            for position, score in self.query(name, threshold, limit):
+                yield NameMatch(query_index, position, score)
@@ -8,16 +8,32 @@ import os
 import time
 import random
 from playwright.async_api import async_playwright, Page, Browser, BrowserContext
-from typing import Optional, List, Dict
+import inspect
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Optional, List, Dict, Tuple, Union
 import concurrent.futures
 from dataclasses import dataclass
 from datetime import datetime
+from context_pool import ContextPool, ContextSlot
+from wait_strategies import WaitStrategy, WaitTimings
+from request_routing import LEAN_BROWSER_ARGS, LEAN_CONTEXT_OPTIONS, RoutePolicy
+from result_parsing import EXTRACT_RESULTS_JS
+from scrape_tracing import FORMAT_JSONL, Tracer, annotate, span
+from rate_control import AdaptiveRateController, classify_exception
+from captcha_detection import CHALLENGE_CHECK_JS, Challenge, ChallengeDetector
 
 # Configuration
 SAVE_DEBUG_FILES = True
 OUTPUT_FOLDER = 'business_lookup_output'
 MAX_CONCURRENT_SEARCHES = 5  # Adjust based on your system and website limits
 BROWSER_POOL_SIZE = 3  # Number of browser instances to maintain
+WARM_PAGES_PER_CONTEXT = 2  # Loaded search pages kept open per context for reuse
+BLOCK_NONESSENTIAL_REQUESTS = True  # Abort images, fonts, trackers and third-party requests
+LEAN_CONTEXTS = True  # Use the memory-lean context profile and browser flags
+EXTRACT_AT_SOURCE = True  # Pull result fields out in the page instead of returning the HTML
+HTML_SAMPLE_RATE = 0.0  # Fraction of successful searches that also keep their raw HTML
+TRACE_FILE = None  # Export per-stage spans as JSON Lines, e.g. 'business_lookup_output/spans.jsonl'
+TRACE_FORMAT = FORMAT_JSONL  # or scrape_tracing.FORMAT_OTLP for OpenTelemetry span records
+ONBIS_SEARCH_URL = "https://www.appmybizaccount.gov.on.ca/onbis/master/entry.pub?applicationCode=onbis-master&businessService=registerItemSearch"
 
 @dataclass
 class SearchResult:
@@ -26,6 +42,16 @@ class SearchResult:
     success: bool
     error_message: str = ""
     search_time: float = 0.0
+    # Parsed result blocks when extracted in the page; html_content is then
+    # empty unless the search failed or was sampled
+    records: Optional[List[Dict[str, str]]] = None
+
+
+# Result extraction and the challenge check in one round trip to the page
+_EXTRACT_AND_CHECK_JS = f"(args) => ({{records: ({EXTRACT_RESULTS_JS})(), challenge: ({CHALLENGE_CHECK_JS})(args)}})"
+
+# Called with each SearchResult as it completes; may be sync or async
+ResultCallback = Callable[[SearchResult], Union[Awaitable[Any], Any]]
 
 
 class ConcurrentPlaywrightScraper:
@@ -34,14 +60,41 @@ class ConcurrentPlaywrightScraper:
     """
     
     def __init__(self, max_concurrent: int = MAX_CONCURRENT_SEARCHES, 
-                 browser_pool_size: int = BROWSER_POOL_SIZE, headless: bool = False):
+                 browser_pool_size: int = BROWSER_POOL_SIZE, headless: bool = False,
+                 wait_timings: Optional[WaitTimings] = None, search_url: str = ONBIS_SEARCH_URL,
+                 route_policy: Optional[RoutePolicy] = None, lean_contexts: bool = LEAN_CONTEXTS,
+                 extract_at_source: bool = EXTRACT_AT_SOURCE, html_sample_rate: float = HTML_SAMPLE_RATE,
+                 tracer: Optional[Tracer] = None, rate_controller: Optional[AdaptiveRateController] = None):
         self.max_concurrent = max_concurrent
         self.browser_pool_size = browser_pool_size
         self.headless = headless
         self.playwright = None
         self.browser_pool: List[Browser] = []
-        self.context_pool: List[BrowserContext] = []
+        self.pool = ContextPool(self._create_context)
         self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.search_url = search_url
+        # Event-driven waits; fixed pauses only if configured
+        self.waits = WaitStrategy(wait_timings)
+        # Request blocking shared by every context (None disables it)
+        if route_policy is None and BLOCK_NONESSENTIAL_REQUESTS:
+            route_policy = RoutePolicy.for_site(search_url)
+        self.route_policy = route_policy
+        self.lean_contexts = lean_contexts
+        # Spots CAPTCHA and rate-limit pages from navigation/response hooks and one in-page check
+        self.challenges = ChallengeDetector()
+        self.extract_at_source = extract_at_source
+        self.html_sample_rate = html_sample_rate
+        # Per-stage timings of every search
+        self.tracer = tracer or Tracer(TRACE_FILE, TRACE_FORMAT)
+        # Shared by every search: ramps up while responses are clean, backs off on CAPTCHAs and timeouts
+        self.rate = rate_controller or AdaptiveRateController(
+            initial_concurrency=max(1, max_concurrent // 2), max_concurrency=max_concurrent
+        )
+
+    @property
+    def context_pool(self) -> List[BrowserContext]:
+        """Current contexts, in pool order."""
+        return self.pool.contexts
         
     async def __aenter__(self):
         """Async context manager entry."""
@@ -56,58 +109,75 @@ class ConcurrentPlaywrightScraper:
         """Initialize browser pool and contexts."""
         self.playwright = await async_playwright().start()
         
+        browser_args = [
+            '--disable-blink-features=AutomationControlled',
+            '--disable-infobars',
+            '--exclude-switches=enable-automation',
+            '--use-fake-ui-for-media-stream',
+            '--disable-dev-shm-usage',
+            '--disable-extensions',
+            '--disable-gpu',
+            '--no-sandbox',
+            '--disable-setuid-sandbox',
+            '--disable-web-security',
+            '--disable-background-networking',
+            '--disable-default-apps',
+            '--disable-sync',
+        ]
+        if self.lean_contexts:
+            browser_args += LEAN_BROWSER_ARGS
+        
         # Create multiple browser instances for better isolation
         for i in range(self.browser_pool_size):
             browser = await self.playwright.chromium.launch(
                 headless=self.headless,
-                args=[
-                    '--disable-blink-features=AutomationControlled',
-                    '--disable-infobars',
-                    '--exclude-switches=enable-automation',
-                    '--use-fake-ui-for-media-stream',
-                    '--disable-dev-shm-usage',
-                    '--disable-extensions',
-                    '--disable-gpu',
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox',
-                    '--disable-web-security',
-                    '--disable-background-networking',
-                    '--disable-default-apps',
-                    '--disable-sync',
-                ]
+                args=browser_args
             )
             self.browser_pool.append(browser)
             
             # Create multiple contexts per browser
             contexts_per_browser = max(1, self.max_concurrent // self.browser_pool_size)
             for j in range(contexts_per_browser):
-                context = await browser.new_context(
-                    viewport={'width': 1920, 'height': 1080},
-                    user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-                )
-                # Apply manual stealth scripts
-                await context.add_init_script("""
-                    Object.defineProperty(navigator, 'webdriver', {
-                        get: () => undefined
-                    });
-                    Object.defineProperty(navigator, 'plugins', {
-                        get: () => [1, 2, 3, 4, 5]
-                    });
-                    Object.defineProperty(navigator, 'languages', {
-                        get: () => ['en-US', 'en']
-                    });
-                """)
-                self.context_pool.append(context)
+                await self.pool.add(browser)
+
+        # Spread the allowed concurrency over the contexts
+        self.pool.max_pages_per_context = -(-self.max_concurrent // len(self.pool))
         
-        print(f"Initialized {len(self.browser_pool)} browsers with {len(self.context_pool)} contexts")
+        print(f"Initialized {len(self.browser_pool)} browsers with {len(self.pool)} contexts")
+
+    def _context_options(self) -> Dict:
+        """Keyword arguments for `browser.new_context`."""
+        options = {
+            'viewport': {'width': 1920, 'height': 1080},
+            'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+        }
+        if self.lean_contexts:
+            options.update(LEAN_CONTEXT_OPTIONS)
+        return options
+
+    async def _create_context(self, browser: Browser) -> BrowserContext:
+        """Create one browser context; also used by the pool to recycle contexts."""
+        context = await browser.new_context(**self._context_options())
+        if self.route_policy is not None:
+            await self.route_policy.install(context)
+        
+        # Apply manual stealth scripts
+        await context.add_init_script("""
+            Object.defineProperty(navigator, 'webdriver', {
+                get: () => undefined
+            });
+            Object.defineProperty(navigator, 'plugins', {
+                get: () => [1, 2, 3, 4, 5]
+            });
+            Object.defineProperty(navigator, 'languages', {
+                get: () => ['en-US', 'en']
+            });
+        """)
+        return context
     
     async def close(self):
         """Close all browsers and contexts."""
-        for context in self.context_pool:
-            try:
-                await context.close()
-            except Exception as e:
-                print(f"Error closing context: {e}")
+        await self.pool.close()
         
         for browser in self.browser_pool:
             try:
@@ -117,13 +187,12 @@ class ConcurrentPlaywrightScraper:
         
         if self.playwright:
             await self.playwright.stop()
+        self.tracer.close()
     
     async def _get_available_context(self) -> BrowserContext:
-        """Get an available context from the pool."""
-        # Simple round-robin selection
-        # In production, you might want more sophisticated load balancing
-        context_index = len(self.context_pool) % len(self.context_pool) if self.context_pool else 0
-        return self.context_pool[context_index]
+        """Get the least-loaded healthy context from the pool (without checking it out)."""
+        slot = self.pool.least_loaded() or min(self.pool.slots, key=lambda s: s.in_use)
+        return slot.context
 
     async def human_type(self, page: Page, selector: str, text: str, delay_min: int = 30, delay_max: int = 100):
         """Simulate human typing with variable delays."""
@@ -151,149 +220,200 @@ class ConcurrentPlaywrightScraper:
         except Exception:
              await page.click(selector)
     
-    async def search_business_optimized(self, business_name: str, context_id: int = 0) -> SearchResult:
+    async def _load_search_page(self, page: Page):
+        """Navigate a page to the search form and get it ready for typing."""
+        with span("navigate"):
+            await page.goto(self.search_url, wait_until='domcontentloaded')  # Faster than 'networkidle'
+        
+        # Quick cookie handling
+        try:
+            if await page.query_selector("button:has-text('Accept all')"):
+                await self.human_click(page, "button:has-text('Accept all')")
+        except:
+            pass  # Cookie banner might not be present
+        
+        with span("wait_form"):
+            await page.wait_for_selector("#QueryString", timeout=10000)
+
+    async def _acquire_search_page(self, slot: ContextSlot) -> Tuple[Page, bool]:
         """
-        Optimized single business search with reduced wait times and better error handling.
+        Take a warm search page from the context's pool, or open and load a new one.
+        Returns the page and whether it was already warm.
         """
-        start_time = time.time()
+        while slot.idle_pages:
+            page = slot.idle_pages.pop()
+            if not page.is_closed():
+                annotate(warm=True)
+                return page, True
         
-        async with self.semaphore:  # Limit concurrent searches
-            try:
-                # Get context from pool
-                context = self.context_pool[context_id % len(self.context_pool)]
-                page = await context.new_page()
-                
+        annotate(warm=False)
+        with span("new_page"):
+            page = await slot.context.new_page()
+        self.challenges.watch(page)
+        # Set shorter timeouts for faster failure detection
+        page.set_default_timeout(15000)  # 15 seconds
+        page.set_default_navigation_timeout(30000)  # 30 seconds
+        await self._load_search_page(page)
+        return page, False
+
+    async def _release_search_page(self, slot: ContextSlot, page: Page, reusable: bool):
+        """Keep a page warm for the next search on this context, or close it."""
+        if reusable and not slot.needs_recycle and len(slot.idle_pages) < WARM_PAGES_PER_CONTEXT:
+            slot.idle_pages.append(page)
+        elif not page.is_closed():
+            await page.close()
+
+    async def _capture_results(self, page: Page) -> Tuple[str, Optional[List[Dict[str, str]]], Optional[Challenge]]:
+        """
+        Capture the results shown on `page` as (html, records, challenge).
+        With extraction at source the records and the challenge check come from
+        a single in-page `evaluate` and the HTML is only kept for a
+        `html_sample_rate` sample; otherwise the full HTML is returned and
+        records is None.
+        """
+        flagged = self.challenges.take_flag(page)
+        if not self.extract_at_source:
+            with span("capture_html"):
+                html_content = await page.content()
+            return html_content, None, flagged or await self.challenges.check(page)
+        
+        with span("extract"):
+            extracted = await page.evaluate(_EXTRACT_AND_CHECK_JS, self.challenges.js_args())
+        html_content = ""
+        if random.random() < self.html_sample_rate:
+            with span("capture_html"):
+                html_content = await page.content()
+        return html_content, extracted['records'], flagged or self.challenges.from_check_result(extracted['challenge'])
+
+    async def _run_search(self, page: Page, business_name: str, context_id: int):
+        """Reset the query form on a loaded search page and run the search."""
+        # Clear the previous query instead of reloading the page
+        with span("type", chars=len(business_name)):
+            await page.fill("#QueryString", "")
+            await self.human_type(page, "#QueryString", business_name)
+        
+        # Try different search button selectors (same as web_scraper_playwright.py)
+        search_button_selectors = [
+            "button[type='submit']",
+            "input[type='submit']",
+            "button:has-text('Search')",
+            "button:has-text('SEARCH')",
+            "input[value='Search']",
+            "input[value='SEARCH']",
+            "#nodeW20"  # Original ID as fallback
+        ]
+        
+        search_selector = None
+        with span("find_button"):
+            for selector in search_button_selectors:
                 try:
-                    # Set shorter timeouts for faster failure detection
-                    page.set_default_timeout(15000)  # 15 seconds
-                    page.set_default_navigation_timeout(30000)  # 30 seconds
-                    
-                    print(f"[Context {context_id}] Searching for: {business_name}")
-                    
-                    # Navigate to search page
-                    search_url = "https://www.appmybizaccount.gov.on.ca/onbis/master/entry.pub?applicationCode=onbis-master&businessService=registerItemSearch"
-                    
-                    await page.goto(search_url, wait_until='domcontentloaded')  # Faster than 'networkidle'
-                    
-                    # Quick cookie handling
-                    try:
-                        await self.human_click(page, "button:has-text('Accept all')")
-                        await asyncio.sleep(0.5)
-                    except:
-                        pass  # Cookie banner might not be present
-                    
-                    # Fill search box
-                    await page.wait_for_selector("#QueryString", timeout=10000)
-                    await self.human_type(page, "#QueryString", business_name)
-                    
-                    # Try different search button selectors (same as web_scraper_playwright.py)
-                    search_button_selectors = [
-                        "button[type='submit']",
-                        "input[type='submit']",
-                        "button:has-text('Search')",
-                        "button:has-text('SEARCH')",
-                        "input[value='Search']",
-                        "input[value='SEARCH']",
-                        "#nodeW20"  # Original ID as fallback
-                    ]
-                    
-                    search_clicked = False
-                    for selector in search_button_selectors:
-                        try:
-                            button = page.locator(selector)
-                            if await button.count() > 0:
-                                await self.human_click(page, selector)
-                                print(f"[Context {context_id}] Search button clicked using {selector}")
-                                search_clicked = True
-                                break
-                        except Exception as e:
-                            continue
-                    
-                    if not search_clicked:
-                        raise Exception("Could not find or click the search button")
-                    
-                    # Wait for page to load after clicking
-                    await page.wait_for_load_state('domcontentloaded')
-                    
-                    # Smart wait - check for content instead of fixed time
-                    await self._wait_for_results_smart(page)
-                    
-                    # Get results
-                    html_content = await page.content()
-                    search_time = time.time() - start_time
-                    
-                    print(f"[Context {context_id}] Completed {business_name} in {search_time:.2f}s")
-                    
-                    return SearchResult(
-                        business_name=business_name,
-                        html_content=html_content,
-                        success=True,
-                        search_time=search_time
-                    )
-                
-                finally:
-                    await page.close()
-                    
-            except Exception as e:
-                search_time = time.time() - start_time
-                print(f"[Context {context_id}] Error searching {business_name}: {e}")
-                return SearchResult(
-                    business_name=business_name,
-                    html_content="",
-                    success=False,
-                    error_message=str(e),
-                    search_time=search_time
-                )
-    
-    async def _wait_for_results_smart(self, page: Page, max_wait: float = 8.0):
+                    if await page.locator(selector).count() > 0:
+                        search_selector = selector
+                        break
+                except Exception:
+                    continue
+        
+        if search_selector is None:
+            raise Exception("Could not find or click the search button")
+        
+        # Click and wait for the result list to change; a warm page still shows the previous results
+        await self.waits.run_and_wait(page, lambda: self.human_click(page, search_selector))
+        print(f"[Context {context_id}] Search button clicked using {search_selector}")
+
+    async def search_business_optimized(self, business_name: str) -> SearchResult:
         """
-        Smart waiting that checks for actual content instead of fixed delays.
+        Optimized single business search with reduced wait times and better error handling.
+        Runs on the least-loaded healthy context in the pool, reusing a warm search page
+        when one is available.
         """
         start_time = time.time()
         
-        while time.time() - start_time < max_wait:
-            # Check if results are loaded
-            try:
-                # Look for result containers
-                results = await page.query_selector_all("div.registerItemSearch-results-page-line-ItemBox")
-                if results:
-                    print("Results detected, stopping wait")
-                    return
+        with self.tracer.trace("search", business_name=business_name):
+            # Paced and limited by the shared AIMD controller
+            async with self.rate.async_slot() as ticket:
+                async with self.semaphore, self.pool.checkout() as slot:  # Limit concurrent searches
+                    context_id = slot.slot_id
+                    page = None
+                    try:
+                        page, warm = await self._acquire_search_page(slot)
+                        print(f"[Context {context_id}] Searching for: {business_name}")
                 
-                # Check for "no results" message
-                no_results = await page.query_selector("text=/No results found|No matches found/i")
-                if no_results:
-                    print("No results message detected")
-                    return
+                        try:
+                            await self._run_search(page, business_name, context_id)
+                        except Exception as e:
+                            if not warm:
+                                raise
+                            # Fall back to a fresh navigation of the same page
+                            print(f"[Context {context_id}] Warm page failed ({e}); reloading search form")
+                            await self._load_search_page(page)
+                            await self._run_search(page, business_name, context_id)
                 
-                # Check if search is still processing
-                loading = await page.query_selector("text=/Loading|Searching|Please wait/i")
-                if not loading:
-                    # If no loading indicator and we've waited a bit, probably done
-                    if time.time() - start_time > 3.0:
-                        return
+                        html_content, records, challenge = await self._capture_results(page)
+                        search_time = time.time() - start_time
+                        print(f"[Context {context_id}] Completed {business_name} in {search_time:.2f}s")
                 
-                await asyncio.sleep(0.5)  # Check every 500ms
+                        if challenge:
+                            print(f"[Context {context_id}] ⚠️ Challenge page ({challenge.reason})")
+                            ticket.outcome = challenge.outcome
+                            self.pool.report_failure(slot, captcha=True)
+                            # Keep the challenge page's HTML for debugging, even when extracting at source
+                            if not html_content:
+                                try:
+                                    html_content = await page.content()
+                                except Exception:
+                                    pass
+                            await self._release_search_page(slot, page, reusable=False)
+                            # Not "no results": the search has to be retried
+                            return SearchResult(
+                                business_name=business_name,
+                                html_content=html_content,
+                                success=False,
+                                error_message=challenge.reason,
+                                search_time=search_time
+                            )
+
+                        self.pool.report_success(slot, search_time)
+                        await self._release_search_page(slot, page, reusable=True)
                 
-            except Exception as e:
-                # If we can't check, just wait minimum time
-                if time.time() - start_time > 3.0:
-                    return
-                await asyncio.sleep(0.5)
+                        return SearchResult(
+                            business_name=business_name,
+                            html_content=html_content,
+                            success=True,
+                            search_time=search_time,
+                            records=records
+                        )
+                    
+                    except Exception as e:
+                        search_time = time.time() - start_time
+                        print(f"[Context {context_id}] Error searching {business_name}: {e}")
+                        annotate(error=str(e))
+                        ticket.outcome = classify_exception(e)
+                        self.pool.report_failure(slot)
+                        html_content = ""
+                        if page is not None:
+                            # Keep the failing page's HTML for debugging
+                            try:
+                                html_content = await page.content()
+                            except Exception:
+                                pass
+                            await self._release_search_page(slot, page, reusable=False)
+                        return SearchResult(
+                            business_name=business_name,
+                            html_content=html_content,
+                            success=False,
+                            error_message=str(e),
+                            search_time=search_time
+                        )
     
     async def search_multiple_businesses(self, business_names: List[str]) -> List[SearchResult]:
         """
         Search multiple businesses concurrently.
         """
         print(f"Starting concurrent search for {len(business_names)} businesses...")
-        print(f"Max concurrent: {self.max_concurrent}, Contexts: {len(self.context_pool)}")
+        print(f"Max concurrent: {self.max_concurrent}, Contexts: {len(self.pool)}")
         
-        # Create tasks with context assignment
-        tasks = []
-        for i, business_name in enumerate(business_names):
-            context_id = i % len(self.context_pool)
-            task = self.search_business_optimized(business_name, context_id)
-            tasks.append(task)
+        # Each search checks out the least-loaded healthy context when it starts
+        tasks = [self.search_business_optimized(business_name) for business_name in business_names]
         
         # Execute all searches concurrently
         results = await asyncio.gather(*tasks, return_exceptions=True)
@@ -313,29 +433,75 @@ class ConcurrentPlaywrightScraper:
         
         return search_results
 
+    async def iter_search_results(self, business_names: Iterable[str],
+                                  on_result: Optional[ResultCallback] = None) -> AsyncIterator[SearchResult]:
+        """
+        Search businesses with a sliding window of `max_concurrent` searches in flight.
+        Results are yielded (and passed to `on_result`, if given) as they complete,
+        not in input order; a new search starts as soon as any search finishes.
+        """
+        names = iter(business_names)
+        in_flight: Dict[asyncio.Task, str] = {}
+
+        def fill_window():
+            while len(in_flight) < self.max_concurrent:
+                name = next(names, None)
+                if name is None:
+                    return
+                in_flight[asyncio.ensure_future(self.search_business_optimized(name))] = name
+
+        fill_window()
+        try:
+            while in_flight:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = in_flight.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        result = SearchResult(business_name=name, html_content="", success=False, error_message=str(e))
+                    
+                    if on_result is not None:
+                        callback_result = on_result(result)
+                        if inspect.isawaitable(callback_result):
+                            await callback_result
+                    yield result
+                fill_window()
+        finally:
+            # Stop outstanding searches if the consumer stops early
+            for task in in_flight:
+                task.cancel()
+
+
+# Streaming search function
+async def stream_search_businesses(business_names: Iterable[str],
+                                   max_concurrent: int = MAX_CONCURRENT_SEARCHES,
+                                   on_result: Optional[ResultCallback] = None) -> AsyncIterator[SearchResult]:
+    """
+    Yield search results as they complete, keeping `max_concurrent` searches in flight.
+    Use `on_result` to persist each result incrementally.
+    """
+    async with ConcurrentPlaywrightScraper(max_concurrent=max_concurrent, headless=False) as scraper:
+        async for result in scraper.iter_search_results(business_names, on_result=on_result):
+            yield result
+
+        print(scraper.pool.summary())
+        print(scraper.tracer.summary())
+        print(scraper.rate.summary())
+        if scraper.route_policy is not None:
+            print(scraper.route_policy.stats.summary())
+
 
 # Batch processing function
 async def batch_search_businesses(business_names: List[str], 
-                                batch_size: int = MAX_CONCURRENT_SEARCHES) -> List[SearchResult]:
+                                batch_size: int = MAX_CONCURRENT_SEARCHES,
+                                on_result: Optional[ResultCallback] = None) -> List[SearchResult]:
     """
-    Process businesses in batches to avoid overwhelming the server.
+    Search all businesses with up to `batch_size` searches in flight and return every result.
+    For large lists, prefer `stream_search_businesses` so results are not all held in memory.
     """
-    all_results = []
-    
-    async with ConcurrentPlaywrightScraper(max_concurrent=batch_size, headless=False) as scraper:
-        for i in range(0, len(business_names), batch_size):
-            batch = business_names[i:i + batch_size]
-            print(f"\nProcessing batch {i//batch_size + 1}: {len(batch)} businesses")
-            
-            batch_results = await scraper.search_multiple_businesses(batch)
-            all_results.extend(batch_results)
-            
-            # Brief pause between batches to be respectful to the server
-            if i + batch_size < len(business_names):
-                print("Pausing briefly between batches...")
-                await asyncio.sleep(2)
-    
-    return all_results
+    print(f"Starting streaming search for {len(business_names)} businesses ({batch_size} in flight)")
+    return [result async for result in stream_search_businesses(business_names, batch_size, on_result)]
 
 
 # Synchronous wrapper for existing code compatibility
@@ -0,0 +1,208 @@
+"""
+Adaptive (AIMD) request rate control shared by scraper sessions.
+
+Every search takes a slot from one `AdaptiveRateController` and reports how it
+went. While responses are clean the controller raises the number of searches
+allowed in flight by one every few successes and trims the pause between
+search starts (additive increase). A CAPTCHA, an HTTP 429 or a timeout halves
+the allowance, doubles the pause and holds every session for a cool-down
+(multiplicative decrease). Throughput then settles just under the point where
+the registry starts blocking, instead of at a fixed, conservative rate.
+
+The controller is thread-safe and has both blocking (`slot`, for the Selenium
+threads) and asyncio (`async_slot`, for the Playwright sessions) APIs.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator, Optional
+
+from scrape_tracing import span
+
+# Search outcomes reported back to the controller
+OUTCOME_OK = "ok"
+OUTCOME_CAPTCHA = "captcha"
+OUTCOME_THROTTLED = "throttled"  # HTTP 429 or an explicit rate-limit page
+OUTCOME_TIMEOUT = "timeout"
+OUTCOME_ERROR = "error"  # Any other failure; not treated as a block signal
+
+# Outcomes that mean the registry is pushing back
+BLOCK_OUTCOMES = frozenset({OUTCOME_CAPTCHA, OUTCOME_THROTTLED, OUTCOME_TIMEOUT})
+
+# Defaults
+INITIAL_CONCURRENCY = 1
+MAX_CONCURRENCY = 5
+INITIAL_DELAY = 2.0  # Seconds between search starts
+MIN_DELAY = 0.25
+MAX_DELAY = 120.0
+INCREASE_AFTER = 5  # Clean responses in a row before allowing one more search in flight
+DELAY_STEP = 0.25  # Seconds taken off the pause per clean response
+BACKOFF_FACTOR = 0.5
+DELAY_JITTER = 0.2  # +/- fraction of the pause, so starts do not line up
+MIN_BACKOFF_DELAY = 1.0  # A back-off always pauses at least this long, even from a zero delay
+# Polling interval for the asyncio API while waiting for capacity
+ASYNC_POLL_INTERVAL = 0.05
+
+
+def classify_exception(error: BaseException) -> str:
+    """Map a failed request's exception to an outcome (Playwright, Selenium and requests timeouts count as timeouts)."""
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError)) or "Timeout" in type(error).__name__:
+        return OUTCOME_TIMEOUT
+    response = getattr(error, 'response', None)
+    if getattr(response, 'status_code', None) == 429:
+        return OUTCOME_THROTTLED
+    return OUTCOME_ERROR
+
+
+@dataclass
+class RateTicket:
+    """Handed out with each slot; set `outcome` before the slot is released."""
+    outcome: str = OUTCOME_OK
+
+
+class AdaptiveRateController:
+    """
+    AIMD controller for concurrency and pacing of searches.
+    """
+
+    def __init__(self, initial_concurrency: int = INITIAL_CONCURRENCY, max_concurrency: int = MAX_CONCURRENCY,
+                 initial_delay: float = INITIAL_DELAY, min_delay: float = MIN_DELAY, max_delay: float = MAX_DELAY,
+                 increase_after: int = INCREASE_AFTER, delay_step: float = DELAY_STEP,
+                 backoff_factor: float = BACKOFF_FACTOR, jitter: float = DELAY_JITTER):
+        self.max_concurrency = max(1, max_concurrency)
+        self.concurrency = float(min(max(1, initial_concurrency), self.max_concurrency))
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.delay = min(max(initial_delay, min_delay), max_delay)
+        self.increase_after = increase_after
+        self.delay_step = delay_step
+        self.backoff_factor = backoff_factor
+        self.jitter = jitter
+
+        self.in_flight = 0
+        self.clean_streak = 0
+        self.next_start = 0.0
+        self.blocked_until = 0.0
+        self.completed = 0
+        self.backoffs = 0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        """Searches currently allowed in flight."""
+        return max(1, int(self.concurrency))
+
+    def _wait_time(self, now: float) -> Optional[float]:
+        """Seconds until a slot may start, 0 if it can start now, None if it must wait for a release."""
+        if self.in_flight >= self.limit:
+            return None
+        return max(0.0, self.next_start - now, self.blocked_until - now)
+
+    def _take(self, now: float):
+        self.in_flight += 1
+        pause = self.delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+        self.next_start = now + pause
+
+    def try_acquire(self) -> Optional[float]:
+        """Take a slot if one is free right now. Returns 0 on success, else a hint of how long to wait."""
+        with self._condition:
+            now = time.monotonic()
+            wait = self._wait_time(now)
+            if wait == 0.0:
+                self._take(now)
+                return 0.0
+            return wait if wait is not None else ASYNC_POLL_INTERVAL
+
+    def acquire(self):
+        """Block until a slot may start."""
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                wait = self._wait_time(now)
+                if wait == 0.0:
+                    self._take(now)
+                    return
+                self._condition.wait(timeout=wait)
+
+    async def acquire_async(self):
+        """Wait without blocking the event loop until a slot may start."""
+        while True:
+            wait = self.try_acquire()
+            if wait == 0.0:
+                return
+            await asyncio.sleep(min(wait, 1.0))
+
+    def release(self, outcome: str = OUTCOME_OK):
+        """Return a slot and adjust the rate to how the search went."""
+        with self._condition:
+            self.in_flight = max(0, self.in_flight - 1)
+            self.completed += 1
+            if outcome in BLOCK_OUTCOMES:
+                self._back_off(outcome)
+            elif outcome == OUTCOME_OK:
+                self._speed_up()
+            else:
+                self.clean_streak = 0
+            self._condition.notify_all()
+
+    def _speed_up(self):
+        self.clean_streak += 1
+        self.delay = max(self.min_delay, self.delay - self.delay_step)
+        if self.clean_streak >= self.increase_after and self.concurrency < self.max_concurrency:
+            self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+            self.clean_streak = 0
+
+    def _back_off(self, outcome: str):
+        self.clean_streak = 0
+        self.backoffs += 1
+        self.concurrency = max(1.0, self.concurrency * self.backoff_factor)
+        self.delay = min(self.max_delay, max(self.delay / self.backoff_factor, MIN_BACKOFF_DELAY))
+        # Hold every session for the new pause before anyone tries again
+        self.blocked_until = max(self.blocked_until, time.monotonic() + self.delay)
+        print(f"[Rate] 🐢 {outcome}: backing off to {self.limit} in flight, {self.delay:.1f}s between searches")
+
+    def report(self, outcome: str):
+        """Report an outcome seen outside a slot (e.g. a CAPTCHA on page load)."""
+        with self._condition:
+            if outcome in BLOCK_OUTCOMES:
+                self._back_off(outcome)
+            self._condition.notify_all()
+
+    def cooldown_remaining(self) -> float:
+        """Seconds until sessions are allowed to search again after a back-off."""
+        return max(0.0, self.blocked_until - time.monotonic())
+
+    @contextmanager
+    def slot(self) -> Iterator[RateTicket]:
+        """Blocking slot: `with controller.slot() as ticket: ...; ticket.outcome = ...`."""
+        self.acquire()
+        ticket = RateTicket()
+        try:
+            yield ticket
+        except BaseException as e:
+            ticket.outcome = classify_exception(e)
+            raise
+        finally:
+            self.release(ticket.outcome)
+
+    @asynccontextmanager
+    async def async_slot(self) -> AsyncIterator[RateTicket]:
+        """asyncio slot: `async with controller.async_slot() as ticket: ...`."""
+        with span("rate_wait"):
+            await self.acquire_async()
+        ticket = RateTicket()
+        try:
+            yield ticket
+        except BaseException as e:
+            ticket.outcome = classify_exception(e)
+            raise
+        finally:
+            self.release(ticket.outcome)
+
+    def summary(self) -> str:
+        return (f"Rate: {self.completed} searches, {self.backoffs} back-offs, "
+                f"now {self.limit}/{self.max_concurrency} in flight, {self.delay:.2f}s between searches")
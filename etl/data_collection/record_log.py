@@ -0,0 +1,98 @@
+"""
+Append-only record log for scraper sessions.
+
+Each scraped row is written exactly once as a JSON line, so autosaving costs
+the same no matter how many rows a session has already collected. Writes are
+buffered and flushed to disk in batches. The sorted, deduplicated output file
+is produced afterwards by `compact_record_logs`.
+"""
+
+import json
+import os
+import re
+from typing import Iterable, Iterator, Sequence
+
+# Number of appended records between explicit flushes to disk
+DEFAULT_FLUSH_EVERY = 10
+
+
+def session_log_path(output_file: str, session_name: str) -> str:
+    """
+    Build the per-session log path next to `output_file`.
+    Example: ('output.txt', 'Co-operative with Share') -> 'output.co-operative_with_share.jsonl'
+    """
+    base, _ = os.path.splitext(output_file)
+    slug = re.sub(r'[^a-z0-9-]+', '_', session_name.lower()).strip('_')
+    return f"{base}.{slug}.jsonl"
+
+
+class RecordLog:
+    """
+    Append-only JSON Lines writer with batched flushes.
+    """
+
+    def __init__(self, path: str, flush_every: int = DEFAULT_FLUSH_EVERY, resume: bool = False):
+        self.path = path
+        self.flush_every = max(1, flush_every)
+        self.records_written = 0
+        self._pending = 0
+        # A new session starts a fresh log unless we are resuming an interrupted one
+        self._file = open(path, 'a' if resume else 'w', encoding='utf-8')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def append(self, record: Sequence[str]):
+        """Write one record; flushes to disk every `flush_every` records."""
+        self._file.write(json.dumps(list(record), ensure_ascii=False) + "\n")
+        self.records_written += 1
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Push buffered records to disk."""
+        self._file.flush()
+        self._pending = 0
+
+    def close(self):
+        """Flush outstanding records and close the log."""
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+def read_records(path: str) -> Iterator[tuple]:
+    """
+    Yield records from a log file.
+    A truncated final line (e.g. from an interrupted run) is skipped.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield tuple(json.loads(line))
+            except json.JSONDecodeError:
+                print(f"Skipping malformed record in {path}: {line[:80]}")
+
+
+def compact_record_logs(log_paths: Iterable[str], output_file: str) -> int:
+    """
+    Merge session logs into a single sorted, deduplicated output file.
+    Returns the number of unique records written.
+    """
+    records = set()
+    for path in log_paths:
+        if os.path.exists(path):
+            records.update(read_records(path))
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        for data in sorted(records):
+            f.write("\n".join(data) + "\n\n")
+
+    return len(records)
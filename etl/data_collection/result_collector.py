@@ -0,0 +1,113 @@
+"""
+Single-writer result collector for concurrent scrapers.
+
+Scraper threads hand raw result pages to the collector and immediately go back
+to driving their browser. A single background thread owns all parsing state
+and all files: it parses each page, drops rows it has already seen and appends
+new rows to a per-partition record log (one partition per business type), so
+no two scrapers ever write the same file. With a `ParsePool`, pages are parsed
+in worker processes and the writer only collects the finished rows, in the
+order the pages were submitted.
+"""
+
+import concurrent.futures
+import queue
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from record_log import DEFAULT_FLUSH_EVERY, RecordLog, compact_record_logs, session_log_path
+from result_parsing import ParsePool
+
+# Pages allowed to wait for the writer before scrapers feel backpressure
+DEFAULT_MAX_PENDING = 100
+
+_STOP = object()
+
+
+class ResultCollector:
+    """
+    Bounded queue feeding a single writer thread with per-partition output logs.
+    """
+
+    def __init__(self, output_file: str, parse_page: Callable[[str], Iterable[tuple]],
+                 max_pending: int = DEFAULT_MAX_PENDING, flush_every: int = DEFAULT_FLUSH_EVERY,
+                 parse_pool: Optional[ParsePool] = None):
+        self.output_file = output_file
+        self.parse_page = parse_page
+        self.parse_pool = parse_pool
+        self.flush_every = flush_every
+        self.pages_processed = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        # Only touched by the writer thread, so no locking is needed
+        self._partitions: Dict[str, RecordLog] = {}
+        self._seen: Dict[str, Set[tuple]] = {}
+        self._thread = threading.Thread(target=self._run, name="result-writer", daemon=True)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def start(self):
+        """Start the writer thread."""
+        self._thread.start()
+
+    def submit_page(self, partition: str, page_source: str):
+        """
+        Queue a raw results page for parsing and saving.
+        Only blocks if the writer has fallen `max_pending` pages behind.
+        """
+        if self.parse_pool is not None:
+            # Start parsing right away; the writer just waits on the future
+            self._queue.put((partition, self.parse_pool.submit(self.parse_page, page_source)))
+        else:
+            self._queue.put((partition, page_source))
+
+    def partition_paths(self) -> List[str]:
+        """Paths of the record logs written so far, one per partition."""
+        return [log.path for log in self._partitions.values()]
+
+    def close(self) -> int:
+        """
+        Drain the queue, stop the writer and compact all partitions into `output_file`.
+        Returns the number of unique records in the compacted output.
+        """
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        for log in self._partitions.values():
+            log.close()
+        return compact_record_logs(self.partition_paths(), self.output_file)
+
+    def _partition(self, partition: str) -> RecordLog:
+        log = self._partitions.get(partition)
+        if log is None:
+            log = RecordLog(session_log_path(self.output_file, partition), flush_every=self.flush_every)
+            self._partitions[partition] = log
+            self._seen[partition] = set()
+        return log
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            partition, page = item
+            try:
+                if isinstance(page, concurrent.futures.Future):
+                    rows = page.result()
+                else:
+                    rows = self.parse_page(page)
+
+                log = self._partition(partition)
+                seen = self._seen[partition]
+                for entry in rows:
+                    if entry not in seen:
+                        seen.add(entry)
+                        log.append(entry)
+                self.pages_processed += 1
+            except Exception as e:
+                print(f"[Collector] Error processing page for '{partition}': {e}")
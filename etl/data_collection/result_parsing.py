@@ -0,0 +1,195 @@
+"""
+lxml-based parsers for ONBIS search result pages, plus a process pool to run them.
+
+Parsing a 200-result page is CPU-bound, so the scrapers ship raw HTML to a
+`ParsePool` and get structured rows back through a future instead of parsing
+inside the browser loop. The parse functions are module-level so they can be
+pickled into worker processes.
+
+`EXTRACT_RESULTS_JS` does the same extraction inside the browser, so a
+scraper can pull compact records out of the page with one `evaluate` call
+and skip transferring and storing the HTML altogether.
+"""
+
+import asyncio
+import concurrent.futures
+import multiprocessing
+import re
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+from lxml import html as lxml_html
+
+T = TypeVar('T')
+
+_PAGER_RANGE = re.compile(r'(\d[\d,]*)\s*-\s*(\d[\d,]*)\s+of\s+(\d[\d,]*)')
+
+
+def _has_class(*classes: str) -> str:
+    """XPath predicate equivalent to a CSS compound class selector (.a.b)."""
+    return " and ".join(
+        f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')" for cls in classes
+    )
+
+
+# Result block and field selectors (CSS equivalents noted alongside)
+RESULT_BLOCKS = f".//*[{_has_class('appMinimalBox', 'ItemBox')}]"  # .appMinimalBox.ItemBox
+BUSINESS_NAME = f".//*[{_has_class('registerItemSearch-results-page-line-ItemBox-resultLeft-viewMenu')}]//span[2]"
+BUSINESS_TYPE = f".//*[{_has_class('appMinimalAttr', 'EntitySubTypeCode')}]//*[{_has_class('appMinimalValue')}]"
+REGISTRATION_DATE = f".//*[{_has_class('appMinimalAttr', 'RegistrationDate')}]//*[{_has_class('appMinimalValue')}]"
+LOCATION = f".//*[{_has_class('addressSearchResultBox')}]//*[{_has_class('appAttrValue')}]"
+STATUS = (f".//*[{_has_class('statusSearchResult')}]"
+          f"//*[{_has_class('appMinimalAttr', 'Status')}]//*[{_has_class('appMinimalValue')}]")
+PAGER_BANNER = f".//*[{_has_class('appPagerBanner')}]"
+
+# In-page equivalent of parse_search_results, so the caller never needs the page source
+EXTRACT_RESULTS_JS = """
+() => {
+    const text = (el) => {
+        if (!el) return 'N/A';
+        const parts = [];
+        const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT);
+        while (walker.nextNode()) parts.push(walker.currentNode.nodeValue.trim());
+        return parts.join('');
+    };
+    const first = (block, selector) => text(block.querySelector(selector));
+    return [...document.querySelectorAll('.appMinimalBox.ItemBox')].map(block => ({
+        'Business Name': first(block, '.registerItemSearch-results-page-line-ItemBox-resultLeft-viewMenu span:nth-of-type(2)'),
+        'Business Type': first(block, '.appMinimalAttr.EntitySubTypeCode .appMinimalValue'),
+        'Amalgamation/Inc. Date': first(block, '.appMinimalAttr.RegistrationDate .appMinimalValue'),
+        'Location': first(block, '.addressSearchResultBox .appAttrValue'),
+        'Status': first(block, '.statusSearchResult .appMinimalAttr.Status .appMinimalValue'),
+    }));
+}
+"""
+
+
+def _text(element) -> str:
+    """Same result as BeautifulSoup's get_text(strip=True)."""
+    return "".join(part.strip() for part in element.itertext())
+
+
+def _first_text(block, xpath: str, default: str = "N/A") -> str:
+    found = block.xpath(xpath)
+    return _text(found[0]) if found else default
+
+
+def _children(element) -> list:
+    """Child nodes including text, in the same order BeautifulSoup's `.children` yields them."""
+    nodes = [element.text] if element.text else []
+    for child in element:
+        nodes.append(child)
+        if child.tail:
+            nodes.append(child.tail)
+    return nodes
+
+
+def _node_text(node) -> str:
+    return node if isinstance(node, str) else node.text_content()
+
+
+def pager_total_from_text(banner_text: str) -> Optional[int]:
+    """
+    Total result count from pager banner text such as "1 - 200 of 1,234 ".
+    Returns None if the text has no count.
+    """
+    numbers = re.findall(r'\d[\d,]*', banner_text)
+    if not numbers:
+        return None
+    return int(numbers[-1].replace(",", ""))
+
+
+def pager_range_from_text(banner_text: str) -> Optional[Tuple[int, int, int]]:
+    """
+    (first, last, total) from pager banner text such as "201 - 400 of 1,234".
+    Returns None if the text has no range.
+    """
+    match = _PAGER_RANGE.search(banner_text)
+    if not match:
+        return None
+    first, last, total = (int(group.replace(",", "")) for group in match.groups())
+    return first, last, total
+
+
+def parse_pager_total(page_html: str) -> Optional[int]:
+    """Total result count from the pager banner, or None if the page has no banner."""
+    tree = lxml_html.fromstring(page_html)
+    banner = tree.xpath(PAGER_BANNER)
+    if not banner:
+        return None
+    return pager_total_from_text(banner[0].text_content())
+
+
+def parse_search_results(page_html: str) -> List[Dict[str, str]]:
+    """
+    Parse every result block on a page into a dictionary of its fields.
+    Used by the Playwright scrapers.
+    """
+    tree = lxml_html.fromstring(page_html)
+    results = []
+    for block in tree.xpath(RESULT_BLOCKS):
+        results.append({
+            'Business Name': _first_text(block, BUSINESS_NAME),
+            'Business Type': _first_text(block, BUSINESS_TYPE),
+            'Amalgamation/Inc. Date': _first_text(block, REGISTRATION_DATE),
+            'Location': _first_text(block, LOCATION),
+            'Status': _first_text(block, STATUS),
+        })
+    return results
+
+
+def parse_result_rows(page_html: str) -> List[tuple]:
+    """
+    Parse a page into (name, address, status, registration date, type) rows.
+    Used by the Selenium scraper; matches its original BeautifulSoup output.
+    """
+    tree = lxml_html.fromstring(page_html)
+    first = tree.xpath(f"//*[{_has_class('appMinimalMenu', 'viewMenu', 'appItemSearchResult', 'noSave', 'viewInstanceUpdateStackPush')}]")
+    second = tree.xpath(f"//*[{_has_class('appMinimalBox', 'addressSearchResultBox')}]")
+    status = tree.xpath(f"//*[{_has_class('appMinimalBox', 'statusSearchResult')}]")
+    registration = tree.xpath(f"//*[{_has_class('appMinimalAttr', 'RegistrationDate')}]")
+    entity_type = tree.xpath(f"//*[{_has_class('appMinimalAttr', 'EntitySubTypeCode')}]")
+
+    banner = tree.xpath(f"//*[{_has_class('appPagerBanner')}]")
+    total = int(banner[0].text_content().split(" ")[-2])
+    rows = []
+    for row in range(min(total, len(first))):
+        rows.append((
+            first[row].text_content(),
+            second[row].text_content().replace("\n", ""),
+            _node_text(_children(status[row])[1]),
+            _node_text(_children(registration[row])[1]),
+            _node_text(_children(entity_type[row])[1]),
+        ))
+    return rows
+
+
+class ParsePool:
+    """
+    Process pool for CPU-bound page parsing.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        # Spawn rather than fork: the scrapers already run browser and writer threads
+        self._executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def submit(self, parse_fn: Callable[[str], T], page_html: str) -> "concurrent.futures.Future[T]":
+        """Queue a page for parsing; returns immediately with a future."""
+        return self._executor.submit(parse_fn, page_html)
+
+    async def parse(self, parse_fn: Callable[[str], T], page_html: str) -> T:
+        """Parse a page in a worker process without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, parse_fn, page_html)
+
+    def close(self):
+        """Wait for queued parses to finish and stop the workers."""
+        self._executor.shutdown(wait=True)
@@ -1,10 +1,25 @@
 #!/usr/bin/env python3
+import argparse
 import csv
 from bs4 import BeautifulSoup
 import requests
 import time
 import random
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+
+FEDERAL_SEARCH_URL = 'https://ised-isde.canada.ca/cc/lgcy/fdrlCrpSrch.html'
+SEARCH_PARAMS = {
+    'crpNm': '',
+    'crpNmbr': '',
+    'bsNmbr': '',
+    'cProv': '', # ON: Ontario
+    'cStatus': '1', # 1 = Active
+    'cAct': '14' # 14 Canada Not-for-profit Corporations Act, 12 Canada Cooperatives Act
+}
+# --act choices -> cAct value
+ACTS = {'nonprofit': '14', 'cooperative': '12'}
+MAX_RETRIES = 5
+PAGE_DELAY = (1.0, 3.0)  # Seconds between result pages
 
 # A list of common user agents to rotate through
 USER_AGENTS = [
@@ -62,76 +77,92 @@ def parse_html(html_content: str) -> List[Dict[str, str]]:
             
     return results
 
-def main():
+def fetch_page(session: requests.Session, base_url: str, params: Dict, max_retries: int = MAX_RETRIES) -> Optional[requests.Response]:
     """
-    Main function to read the HTML file, parse it, and write to a CSV.
+    Fetch one page of search results, retrying with exponential backoff.
+    Returns None if every attempt failed.
     """
-    # html_file_path = '/Users/rezababaee/01_Personal/01_Projects/04_Union_Coop/Search for a Federal Corporation - Online Filing Centre - Corporations Canada - Corporations - Innovation, Science and Economic Development Canada.html'
-    csv_file_path = 'federal-non-for-profit.csv'
-    base_url = 'https://ised-isde.canada.ca/cc/lgcy/fdrlCrpSrch.html'
-    params = {
-        'crpNm': '',
-        'crpNmbr': '',
-        'bsNmbr': '',
-        'cProv': '', # ON: Ontario
-        'cStatus': '1', # 1 = Active
-        'cAct': '14' # 14 Canada Not-for-profit Corporations Act, 12 Canada Cooperatives Act
-    }
-    
-    # Commented out section for reading from a local file
-    # try:
-    #     with open(html_file_path, 'r', encoding='utf-8') as f:
-    #         html_content = f.read()
-    # except FileNotFoundError:
-    #     print(f"Error: The file '{html_file_path}' was not found.")
-    #     return
-    # except Exception as e:
-    #     print(f"An error occurred while reading the file: {e}")
-    #     return
-
-    session = requests.Session()
-    all_active_corporations = []
+    for attempt in range(max_retries):
+        try:
+            # Rotate user agent on every request
+            headers = {'User-Agent': random.choice(USER_AGENTS)}
+            response = session.get(base_url, params=params, headers=headers, timeout=20)
+            response.raise_for_status() # Will raise an HTTPError for bad responses (4xx or 5xx)
+            return response
+        except requests.RequestException as e:
+            print(f"  Attempt {attempt + 1}/{max_retries} failed: {e}")
+            if attempt + 1 == max_retries:
+                print("Max retries reached. Aborting.")
+                break
+            # Exponential backoff: wait 2s, 4s, 8s, ...
+            wait_time = 2 ** (attempt + 1)
+            print(f"  Waiting {wait_time} seconds before retrying...")
+            time.sleep(wait_time)
+    return None
+
+
+def crawl_federal_corporations(base_url: str = FEDERAL_SEARCH_URL, params: Optional[Dict] = None,
+                               session: Optional[requests.Session] = None,
+                               page_delay: Tuple[float, float] = PAGE_DELAY,
+                               max_retries: int = MAX_RETRIES) -> List[Dict[str, str]]:
+    """
+    Walk the federal corporation search result pages until one comes back empty.
+
+    Args:
+        base_url: Search page URL; point it at a local mock to benchmark the crawler.
+        params: Search parameters (defaults to SEARCH_PARAMS).
+        session: requests session to reuse.
+        page_delay: Range of the random pause between pages, in seconds.
+        max_retries: Attempts per page before giving up.
+
+    Returns:
+        Every corporation found, as returned by parse_html.
+    """
+    params = dict(SEARCH_PARAMS if params is None else params)
+    session = session or requests.Session()
+    all_corporations = []
     page_number = 0
-    max_retries = 5
-    
+
     while True:
         print(f"Fetching page {page_number}...")
         params['p'] = page_number
-        
-        response = None
-        for attempt in range(max_retries):
-            try:
-                # Rotate user agent and add a random delay
-                headers = {'User-Agent': random.choice(USER_AGENTS)}
-                response = session.get(base_url, params=params, headers=headers, timeout=20)
-                response.raise_for_status() # Will raise an HTTPError for bad responses (4xx or 5xx)
-                break # If request is successful, break the retry loop
-            except requests.RequestException as e:
-                print(f"  Attempt {attempt + 1}/{max_retries} failed: {e}")
-                if attempt + 1 == max_retries:
-                    print("Max retries reached. Aborting.")
-                    break
-                # Exponential backoff: wait 2s, 4s, 8s, ...
-                wait_time = 2 ** (attempt + 1)
-                print(f"  Waiting {wait_time} seconds before retrying...")
-                time.sleep(wait_time)
-        
-        if response is None or not response.ok:
+
+        response = fetch_page(session, base_url, params, max_retries)
+        if response is None:
             break # Stop if all retries failed
 
         corporations_on_page = parse_html(response.text)
         if not corporations_on_page:
             print("No more results found. Stopping.")
             break
-        
-        all_active_corporations.extend(corporations_on_page)
+
+        all_corporations.extend(corporations_on_page)
         page_number += 1
-        
+
         # Be polite and wait a bit before the next request
-        time.sleep(random.uniform(1, 3))
+        if page_delay[1] > 0:
+            time.sleep(random.uniform(*page_delay))
+
+    return all_corporations
+
+
+def main(argv: Optional[List[str]] = None):
+    """
+    Main function to crawl the search results and write them to a CSV.
+    """
+    parser = argparse.ArgumentParser(description="Crawl active federal corporations into a CSV.")
+    parser.add_argument('--act', choices=sorted(ACTS), default='nonprofit',
+                        help="Canada Not-for-profit Corporations Act or Canada Cooperatives Act")
+    parser.add_argument('--province', default='', help="Province code, e.g. ON (default: all)")
+    parser.add_argument('--output', default='federal-non-for-profit.csv', help="CSV file to write")
+    args = parser.parse_args(argv)
+
+    csv_file_path = args.output
+    params = dict(SEARCH_PARAMS, cProv=args.province, cAct=ACTS[args.act])
+    all_active_corporations = crawl_federal_corporations(params=params)
     
     if not all_active_corporations:
-        print("No active corporations found in the HTML file.")
+        print("No active corporations found.")
         return
 
     # Write the data to a CSV file
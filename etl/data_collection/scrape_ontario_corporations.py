@@ -7,26 +7,64 @@ Flow:
 1. Open Browser/Tab for a Business Type.
 2. Set Filters (Advanced -> Corp -> Active -> Type).
 3. Iterate 'a' through 'z' in the SAME tab.
-4. Save results after each search.
+4. Save every result page for each search (walking the pager past 200 rows).
 """
 
 import asyncio
+import math
 import os
 import sys
 import time
 import string
 import random
-from typing import List, Dict, Set, Optional, Callable
-from playwright_scraper_utils import ConcurrentPlaywrightScraper, SearchResult
+import re
+from typing import List, Dict, Set, Optional, Callable, Tuple
+from playwright_scraper_utils import HTML_SAMPLE_RATE, ConcurrentPlaywrightScraper, SearchResult
 from playwright.async_api import Page
-from bs4 import BeautifulSoup
+from result_parsing import ParsePool, pager_range_from_text, parse_search_results
+from wait_strategies import WaitTimings
+from business_records import BusinessRecordSink
+from html_archive import HtmlArchive
+from scrape_tracing import span
+from captcha_detection import Challenge
+from rate_control import classify_exception
 
 # Configuration
-SAVE_DEBUG_FILES = True
+# The pipeline runner (etl/main.py) sets ETL_DEBUG=0 unless asked for debug output,
+# and ETL_DEBUG_DIR to its debug/ folder
+SAVE_DEBUG_FILES = os.environ.get('ETL_DEBUG', '1') != '0'
+DEBUG_FOLDER = os.environ.get('ETL_DEBUG_DIR')
 OUTPUT_FOLDER = 'business_lookup_output'
+# Structured records for the analysis tools (etl/output/all_businesses.json)
+RECORDS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'output')
+WRITE_PARQUET = False
 # We process 3 business types concurrently, each in its own long-running session
 MAX_CONCURRENT = 3 
 
+# Optional fixed pauses on top of the event-driven waits (all off by default).
+# Searches are already paced by the scraper's adaptive rate controller.
+WAIT_TIMINGS = WaitTimings()
+
+# Results paging
+RESULT_BLOCK_SELECTOR = ".appMinimalBox.ItemBox"
+PAGER_BANNER_SELECTOR = ".appPagerBanner"
+PAGE_SIZE_SELECTOR = ".appSearchPageSize select"
+PAGE_SIZE_VALUE = "4"  # Option value for 200 items
+RESULTS_PAGE_SIZE = 200
+# Candidate selectors for the pager's "next page" link, tried in order
+NEXT_PAGE_SELECTORS = [
+    ".appPagerNext a",
+    "a.appPagerNext",
+    ".appPager a[title='Next']",
+    ".appPager a:has-text('Next')",
+]
+
+# Times a letter is retried on a fresh context after a CAPTCHA before it is skipped
+MAX_LETTER_ATTEMPTS = 3
+
+# Result labels look like "a (Co-operative Non-Share)" or "a (Co-operative Non-Share) page 2 of 3"
+RESULT_LABEL = re.compile(r'^(?P<letter>\S+) \((?P<business_type>[^)]*)\)(?: page (?P<page>\d+) of \d+)?$')
+
 # Common User Agents for rotation
 USER_AGENTS = [
     'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -41,261 +79,299 @@ def ensure_output_folder():
     if SAVE_DEBUG_FILES and not os.path.exists(OUTPUT_FOLDER):
         os.makedirs(OUTPUT_FOLDER)
         print(f"Created output folder: {OUTPUT_FOLDER}")
+    if SAVE_DEBUG_FILES and DEBUG_FOLDER:
+        os.makedirs(DEBUG_FOLDER, exist_ok=True)
 
 class FilteredConcurrentScraper(ConcurrentPlaywrightScraper):
     """
     Extended scraper that maintains a session per business type.
     """
     
-    async def start(self):
-        """Initialize browser pool and contexts with stealthier settings."""
-        from playwright.async_api import async_playwright
-        self.playwright = await async_playwright().start()
-        
-        # Create multiple browser instances for better isolation
-        for i in range(self.browser_pool_size):
-            # Use minimal args to look more like a real browser
-            browser = await self.playwright.chromium.launch(
-                headless=self.headless,
-                args=[
-                    '--disable-blink-features=AutomationControlled',
-                    '--disable-infobars',
-                    '--exclude-switches=enable-automation',
-                    '--use-fake-ui-for-media-stream',
-                    '--disable-dev-shm-usage',
-                    '--disable-extensions',
-                    '--disable-gpu',
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox',
-                    '--disable-web-security',
-                    '--disable-background-networking',
-                    '--disable-default-apps',
-                    '--disable-sync',
-                ]
+    def _context_options(self) -> Dict:
+        """Context settings with a rotated user agent and Toronto locale."""
+        options = super()._context_options()
+        options.update(
+            user_agent=random.choice(USER_AGENTS),
+            java_script_enabled=True,
+            locale='en-US',
+            timezone_id='America/Toronto'
+        )
+        return options
+
+    async def _set_page_size(self, page: Page, context_id: int) -> bool:
+        """Switch the results view to 200 rows per page. Returns True once it is set."""
+        try:
+            print(f"[Context {context_id}] 📄 Setting Page Size to {RESULTS_PAGE_SIZE}...")
+            with span("page_size"):
+                await self.waits.run_and_wait(
+                    page, lambda: page.select_option(PAGE_SIZE_SELECTOR, value=PAGE_SIZE_VALUE)
+                )
+            print(f"[Context {context_id}] ✅ Page Size updated")
+            return True
+        except Exception as e:
+            print(f"[Context {context_id}] Warning: Could not set page size: {e}")
+            return False
+
+    async def _pager_range(self, page: Page) -> Optional[Tuple[int, int, int]]:
+        """(first, last, total) result numbers from the pager banner, read in the page."""
+        banner = page.locator(PAGER_BANNER_SELECTOR).first
+        if await banner.count() == 0:
+            return None
+        return pager_range_from_text(await banner.inner_text())
+
+    async def _go_to_next_page(self, page: Page) -> bool:
+        """Click the pager's next link and wait for the new page of results."""
+        for selector in NEXT_PAGE_SELECTORS:
+            next_link = page.locator(selector).first
+            if await next_link.count() > 0:
+                with span("next_page"):
+                    await self.waits.run_and_wait(page, lambda: self.human_click(page, selector))
+                return True
+        return False
+
+    async def _collect_result_pages(self, page: Page, label: str, context_id: int,
+                                    start_time: float, result_callback: Callable) -> Optional[Challenge]:
+        """
+        Hand every page of the current results to `result_callback`.
+        Each page goes to the callback as soon as it is captured, so parsing of
+        one page overlaps with fetching the next.
+        Pages are followed until the banner's range reaches the total, so the
+        walk does not depend on the 200-row page size having been set.
+        Stops at a challenge page and returns the challenge, for the caller to report.
+        """
+        pager = await self._pager_range(page)
+        page_count = 1
+        if pager:
+            first, last, total = pager
+            # Estimate for the labels only, from the rows the site actually shows per page
+            page_count = max(1, math.ceil(total / max(1, last - first + 1)))
+            if page_count > 1:
+                print(f"[Context {context_id}] 📚 {total} results for '{label}' across {page_count} pages")
+
+        page_number = 1
+        while True:
+            if page_number > 1:
+                try:
+                    if not await self._go_to_next_page(page):
+                        print(f"[Context {context_id}] Warning: No next-page link for '{label}' (page {page_number}/{page_count})")
+                        break
+                except Exception as e:
+                    print(f"[Context {context_id}] Warning: Could not load page {page_number}/{page_count} of '{label}': {e}")
+                    break
+                previous_last = pager[1]
+                pager = await self._pager_range(page)
+                if not pager or pager[1] <= previous_last:
+                    print(f"[Context {context_id}] Warning: Pager did not advance for '{label}' (page {page_number})")
+                    break
+                page_count = max(page_count, page_number)
+
+            html_content, records, challenge = await self._capture_results(page)
+            name = label if page_number == 1 else f"{label} page {page_number} of {page_count}"
+            if challenge:
+                if not html_content:
+                    try:
+                        html_content = await page.content()
+                    except Exception:
+                        pass
+                await result_callback(SearchResult(
+                    business_name=name,
+                    html_content=html_content,
+                    success=False,
+                    error_message=challenge.reason,
+                    search_time=time.time() - start_time
+                ))
+                return challenge
+
+            result = SearchResult(
+                business_name=name,
+                html_content=html_content,
+                success=True,
+                search_time=time.time() - start_time,
+                records=records
             )
-            self.browser_pool.append(browser)
             
-            # Create multiple contexts per browser
-            contexts_per_browser = max(1, self.max_concurrent // self.browser_pool_size)
-            for j in range(contexts_per_browser):
-                # Create context with stealth settings
-                context = await browser.new_context(
-                    viewport={'width': 1920, 'height': 1080},
-                    user_agent=random.choice(USER_AGENTS),
-                    java_script_enabled=True,
-                    locale='en-US',
-                    timezone_id='America/Toronto'
-                )
-                
-                # Apply manual stealth scripts to every context
-                await context.add_init_script("""
-                    Object.defineProperty(navigator, 'webdriver', {
-                        get: () => undefined
-                    });
-                    Object.defineProperty(navigator, 'plugins', {
-                        get: () => [1, 2, 3, 4, 5]
-                    });
-                    Object.defineProperty(navigator, 'languages', {
-                        get: () => ['en-US', 'en']
-                    });
-                """)
-                
-                self.context_pool.append(context)
-        
-        print(f"Initialized {len(self.browser_pool)} browsers with {len(self.context_pool)} contexts (Stealth Mode)")
+            # Save Result via Callback
+            await result_callback(result)
+
+            if not pager or pager[1] >= pager[2]:
+                return None
+            page_number += 1
+        return None
+
+    async def _set_up_filters(self, page: Page, business_type: str, context_id: int) -> bool:
+        """
+        Open the search form on `page` and set the Register, Business Type and Status filters.
+        Returns False if a filter the search depends on could not be set.
+        """
+        # 1. Navigate
+        with span("navigate"):
+            await page.goto(self.search_url, wait_until='domcontentloaded')
+        await self.waits.pause('after_navigation')
+
+        # Cookie handling
+        try:
+            if await page.query_selector("button:has-text('Accept all')"):
+                await self.human_click(page, "button:has-text('Accept all')")
+        except:
+            pass
+
+        # 2. Click "Advanced"
+        print(f"[Context {context_id}] Setting filters...")
+        try:
+            advanced_clicked = False
+            for selector in ["#expandonodeW297", "text=Advanced", ".advanced-search-toggle"]:
+                if await page.query_selector(selector):
+                    await self.human_click(page, selector)
+                    advanced_clicked = True
+                    await self.waits.pause('after_filter_change')
+                    break
+            if not advanced_clicked:
+                print(f"[Context {context_id}] Warning: Could not click 'Advanced'")
+        except Exception as e:
+            print(f"[Context {context_id}] Error clicking Advanced: {e}")
+
+        # 3. Select Register -> Corporations
+        try:
+            await page.wait_for_selector("#SourceAppCode", timeout=10000)
+            await page.select_option("#SourceAppCode", label="Corporations")
+            await self.waits.wait_for_processing(page)
+            await self.waits.pause('after_filter_change')
+        except Exception as e:
+            print(f"[Context {context_id}] Error setting Register: {e}")
+            return False  # Critical failure
+
+        # 4. Select Business Type
+        try:
+            # Wait for the Business Type list to be populated for the chosen register
+            try:
+                await self.waits.wait_for_option(page, "#EntitySubTypeCode", business_type)
+            except Exception:
+                print(f"[Context {context_id}] ❌ Failed to set Business Type: {business_type}")
+                return False
+            await page.select_option("#EntitySubTypeCode", label=business_type)
+            await self.waits.wait_for_processing(page)
+            await self.waits.pause('after_filter_change')
+            print(f"[Context {context_id}] ✅ Filter Set: '{business_type}'")
+        except Exception as e:
+            print(f"[Context {context_id}] Error setting Business Type: {e}")
+            return False
+
+        # 5. Scroll & Select Status -> Active
+        try:
+            await page.evaluate("window.scrollBy(0, 300)")
+            if await page.query_selector("#Status"):
+                await page.select_option("#Status", label="Active")
+                print(f"[Context {context_id}] ✅ Filter Set: Status 'Active'")
+            else:
+                print(f"[Context {context_id}] Warning: Status dropdown not found")
+        except Exception as e:
+            print(f"[Context {context_id}] Error setting Status: {e}")
+
+        return True
 
     async def process_business_type_session(self, business_type: str, letters: List[str], context_id: int, result_callback: Callable, start_delay: float = 0):
         """
         Runs a full session for a single business type:
-        1. Sets up filters once.
+        1. Checks out a context and sets up filters once.
         2. Iterates through all letters.
+        3. On a CAPTCHA, hands the context back so the pool can quarantine and
+           recycle it, and carries on from the same letter on a fresh checkout
+           (redoing the filters), up to MAX_LETTER_ATTEMPTS times per letter.
         """
         if start_delay > 0:
             print(f"[Context {context_id}] ⏳ Waiting {start_delay}s before starting...")
             await asyncio.sleep(start_delay)
 
-        # Select context from pool
-        context = self.context_pool[context_id % len(self.context_pool)]
-        page = await context.new_page()
-        
-        try:
-            print(f"[Context {context_id}] 🚀 Starting session for '{business_type}'")
-            
-            # --- INITIAL SETUP & FILTERS ---
+        remaining = list(letters)
+        attempts: Dict[str, int] = {}
+        while remaining:
+            # Check out the least-loaded healthy context until the letters are done or it is blocked
+            async with self.pool.checkout() as slot:
+                page = await slot.context.new_page()
+                self.challenges.watch(page)
 
-# ... (lines 104-367 remain unchanged, I will skip them in the replacement to keep it clean, but wait, replace_file_content needs contiguous block. 
-# I will split this into two edits if needed, or just replace the function definition start and the call site.
-# Actually, I can just replace the function definition line and the first few lines, and then separately replace the call loop.
-# But wait, I can't do multiple edits in one replace_file_content unless I use multi_replace.
-# I will use multi_replace_file_content.
+                try:
+                    print(f"[Context {context_id}] 🚀 Starting session for '{business_type}' on context {slot.slot_id}")
 
+                    # --- INITIAL SETUP & FILTERS ---
 
-            
-            # --- INITIAL SETUP & FILTERS ---
-            
-            # 1. Navigate
-            search_url = "https://www.appmybizaccount.gov.on.ca/onbis/master/entry.pub?applicationCode=onbis-master&businessService=registerItemSearch"
-            await page.goto(search_url, wait_until='domcontentloaded')
-            await asyncio.sleep(2.0)
+                    with self.tracer.trace("setup", business_type=business_type, context=context_id):
+                        if not await self._set_up_filters(page, business_type, context_id):
+                            return
 
-            # Cookie handling
-            try:
-                if await page.query_selector("button:has-text('Accept all')"):
-                    await self.human_click(page, "button:has-text('Accept all')")
-            except:
-                pass
+                    # --- SEARCH LOOP ---
+                    print(f"[Context {context_id}] Starting search loop for {len(remaining)} letters...")
+                    page_size_set = False
 
-            # 2. Click "Advanced"
-            print(f"[Context {context_id}] Setting filters...")
-            try:
-                advanced_clicked = False
-                for selector in ["#expandonodeW297", "text=Advanced", ".advanced-search-toggle"]:
-                    if await page.query_selector(selector):
-                        await self.human_click(page, selector)
-                        advanced_clicked = True
-                        await asyncio.sleep(1.0)
-                        break
-                if not advanced_clicked:
-                    print(f"[Context {context_id}] Warning: Could not click 'Advanced'")
-            except Exception as e:
-                print(f"[Context {context_id}] Error clicking Advanced: {e}")
+                    while remaining:
+                        letter = remaining[0]
+                        start_time = time.time()
+                        blocked = False
+                        try:
+                            with self.tracer.trace("search", letter=letter, business_type=business_type, context=context_id):
+                                # Check for CAPTCHA
+                                with span("captcha_check"):
+                                    challenge = await self.challenges.check(page)
+                                if challenge:
+                                    # Slows every session down; the next slot waits out the cool-down
+                                    self.rate.report(challenge.outcome)
+                                    print(f"\n[Context {context_id}] ⚠️ CAPTCHA DETECTED ({challenge.reason})! Switching context...")
+                                    # Quarantined and recycled once this session hands it back
+                                    self.pool.report_failure(slot, captcha=True)
+                                    blocked = True
+                                else:
+                                    # Wait for the shared rate controller before searching
+                                    async with self.rate.async_slot() as ticket:
+                                        # Enter Letter
+                                        print(f"[Context {context_id}] Searching: '{letter}'")
+                                        with span("type", chars=len(letter)):
+                                            await self.human_type(page, "#QueryString", letter)
 
-            # 3. Select Register -> Corporations
-            try:
-                await page.wait_for_selector("#SourceAppCode", timeout=10000)
-                await page.select_option("#SourceAppCode", label="Corporations")
-                await asyncio.sleep(3.0) # Wait for Business Type to load
-            except Exception as e:
-                print(f"[Context {context_id}] Error setting Register: {e}")
-                return # Critical failure
+                                        # Click Search and wait for the search response and the result list to update
+                                        search_button = "#nodeW303" if await page.query_selector("#nodeW303") else "button:has-text('Search')"
+                                        print(f"[Context {context_id}] ⏳ Waiting for results...")
+                                        try:
+                                            await self.waits.run_and_wait(page, lambda: self.human_click(page, search_button))
+                                            print(f"[Context {context_id}] ✅ Results displayed")
+                                        except Exception as e:
+                                            ticket.outcome = classify_exception(e)
+                                            print(f"[Context {context_id}] Warning: Timeout waiting for results for '{letter}': {e}")
 
-            # 4. Select Business Type
-            try:
-                found_type = False
-                for attempt in range(5):
-                    if await page.query_selector("#EntitySubTypeCode"):
-                        options = await page.eval_on_selector_all("#EntitySubTypeCode option", "opts => opts.map(o => o.text)")
-                        if any(business_type in opt for opt in options):
-                            await page.select_option("#EntitySubTypeCode", label=business_type)
-                            found_type = True
-                            print(f"[Context {context_id}] ✅ Filter Set: '{business_type}'")
-                            break
-                    await asyncio.sleep(2.0)
-                
-                if not found_type:
-                    print(f"[Context {context_id}] ❌ Failed to set Business Type: {business_type}")
-                    return
-            except Exception as e:
-                print(f"[Context {context_id}] Error setting Business Type: {e}")
-                return
+                                        # Expand Page Size to 200 (once per session, on the first letter with results)
+                                        if not page_size_set and await page.locator(RESULT_BLOCK_SELECTOR).count() > 0:
+                                            page_size_set = await self._set_page_size(page, context_id)
 
-            # 5. Scroll & Select Status -> Active
-            try:
-                await page.evaluate("window.scrollBy(0, 300)")
-                await asyncio.sleep(0.5)
-                if await page.query_selector("#Status"):
-                    await page.select_option("#Status", label="Active")
-                    print(f"[Context {context_id}] ✅ Filter Set: Status 'Active'")
-                else:
-                    print(f"[Context {context_id}] Warning: Status dropdown not found")
-            except Exception as e:
-                print(f"[Context {context_id}] Error setting Status: {e}")
+                                        # Capture every result page for this letter
+                                        challenge = await self._collect_result_pages(page, f"{letter} ({business_type})", context_id,
+                                                                                     start_time, result_callback)
+                                        if challenge:
+                                            # Counts as a blocked search for the rate controller; the context is recycled
+                                            ticket.outcome = challenge.outcome
+                                            self.pool.report_failure(slot, captcha=True)
+                                            print(f"[Context {context_id}] ⚠️ Challenge while reading results for '{letter}' ({challenge.reason})")
+                                            blocked = True
+
+                                    # Optional delay between searches
+                                    await self.waits.pause_between_searches()
 
-            # --- SEARCH LOOP ---
-            print(f"[Context {context_id}] Starting search loop for {len(letters)} letters...")
-            
-            for letter in letters:
-                start_time = time.time()
-                try:
-                    # Check for CAPTCHA
-                    content = await page.content()
-                    if "captcha" in content.lower() or "unblock" in content.lower() or "bot" in content.lower():
-                        print(f"\n[Context {context_id}] ⚠️ CAPTCHA DETECTED! Pausing for 60s...")
-                        for k in range(12):
-                            await asyncio.sleep(5)
-                            if await page.query_selector("#QueryString"):
-                                print(f"[Context {context_id}] ✅ Captcha cleared. Resuming...")
-                                break
-                    
-                    # Enter Letter
-                    print(f"[Context {context_id}] Searching: '{letter}'")
-                    await self.human_type(page, "#QueryString", letter)
-                    
-                    # Click Search
-                    if await page.query_selector("#nodeW303"):
-                        await self.human_click(page, "#nodeW303")
-                    else:
-                        await self.human_click(page, "button:has-text('Search')")
-                    
-                    # Wait for page to load after clicking search
-                    print(f"[Context {context_id}] ⏳ Waiting for page to load...")
-                    try:
-                        # Wait for network to be idle (no more than 2 network connections for at least 500ms)
-                        await page.wait_for_load_state('networkidle', timeout=30000)
-                        print(f"[Context {context_id}] ✅ Page loaded")
-                    except Exception as e:
-                        print(f"[Context {context_id}] Warning: Network idle timeout: {e}")
-                        # Fallback: just wait a bit
-                        await asyncio.sleep(3.0)
-                    
-                    # Wait for Results (Robust)
-                    # We wait for the results container OR "No results"
-                    try:
-                        results_loc = page.locator(".appMinimalBox.ItemBox").first
-                        no_results_loc = page.locator("text=/No results found|No matches found/i")
-                        
-                        await results_loc.or_(no_results_loc).wait_for(state="attached", timeout=30000)
-                        print(f"[Context {context_id}] ✅ Results displayed")
-                    except Exception as e:
-                        print(f"[Context {context_id}] Warning: Timeout waiting for results for '{letter}': {e}")
-
-                    # Expand Page Size to 200 (Only for 'a', effectively once per session)
-                    if letter == 'a':
-                        try:
-                            # Only try if we actually found results
-                            if await page.locator(".appMinimalBox.ItemBox").count() > 0:
-                                print(f"[Context {context_id}] 📄 Setting Page Size to 200...")
-                                # Select value "4" (200 items)
-                                await page.select_option(".appSearchPageSize select", value="4")
-                                
-                                # Wait for the update to complete
-                                await asyncio.sleep(3.0)
-                                await results_loc.wait_for(state="attached", timeout=30000)
-                                print(f"[Context {context_id}] ✅ Page Size updated")
                         except Exception as e:
-                            print(f"[Context {context_id}] Warning: Could not set page size: {e}")
-
-                    # Capture Data
-                    html_content = await page.content()
-                    search_time = time.time() - start_time
-                    
-                    success = True
-                    if "No results found" in html_content or "No matches found" in html_content:
-                        pass # Success but empty
-                    
-                    result = SearchResult(
-                        business_name=f"{letter} ({business_type})",
-                        html_content=html_content,
-                        success=success,
-                        search_time=search_time
-                    )
-                    
-                    # Save Result via Callback
-                    await result_callback(result)
-                    
-                    # Random delay between searches
-                    await asyncio.sleep(random.uniform(2.0, 5.0))
-                    
-                except Exception as e:
-                    print(f"[Context {context_id}] Error processing letter '{letter}': {e}")
-                    # Try to recover? Maybe refresh? 
-                    # For now, just continue to next letter
-                    await asyncio.sleep(5)
+                            print(f"[Context {context_id}] Error processing letter '{letter}': {e}")
+                            # Try to recover? Maybe refresh?
+                            # For now, just continue to next letter
+                            await asyncio.sleep(5)
 
-        finally:
-            await page.close()
-            print(f"[Context {context_id}] Session ended for '{business_type}'")
+                        if blocked:
+                            attempts[letter] = attempts.get(letter, 0) + 1
+                            if attempts[letter] >= MAX_LETTER_ATTEMPTS:
+                                print(f"[Context {context_id}] ❌ Giving up on '{letter}' after {attempts[letter]} blocked attempts")
+                                remaining.pop(0)
+                            # Hand the flagged context back and continue on another one
+                            break
+                        remaining.pop(0)
 
+                finally:
+                    await page.close()
+                    print(f"[Context {context_id}] Session ended for '{business_type}' on context {slot.slot_id}")
 
 async def process_non_profits():
     """Main processing function."""
@@ -305,6 +381,12 @@ async def process_non_profits():
     
     timestamp = time.strftime("%Y%m%d_%H%M%S")
     report_file = os.path.join(output_dir, f'non_profit_search_report_{timestamp}.txt')
+
+    # Parsed records stream straight into a deduplicated dataset
+    os.makedirs(RECORDS_FOLDER, exist_ok=True)
+    records_file = os.path.join(RECORDS_FOLDER, 'all_businesses.jsonl')
+    parquet_file = os.path.join(RECORDS_FOLDER, 'all_businesses.parquet') if WRITE_PARQUET else None
+    record_sink = BusinessRecordSink(records_file, parquet_path=parquet_file)
     
     letters = list(string.ascii_lowercase) # a-z
     business_types = [
@@ -315,14 +397,34 @@ async def process_non_profits():
     
     print(f"🚀 Starting concurrent sessions for {len(business_types)} business types...")
     
+    # Debug pages go into one compressed archive instead of a file per search
+    archive = HtmlArchive(os.path.join(DEBUG_FOLDER or output_dir, f'pages_{timestamp}.htmlz')) if SAVE_DEBUG_FILES else None
+
     # Shared lock for writing to the report file
     file_lock = asyncio.Lock()
     
-    # Callback to handle saving results
-    async def save_result(res: SearchResult):
+    # Pages are parsed in worker processes so the browser sessions never wait on parsing
+    parse_pool = ParsePool()
+    pending_writes: Set[asyncio.Task] = set()
+
+    async def write_result(res: SearchResult, parsed: Optional[asyncio.Future]):
+        result_blocks = []
+        parse_error = None
+        if parsed is not None:
+            try:
+                # Time spent waiting on the parse pool, not the parse itself
+                with span("parse"):
+                    result_blocks = await parsed
+            except Exception as e:
+                parse_error = e
+
         async with file_lock:
             with open(report_file, 'a', encoding='utf-8') as f:
-                status = "✅ Found" if res.success and "No results found" not in res.html_content else "❌ No Data"
+                if res.records is not None:
+                    found = bool(res.records)
+                else:
+                    found = "No results found" not in res.html_content
+                status = "✅ Found" if res.success and found else "❌ No Data"
                 if not res.success: status = "⚠️ Error"
                 
                 print(f"   [Saved] {status}: {res.business_name}")
@@ -332,65 +434,56 @@ async def process_non_profits():
                 f.write(f"Status: {status}\n")
                 f.write(f"Time: {res.search_time:.2f}s\n")
                 
+                # Save HTML (kept for failed and challenge pages; for successful ones only
+                # when extraction at source is off or the page was sampled)
+                if archive is not None and res.html_content:
+                    label = RESULT_LABEL.match(res.business_name)
+                    archived = archive.add(
+                        res.html_content,
+                        business_type=label.group('business_type') if label else "",
+                        letter=label.group('letter') if label else "",
+                        page=int(label.group('page') or 1) if label else 1,
+                        label=res.business_name,
+                        status="ok" if res.success else "failed",
+                    )
+                    f.write(f"Archived HTML: {archived.sha1[:12]} @ {archived.offset}\n")
+
                 if res.success:
-                    # Save HTML
-                    safe_name = res.business_name.replace(' ', '_').replace('(', '').replace(')', '')
-                    html_filename = os.path.join(output_dir, f"result_{safe_name}_{timestamp}.html")
-                    with open(html_filename, 'w', encoding='utf-8') as hf:
-                        hf.write(res.html_content)
-                    f.write(f"Saved HTML: {os.path.basename(html_filename)}\n")
-                    
-                    # Parse Data
-                    if "No results found" not in res.html_content:
-                        try:
-                            soup = BeautifulSoup(res.html_content, 'html.parser')
-                            # Corrected selector based on HTML inspection
-                            result_blocks = soup.select('.appMinimalBox.ItemBox')
-                            f.write(f"Results Found: {len(result_blocks)}\n\n")
-                            
-                            for idx, block in enumerate(result_blocks, 1):
-                                f.write(f"--- Result #{idx} ---\n")
-                                
-                                # 1. Business Name
-                                name_elem = block.select_one('.registerItemSearch-results-page-line-ItemBox-resultLeft-viewMenu span:nth-of-type(2)')
-                                business_name = name_elem.get_text(strip=True) if name_elem else "N/A"
-                                f.write(f"Business Name: {business_name}\n")
-                                
-                                # 2. Business Type
-                                type_elem = block.select_one('.appMinimalAttr.EntitySubTypeCode .appMinimalValue')
-                                b_type = type_elem.get_text(strip=True) if type_elem else "N/A"
-                                f.write(f"Business Type: {b_type}\n")
-                                
-                                # 3. Amalgamation/Incorporation Date
-                                date_elem = block.select_one('.appMinimalAttr.RegistrationDate .appMinimalValue')
-                                date_val = date_elem.get_text(strip=True) if date_elem else "N/A"
-                                f.write(f"Amalgamation/Inc. Date: {date_val}\n")
-                                
-                                # 4. Location
-                                loc_elem = block.select_one('.addressSearchResultBox .appAttrValue')
-                                location = loc_elem.get_text(strip=True) if loc_elem else "N/A"
-                                f.write(f"Location: {location}\n")
-                                
-                                # 5. Status
-                                status_elem = block.select_one('.statusSearchResult .appMinimalAttr.Status .appMinimalValue')
-                                status_val = status_elem.get_text(strip=True) if status_elem else "N/A"
-                                f.write(f"Status: {status_val}\n")
-                                
-                                f.write("\n")
-                        except Exception as e:
-                            f.write(f"Error parsing HTML: {e}\n")
+                    # Parsed Data
+                    if parse_error is not None:
+                        f.write(f"Error parsing HTML: {parse_error}\n")
+                    elif parsed is not None:
+                        new_records = record_sink.add_many(result_blocks)
+                        f.write(f"Results Found: {len(result_blocks)}\n")
+                        f.write(f"New Records: {new_records}\n")
                 else:
                     f.write(f"Error: {res.error_message}\n")
                 
                 f.write("\n" + "="*60 + "\n\n")
 
+    # Callback to handle saving results; returns to the browser loop immediately
+    async def save_result(res: SearchResult):
+        parsed = None
+        if res.records is not None:
+            # Already extracted in the page; nothing to parse
+            parsed = asyncio.get_running_loop().create_future()
+            parsed.set_result(res.records)
+        elif res.success and "No results found" not in res.html_content:
+            parsed = asyncio.ensure_future(parse_pool.parse(parse_search_results, res.html_content))
+        task = asyncio.create_task(write_result(res, parsed))
+        pending_writes.add(task)
+        task.add_done_callback(pending_writes.discard)
+
     # Initialize report file
     with open(report_file, 'w', encoding='utf-8') as f:
         f.write("NON-PROFIT CORPORATION SEARCH REPORT\n")
         f.write("=" * 60 + "\n\n")
 
     # Run sessions
-    async with FilteredConcurrentScraper(max_concurrent=MAX_CONCURRENT, headless=False) as scraper:
+    # With debug files on, keep the HTML of every page for the archive, not just a sample
+    html_sample_rate = 1.0 if SAVE_DEBUG_FILES else HTML_SAMPLE_RATE
+    async with FilteredConcurrentScraper(max_concurrent=MAX_CONCURRENT, headless=False, wait_timings=WAIT_TIMINGS,
+                                         html_sample_rate=html_sample_rate) as scraper:
         tasks = []
         for i, b_type in enumerate(business_types):
             # Launch a session for each business type with a staggered start
@@ -400,6 +493,22 @@ async def process_non_profits():
         
         await asyncio.gather(*tasks)
 
+        if scraper.route_policy is not None:
+            print(scraper.route_policy.stats.summary())
+
+        # Let outstanding parses and writes finish
+        if pending_writes:
+            await asyncio.gather(*pending_writes)
+        print(scraper.tracer.summary())
+        print(scraper.rate.summary())
+    parse_pool.close()
+    if archive is not None:
+        print(archive.summary())
+        archive.close()
+
+    json_file = os.path.join(RECORDS_FOLDER, 'all_businesses.json')
+    total = record_sink.export_json(json_file)
+    print(f"\n💾 Saved {total} unique records to: {json_file} ({record_sink.duplicates_skipped} duplicates skipped)")
     print(f"\n🎉 Completed! Report saved to: {report_file}")
 
 if __name__ == "__main__":
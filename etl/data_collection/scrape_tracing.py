@@ -0,0 +1,176 @@
+"""
+Per-stage timing spans for scraper sessions.
+
+Each search runs inside a trace (`Tracer.trace`), and the code it calls marks
+its stages with `span(...)`: navigation, typing, submitting, waiting,
+extraction, parsing. The current span is kept in a context variable, so
+spans nest across awaits and helpers (the wait strategies, the context pool)
+can open spans without being handed a tracer. Outside a trace `span` does
+nothing.
+
+Finished spans are aggregated per stage for `Tracer.summary()` and can be
+exported as JSON Lines, either flat or as OpenTelemetry (OTLP/JSON) span
+records.
+"""
+
+import json
+import os
+import secrets
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, ContextManager, Dict, Iterator, List, Optional, Tuple
+
+# Export formats
+FORMAT_JSONL = "jsonl"
+FORMAT_OTLP = "otlp"
+
+# Width of the bars in the summary
+SUMMARY_BAR_WIDTH = 30
+
+
+@dataclass
+class Span:
+    """One timed stage of a search."""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start_ns: int = 0
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds."""
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def to_otlp(self) -> Dict:
+        """The span as an OTLP/JSON span record."""
+        def value(v):
+            if isinstance(v, bool):
+                return {"boolValue": v}
+            if isinstance(v, int):
+                return {"intValue": str(v)}
+            if isinstance(v, float):
+                return {"doubleValue": v}
+            return {"stringValue": str(v)}
+
+        record = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": k, "value": value(v)} for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            record["parentSpanId"] = self.parent_id
+        return record
+
+
+# The tracer and span the running code belongs to, if any
+_current: ContextVar[Optional[Tuple["Tracer", Span]]] = ContextVar("scrape_tracing_current", default=None)
+
+
+class Tracer:
+    """
+    Collects spans, keeps per-stage timings and optionally exports every span.
+
+    Args:
+        export_path: JSON Lines file that finished spans are appended to.
+        export_format: FORMAT_JSONL for flat records, FORMAT_OTLP for OpenTelemetry span records.
+    """
+
+    def __init__(self, export_path: Optional[str] = None, export_format: str = FORMAT_JSONL):
+        self.export_path = export_path
+        self.export_format = export_format
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._file = None
+        if export_path:
+            os.makedirs(os.path.dirname(export_path) or '.', exist_ok=True)
+            self._file = open(export_path, 'a', encoding='utf-8')
+
+    @contextmanager
+    def _run(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict) -> Iterator[Span]:
+        span_ = Span(name=name, trace_id=trace_id, span_id=secrets.token_hex(8), parent_id=parent_id,
+                     start_ns=time.time_ns(), attributes=attributes)
+        token = _current.set((self, span_))
+        try:
+            yield span_
+        except BaseException as e:
+            span_.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current.reset(token)
+            span_.end_ns = time.time_ns()
+            self._finish(span_)
+
+    def trace(self, name: str, /, **attributes) -> ContextManager[Span]:
+        """Start a new trace (e.g. one search) with `name` as its root span."""
+        return self._run(name, secrets.token_hex(16), None, attributes)
+
+    def _finish(self, span_: Span):
+        with self._lock:
+            self.durations[span_.name].append(span_.duration)
+            if span_.error:
+                self.errors[span_.name] += 1
+            if self._file is not None:
+                record = span_.to_otlp() if self.export_format == FORMAT_OTLP else asdict(span_)
+                self._file.write(json.dumps(record, default=str) + "\n")
+
+    def summary(self) -> str:
+        """Per-stage count, total, mean, p50/p95 and a bar showing each stage's share of the time."""
+        with self._lock:
+            stages = {name: sorted(values) for name, values in self.durations.items() if values}
+        if not stages:
+            return "No spans recorded"
+
+        longest = max(sum(values) for values in stages.values())
+        lines = [f"{'stage':<18} {'count':>6} {'total':>9} {'mean':>8} {'p50':>8} {'p95':>8}  errors"]
+        for name, values in sorted(stages.items(), key=lambda item: -sum(item[1])):
+            total = sum(values)
+            p50 = values[len(values) // 2]
+            p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+            bar = "█" * max(1, round(SUMMARY_BAR_WIDTH * total / longest)) if longest else ""
+            lines.append(
+                f"{name:<18} {len(values):>6} {total:>8.1f}s {total / len(values):>7.3f}s "
+                f"{p50:>7.3f}s {p95:>7.3f}s  {self.errors.get(name, 0):>6}  {bar}"
+            )
+        return "\n".join(lines)
+
+    def close(self):
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+
+
+@contextmanager
+def _no_span() -> Iterator[None]:
+    yield None
+
+
+def span(name: str, /, **attributes) -> ContextManager[Optional[Span]]:
+    """
+    Time a stage as a child of the current span. Does nothing outside a trace,
+    so library code can call it unconditionally.
+    """
+    current = _current.get()
+    if current is None:
+        return _no_span()
+    tracer, parent = current
+    return tracer._run(name, parent.trace_id, parent.span_id, attributes)
+
+
+def annotate(**attributes):
+    """Add attributes to the current span, if there is one."""
+    current = _current.get()
+    if current is not None:
+        current[1].attributes.update(attributes)
@@ -0,0 +1,138 @@
+"""
+Signal-based waits for the ONBIS search pages.
+
+Instead of sleeping for a fixed time after each navigation or filter change,
+`WaitStrategy` resolves as soon as the page shows it is ready:
+1. The search request's response arrives (response interception).
+2. The `#catProcessing` overlay disappears.
+3. The result list (`.appMinimalBox.ItemBox`) is mutated in the DOM.
+
+Fixed pauses can still be layered on top through `WaitTimings` (e.g. to look
+less bot-like), but they are all zero by default.
+"""
+
+import asyncio
+import random
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Tuple
+
+from playwright.async_api import Page, Response
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from scrape_tracing import span
+
+PROCESSING_SELECTOR = "#catProcessing"
+RESULT_BLOCK_SELECTOR = ".appMinimalBox.ItemBox"
+NO_RESULTS_PATTERN = "No results found|No matches found"
+# Responses to the search form are served from the ONBIS application path
+SEARCH_RESPONSE_PATTERN = "/onbis/master/"
+
+# Installs a MutationObserver that flags the next change to the result list
+_ARM_RESULTS_OBSERVER = """
+([blockSelector, noResultsPattern]) => {
+    const noResults = new RegExp(noResultsPattern, 'i');
+    const touchesResults = (node) => node.nodeType === Node.ELEMENT_NODE && (
+        node.matches(blockSelector) || node.querySelector(blockSelector) || noResults.test(node.textContent || '')
+    );
+    if (window.__resultsObserver) window.__resultsObserver.disconnect();
+    window.__resultsChanged = false;
+    window.__resultsObserver = new MutationObserver((mutations) => {
+        for (const m of mutations) {
+            if ([...m.addedNodes, ...m.removedNodes].some(touchesResults)) {
+                window.__resultsChanged = true;
+                window.__resultsObserver.disconnect();
+                return;
+            }
+        }
+    });
+    window.__resultsObserver.observe(document.body, {childList: true, subtree: true});
+}
+"""
+
+# A full page load drops the flag entirely, which also means fresh results
+_RESULTS_CHANGED = "() => window.__resultsChanged !== false"
+
+# Resolves once a <select> offers an option containing the given text
+_OPTION_AVAILABLE = """
+([selector, text]) => {
+    const select = document.querySelector(selector);
+    return !!select && [...select.options].some(o => o.text.includes(text));
+}
+"""
+
+
+@dataclass
+class WaitTimings:
+    """
+    Optional fixed pauses in seconds, applied after the signal-based waits.
+    All are off by default.
+    """
+    after_navigation: float = 0.0
+    after_filter_change: float = 0.0
+    after_search: float = 0.0
+    between_searches: Tuple[float, float] = (0.0, 0.0)
+
+
+class WaitStrategy:
+    """
+    Waits that resolve on page signals rather than elapsed time.
+    """
+
+    def __init__(self, timings: WaitTimings = None, timeout_ms: int = 30000,
+                 search_response_pattern: str = SEARCH_RESPONSE_PATTERN):
+        self.timings = timings or WaitTimings()
+        self.timeout_ms = timeout_ms
+        self.search_response_pattern = search_response_pattern
+
+    async def pause(self, stage: str):
+        """Apply the configured fixed pause for a stage, if any."""
+        seconds = getattr(self.timings, stage)
+        if seconds > 0:
+            with span("pause", stage=stage):
+                await asyncio.sleep(seconds)
+
+    async def pause_between_searches(self):
+        """Apply the configured random pause between searches, if any."""
+        low, high = self.timings.between_searches
+        if high > 0:
+            with span("pause", stage="between_searches"):
+                await asyncio.sleep(random.uniform(low, high))
+
+    def _is_search_response(self, response: Response) -> bool:
+        return (response.request.resource_type in ("xhr", "fetch", "document")
+                and self.search_response_pattern in response.url)
+
+    async def wait_for_processing(self, page: Page):
+        """Wait until the `#catProcessing` overlay is gone (returns at once if it never showed)."""
+        with span("wait_processing"):
+            await page.locator(PROCESSING_SELECTOR).wait_for(state="hidden", timeout=self.timeout_ms)
+
+    async def wait_for_option(self, page: Page, selector: str, text: str):
+        """Wait until a dependent dropdown has been populated with `text`."""
+        with span("wait_option", selector=selector):
+            await page.wait_for_function(_OPTION_AVAILABLE, arg=[selector, text], timeout=self.timeout_ms)
+
+    async def run_and_wait(self, page: Page, action: Callable[[], Awaitable], expect_results: bool = True):
+        """
+        Run `action` (a click or select that submits the search form) and wait
+        for the response, the processing overlay and, if `expect_results`, the
+        result list mutation.
+        """
+        if expect_results:
+            await page.evaluate(_ARM_RESULTS_OBSERVER, [RESULT_BLOCK_SELECTOR, NO_RESULTS_PATTERN])
+
+        try:
+            # Covers the click itself and the round trip to the server
+            with span("submit"):
+                async with page.expect_response(self._is_search_response, timeout=self.timeout_ms):
+                    await action()
+        except PlaywrightTimeoutError as e:
+            # No matching response; the DOM signals below still decide when we are done
+            print(f"Warning: No search response seen: {e}")
+
+        await self.wait_for_processing(page)
+
+        if expect_results:
+            with span("wait_results"):
+                await page.wait_for_function(_RESULTS_CHANGED, timeout=self.timeout_ms)
+        await self.pause("after_search")
@@ -0,0 +1,186 @@
+"""
+Address canonicalisation and blocked address joins.
+
+The CRA charity list writes "74 WEBER ST W", the city's ownership data may
+have "74 Weber Street West"; an exact merge on the address string misses
+every such pair. This module:
+1. Canonicalises each address to (civic number, street, unit): upper case,
+   no punctuation, units ("UNIT 5", "SUITE 200", "#12", "5-74 ...") split
+   off, and the trailing street type and direction reduced to Canada Post
+   abbreviations (STREET -> ST, WEST -> W, ...). Only the distinct address
+   strings of a column are parsed, and results are cached across columns.
+2. Joins two tables on (civic number, canonical street) with a merge.
+3. For rows still unmatched, compares streets with difflib only against the
+   rows that share their civic number (the block), so the fallback never
+   compares every address with every other.
+"""
+
+import difflib
+import re
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+import pandas as pd
+
+# Minimum difflib ratio between canonical streets for a fuzzy match
+FUZZY_STREET_THRESHOLD = 0.85
+
+# Street types -> Canada Post abbreviation
+STREET_TYPES = {
+    'STREET': 'ST', 'ST': 'ST', 'STR': 'ST',
+    'AVENUE': 'AVE', 'AVE': 'AVE', 'AV': 'AVE',
+    'ROAD': 'RD', 'RD': 'RD',
+    'DRIVE': 'DR', 'DR': 'DR',
+    'BOULEVARD': 'BLVD', 'BLVD': 'BLVD', 'BOUL': 'BLVD',
+    'CRESCENT': 'CRES', 'CRES': 'CRES', 'CR': 'CRES',
+    'COURT': 'CRT', 'CRT': 'CRT', 'CT': 'CRT',
+    'PLACE': 'PL', 'PL': 'PL',
+    'CIRCLE': 'CIR', 'CIR': 'CIR', 'CIRC': 'CIR',
+    'TERRACE': 'TERR', 'TERR': 'TERR', 'TER': 'TERR',
+    'PARKWAY': 'PKY', 'PKY': 'PKY', 'PKWY': 'PKY',
+    'HIGHWAY': 'HWY', 'HWY': 'HWY',
+    'SQUARE': 'SQ', 'SQ': 'SQ',
+    'LANE': 'LANE', 'LN': 'LANE',
+    'TRAIL': 'TRAIL', 'TRL': 'TRAIL',
+    'GATE': 'GATE', 'GT': 'GATE',
+    'WAY': 'WAY',
+    'LINE': 'LINE',
+    'HEIGHTS': 'HTS', 'HTS': 'HTS',
+    'GARDENS': 'GDNS', 'GDNS': 'GDNS',
+}
+
+# Directions -> abbreviation
+DIRECTIONS = {
+    'NORTH': 'N', 'N': 'N',
+    'SOUTH': 'S', 'S': 'S',
+    'EAST': 'E', 'E': 'E',
+    'WEST': 'W', 'W': 'W',
+    'NORTHEAST': 'NE', 'NE': 'NE',
+    'NORTHWEST': 'NW', 'NW': 'NW',
+    'SOUTHEAST': 'SE', 'SE': 'SE',
+    'SOUTHWEST': 'SW', 'SW': 'SW',
+}
+
+UNIT_WORDS = ('UNIT', 'SUITE', 'STE', 'APT', 'APARTMENT', 'ROOM', 'RM', 'FLOOR', 'FL')
+
+_UNIT = re.compile(r"\b(?:%s)\s*#?\s*([A-Z0-9]+)\b|#\s*([A-Z0-9]+)\b" % '|'.join(UNIT_WORDS))
+# "5-74 WEBER ST" is unit 5 at civic number 74
+_UNIT_CIVIC = re.compile(r"^([A-Z0-9]+)\s*-\s*(\d+[A-Z]?)\b")
+_CIVIC = re.compile(r"^(\d+[A-Z]?)\b")
+_NOT_WORD = re.compile(r"[^A-Z0-9#\- ]+")
+_SPACES = re.compile(r"\s+")
+
+
+class CanonicalAddress(NamedTuple):
+    civic_number: Optional[str]
+    street: str
+    unit: Optional[str]
+
+    @property
+    def key(self) -> str:
+        return f"{self.civic_number or ''} {self.street}".strip()
+
+
+@lru_cache(maxsize=None)
+def canonicalize_address(address: str) -> CanonicalAddress:
+    """Civic number, canonical street and unit of one address line."""
+    text = address.upper().replace('.', '').replace("'", '')
+    text = _SPACES.sub(' ', _NOT_WORD.sub(' ', text)).strip()
+
+    unit = None
+    match = _UNIT.search(text)
+    if match:
+        unit = match.group(1) or match.group(2)
+        text = (text[:match.start()] + text[match.end():]).strip(' -')
+
+    civic_number = None
+    match = _UNIT_CIVIC.match(text)
+    if match:
+        unit = unit or match.group(1)
+        civic_number = match.group(2)
+        text = text[match.end():]
+    else:
+        match = _CIVIC.match(text)
+        if match:
+            civic_number = match.group(1)
+            text = text[match.end():]
+
+    tokens = [token for token in text.replace('-', ' ').replace('#', ' ').split() if token]
+    # Trailing direction, then the street type before it ("WEBER STREET WEST" -> "WEBER ST W")
+    direction = None
+    if len(tokens) > 1 and tokens[-1] in DIRECTIONS:
+        direction = DIRECTIONS[tokens.pop()]
+    if len(tokens) > 1 and tokens[-1] in STREET_TYPES:
+        tokens[-1] = STREET_TYPES[tokens[-1]]
+    if direction:
+        tokens.append(direction)
+
+    return CanonicalAddress(civic_number, ' '.join(tokens), unit)
+
+
+def canonicalize_addresses(addresses: pd.Series) -> pd.DataFrame:
+    """Civic number, street, unit and join key for every value of a column (each distinct string parsed once)."""
+    text = addresses.fillna('').astype(str).str.strip()
+    parsed = {value: canonicalize_address(value) for value in text.unique()}
+    frame = pd.DataFrame(
+        [parsed[value] for value in text],
+        columns=['civic_number', 'street', 'unit'],
+        index=addresses.index,
+    )
+    frame['address_key'] = (frame['civic_number'].fillna('') + ' ' + frame['street']).str.strip()
+    return frame
+
+
+def _with_address_columns(frame: pd.DataFrame, column: str, prefix: str) -> pd.DataFrame:
+    parts = canonicalize_addresses(frame[column]).add_prefix(prefix)
+    return pd.concat([frame, parts], axis=1)
+
+
+def _fuzzy_block_matches(left: pd.DataFrame, right: pd.DataFrame, threshold: float) -> pd.DataFrame:
+    """Best difflib street match for each left row among right rows with the same civic number."""
+    right_blocks = dict(tuple(right.groupby('_r_civic_number')))
+    pairs = []
+    for civic, block in left.groupby('_l_civic_number'):
+        candidates = right_blocks.get(civic)
+        if candidates is None:
+            continue
+        streets = candidates['_r_street'].tolist()
+        for left_index, street in block['_l_street'].items():
+            scored = [(difflib.SequenceMatcher(None, street, other).ratio(), i) for i, other in enumerate(streets)]
+            score, best = max(scored)
+            if score >= threshold:
+                pairs.append((left_index, candidates.index[best], score))
+    return pd.DataFrame(pairs, columns=['_left', '_right', 'Address Score'])
+
+
+def address_join(left: pd.DataFrame, right: pd.DataFrame, left_on: str, right_on: str,
+                 threshold: float = FUZZY_STREET_THRESHOLD) -> pd.DataFrame:
+    """
+    Inner join of two tables on canonical address: exact on (civic number, street),
+    then difflib on the street within each civic-number block for rows still unmatched.
+    Adds 'Address Match' ('exact' or 'fuzzy') and 'Address Score' columns.
+    """
+    left = _with_address_columns(left.reset_index(drop=True), left_on, '_l_')
+    right = _with_address_columns(right.reset_index(drop=True), right_on, '_r_')
+    left = left[left['_l_civic_number'].notna() & (left['_l_street'] != '')]
+    right = right[right['_r_civic_number'].notna() & (right['_r_street'] != '')]
+
+    exact = left.reset_index().merge(
+        right.reset_index(), left_on=['_l_civic_number', '_l_street'], right_on=['_r_civic_number', '_r_street'],
+        suffixes=('', '_right')
+    )
+    exact['Address Match'] = 'exact'
+    exact['Address Score'] = 1.0
+
+    unmatched = left[~left.index.isin(exact['index'])]
+    fuzzy_pairs = _fuzzy_block_matches(unmatched, right, threshold)
+    fuzzy = (
+        fuzzy_pairs
+        .merge(left.reset_index(), left_on='_left', right_on='index')
+        .merge(right.reset_index(), left_on='_right', right_on='index', suffixes=('', '_right'))
+    )
+    fuzzy['Address Match'] = 'fuzzy'
+
+    joined = pd.concat([exact, fuzzy], ignore_index=True)
+    helper = [c for c in joined.columns if c.startswith(('_l_', '_r_')) or c in ('_left', '_right', 'index', 'index_right')]
+    return joined.drop(columns=helper)
@@ -0,0 +1,168 @@
+"""
+Typed, cached loaders for the Kitchener land analysis inputs.
+
+Each loader reads only the columns the analysis uses (`usecols`), with
+explicit dtypes: nullable integers for ids and civic numbers, categoricals
+for low-cardinality columns such as AGENCY and Category, strings elsewhere.
+Text normalisation (lower-casing names, combining civic number and street)
+happens once, at load time.
+
+The prepared frame is then cached in `cache_dir`, as Parquet when pyarrow is
+installed and as a pickle otherwise. The cache key covers the file's path,
+size and modification time plus the column spec, so editing the input or the
+spec re-parses it; every other run skips CSV parsing entirely.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import sys
+from typing import Callable, Dict, Optional
+
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DIR = os.path.join(SCRIPT_DIR, '..', 'output', 'cache')
+
+# Bump to invalidate every cached frame when the preparation below changes
+CACHE_VERSION = 1
+
+# Ownership CSV column -> dtype (only these columns are read)
+OWNERSHIP_DTYPES = {
+    'Objectid': 'Int64',
+    'Property Unit Id': 'string',
+    'Ownername': 'string',
+    'AGENCY': 'category',
+    'x': 'float64',
+    'y': 'float64',
+    'Civic No': 'Int64',
+    'Street': 'string',
+}
+
+# CRA export header (without the trailing ":" and spaces) -> (column name used by the analysis, dtype)
+CHARITY_COLUMNS = {
+    'BN/Registration number': ('BN/Registration Number', 'string'),
+    'Organization name': ('Organization Name', 'string'),
+    'Status': ('Status', 'category'),
+    'Effective date of status': ('Effective Date of Status', 'string'),
+    'Charity type': ('Charity Type', 'category'),
+    'Category': ('Category', 'category'),
+    'Address': ('Address', 'string'),
+    'City': ('City', 'category'),
+    'Postal code/Zip code': ('Postal Code/Zip Code', 'string'),
+}
+
+# MGCS co-op masterlist column -> dtype
+COOP_DTYPES = {
+    'Ontario corporation number': 'string',
+    'Co-operative name': 'string',
+    'Cooperative type': 'category',
+    'City / town': 'string',
+    'Postal code': 'string',
+}
+
+# The charity export's encoding is detected by the data collection reader
+sys.path.insert(0, os.path.join(SCRIPT_DIR, '..', 'data_collection'))
+from charity_ingest import detect_encoding
+
+
+def _digest(value) -> str:
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
+
+def _cache_prefix(path: str, name: str) -> str:
+    """Cache file prefix shared by every version of one input file."""
+    return f"{name}-{_digest(os.path.abspath(path))[:8]}-"
+
+
+def _cache_key(path: str, spec) -> str:
+    stat = os.stat(path)
+    return _digest([stat.st_size, stat.st_mtime_ns, CACHE_VERSION, spec])
+
+
+def _parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def cached_frame(path: str, name: str, spec, parse: Callable[[], pd.DataFrame],
+                 cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> pd.DataFrame:
+    """`parse()` the file, or return the frame cached for the same file and spec."""
+    if not cache_dir:
+        return parse()
+
+    extension = 'parquet' if _parquet_available() else 'pkl'
+    prefix = _cache_prefix(path, name)
+    cache_file = os.path.join(cache_dir, f"{prefix}{_cache_key(path, spec)}.{extension}")
+    if os.path.exists(cache_file):
+        if extension == 'parquet':
+            return pd.read_parquet(cache_file)
+        with open(cache_file, 'rb') as f:
+            return pickle.load(f)
+
+    frame = parse()
+    os.makedirs(cache_dir, exist_ok=True)
+    # Write-then-rename so an interrupted run never leaves a truncated cache file
+    temp_file = cache_file + '.tmp'
+    if extension == 'parquet':
+        frame.to_parquet(temp_file, index=False)
+    else:
+        with open(temp_file, 'wb') as f:
+            pickle.dump(frame, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_file, cache_file)
+    # Older caches of the same file are stale now
+    for old in os.listdir(cache_dir):
+        if old.startswith(prefix) and os.path.join(cache_dir, old) != cache_file:
+            os.remove(os.path.join(cache_dir, old))
+    return frame
+
+
+def load_ownership(path: str, cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> pd.DataFrame:
+    """Public land ownership parcels, with lower-cased owner names and a 'Civic No + Street' address."""
+    def parse():
+        ownership = pd.read_csv(path, usecols=list(OWNERSHIP_DTYPES), dtype=OWNERSHIP_DTYPES)
+        ownership['Ownername'] = ownership['Ownername'].str.lower()
+        # Missing civic numbers stay missing instead of becoming "<NA> KING ST"
+        ownership['Civic No + Street'] = ownership['Civic No'].astype('string') + ' ' + ownership['Street']
+        return ownership
+
+    return cached_frame(path, 'ownership', OWNERSHIP_DTYPES, parse, cache_dir)
+
+
+def load_charities(path: str, cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                   encoding: Optional[str] = None) -> pd.DataFrame:
+    """Registered charities from the CRA export, renamed to the analysis' column names."""
+    def parse():
+        file_encoding = encoding or detect_encoding(path)
+        header = pd.read_csv(path, sep='\t', encoding=file_encoding, nrows=0).columns
+        # Export headers end in ":" and sometimes a space ("Charity type: ")
+        raw: Dict[str, str] = {}
+        for column in header:
+            key = column.strip().rstrip(':').strip()
+            if key in CHARITY_COLUMNS:
+                raw[column] = key
+        charities = pd.read_csv(
+            path, sep='\t', encoding=file_encoding, on_bad_lines='warn',
+            usecols=list(raw), dtype={column: CHARITY_COLUMNS[key][1] for column, key in raw.items()},
+        )
+        charities = charities.rename(columns={column: CHARITY_COLUMNS[key][0] for column, key in raw.items()})
+        charities['Address'] = charities['Address'].str.strip()
+        charities['Organization Name'] = charities['Organization Name'].str.lower()
+        return charities
+
+    return cached_frame(path, 'charities', [CHARITY_COLUMNS, encoding], parse, cache_dir)
+
+
+def load_coops(path: str, cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> pd.DataFrame:
+    """Active co-ops from the MGCS masterlist."""
+    def parse():
+        coops = pd.read_csv(path, usecols=list(COOP_DTYPES), dtype=COOP_DTYPES)
+        coops['City / town'] = coops['City / town'].str.strip()
+        coops['Postal code'] = coops['Postal code'].str.strip()
+        return coops
+
+    return cached_frame(path, 'coops', COOP_DTYPES, parse, cache_dir)
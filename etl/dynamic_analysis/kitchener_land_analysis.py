@@ -3,85 +3,177 @@
 """
 Converted from Jupyter Notebook: notebook.ipynb
 Conversion Date: 2025-11-27T02:30:08.500Z
+
+Usage:
+    python kitchener_land_analysis.py --ownership Property_Ownership_Public.csv [--charities ...] [--output-dir ...]
 """
 
 # 0) IMPORT PACKAGES
 
 # SETUP INSTRUCTIONS TODO
-# a) Install the  libpostal C library according to instructions at https://github.com/openvenues/libpostal
-# b) TODO
-
-import pandas as pd
-import difflib
-#import postal
-
-
-# 1) READ IN DATA
-
-# PUBLIC LAND OWNERSHIP DATA (KITCHENER)
-# ownership DataFrame describes public land ownership data (Kitchener) 
-# from https://open-kitchenergis.opendata.arcgis.com/datasets/KitchenerGIS::property-ownership-public/explore?location=43.383752%2C-80.482943%2C12.06
-
-# REGISTERED CHARITIES (KITCHENER)
-# charity_kitchener DataFrame describes registered charities (Kitchener) from https://apps.cra-arc.gc.ca/ebci/hacc/srch/pub/dsplyBscSrch?request_locale=en
-# filtered by Status = 'Registered', City = 'Kitchener'
-
-ownership = pd.read_csv("/home/indy/Desktop/union-coop-project/Property_Ownership_Public_-8905505954391439593.csv")
-charity_kitchener = pd.read_csv('/home/indy/Desktop/union-coop-project/Charities_results_2025-11-09-14-17-45.txt', sep="	", encoding="cp863",on_bad_lines='warn')
+# a) Addresses are canonicalised in Python (address_normalization.py); libpostal is not needed
+# b) Download the ownership CSV (link below) and pass it with --ownership; parsed inputs are cached in --cache-dir
 
-# 2) PRE-PROCESSING STEP
-
-# CHARITY_KITCHENER DATAFRAME
-# Remove trailing whitespace for 'Address:' column
-charity_kitchener['Address:']  = charity_kitchener['Address:'].str.rstrip()
-# Normalize 'Address:' column using libpostal
-#TODO
-# String normalize 'Organization name:' column
-charity_kitchener['Organization name:'] = charity_kitchener['Organization name:'].str.lower()
-# Rename relevant columns
-charity_kitchener = charity_kitchener.rename({'BN/Registration number:': 'BN/Registration Number', 'Organization name:': 'Organization Name', 
-                                              'Effective date of status:': 'Effective Date of Status', 'Charity type: ': 'Charity Type', 'Category: ': 'Category', 
-                                              'Postal code/Zip code:': 'Postal Code/Zip Code'}, axis=1)
-
-# OWNERSHIP DATAFRAME
-# Convert 'Civic No' column to type str
-ownership['Civic No'] = ownership['Civic No'].astype('Int64').astype(str)
-# Combine 'Civic No' and 'Street' columns
-ownership['Civic No + Street'] = ownership['Civic No'] + " " + ownership['Street']
-# Normalize 'Civic No + Street' column using libpostal
-#TODO
-# String normalize 'Ownername' column
-ownership['Ownername'] = ownership['Ownername'].str.lower()
-
-# 3) DATA MERGING STEP
-
-# Compare entries in charity_kitchener DataFrame and ownership DataFrame to get rows that match based on addresses
-# These rows are charities in Kitchener that own property in Kitchener (based on the public land ownership data for Kitchener)
-
-rel_cols = ["Objectid", "Property Unit Id", "Ownername", "AGENCY", "x", "y", "Civic No + Street", "BN/Registration Number", "Organization Name", "Effective Date of Status", 
-            "Charity Type", "Category", "Postal Code/Zip Code"]
-
-
-ownership_charity = ownership.merge(charity_kitchener, left_on="Civic No + Street", right_on="Address:", how='inner')
+import argparse
+import os
+import sys
+from typing import List, Optional
 
+import numpy as np
+import pandas as pd
 
-final_df = ownership_charity.loc[:, rel_cols]
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
-#TODO: compare entries based on Ownername and Organization Name
+# Shared matching helpers live with the data collection scripts
+sys.path.insert(0, os.path.join(SCRIPT_DIR, '..', 'data_collection'))
+from name_matching import NameIndex
 
-# 4) DATA POST-PROCESSING STEP
-# - rename columns in DataFrame to be more human-friendly
-# - reorganize columns in DataFrame
+from address_normalization import address_join
+from kitchener_inputs import DEFAULT_CACHE_DIR, load_charities, load_coops, load_ownership
+from spatial_index import GridIndex, PostalCodeGeocoder, looks_like_degrees, project_to_metres
 
-col_dict = {'Objectid': 'object_id', 'Property Unit Id': 'property_unit_id', 'Ownername': 'owner_name', 'AGENCY': 'agency', 'Civic No + Street': 'address', 'BN/Registration Number': 'business_registration_number',
-            'Organization Name': 'organization_name', 'Effective Date of Status': 'effective_date_of_status'}
+DEFAULT_CHARITIES_FILE = os.path.join(SCRIPT_DIR, '..', 'pre_req_input', 'Charities_results_2025-11-09-14-17-45.txt')
+DEFAULT_POSTAL_CODES_FILE = os.path.join(SCRIPT_DIR, '..', 'pre_req_input', 'CA_full.txt')
+DEFAULT_COOPS_FILE = os.path.join(SCRIPT_DIR, '..', 'data_analysis', 'mgcs-masterlist-active-co-ops-en-utf8-2021-08-18.csv')
 
-reorder = ['object_id', 'property_unit_id', 'business_registration_number', 'owner_name', 'organization_name', 'address', 'agency', 'effective_date_of_status']
+NAME_THRESHOLD = 0.85
+PROXIMITY_METRES = 100
 
-final_df = final_df.rename(col_dict, axis=1)
-final_df = final_df[reorder]
 
-# 5) DATA EXPORT
-# Export data as csv so other team members can use it
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Match Kitchener charities and co-ops with public land ownership.")
+    parser.add_argument('--ownership', required=True, help="Property Ownership (Public) CSV from Kitchener open data")
+    parser.add_argument('--charities', default=DEFAULT_CHARITIES_FILE, help="CRA charities search export (tab-separated)")
+    parser.add_argument('--coops', default=DEFAULT_COOPS_FILE, help="MGCS active co-ops masterlist CSV")
+    parser.add_argument('--postal-codes', default=DEFAULT_POSTAL_CODES_FILE,
+                        help="Postal code lookup table (GeoNames CA_full.txt or postal code/lat/lon CSV)")
+    parser.add_argument('--output-dir', default='.', help="Where to write the result CSVs")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="Where parsed inputs are cached")
+    parser.add_argument('--no-cache', action='store_true', help="Always re-parse the input files")
+    return parser.parse_args(argv)
 
-final_df.to_csv('kitchener_charities_land.csv', index=False)
\ No newline at end of file
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    cache_dir = None if args.no_cache else args.cache_dir
+
+    # 1) READ IN DATA
+
+    # PUBLIC LAND OWNERSHIP DATA (KITCHENER)
+    # ownership DataFrame describes public land ownership data (Kitchener)
+    # from https://open-kitchenergis.opendata.arcgis.com/datasets/KitchenerGIS::property-ownership-public/explore?location=43.383752%2C-80.482943%2C12.06
+
+    # REGISTERED CHARITIES (KITCHENER)
+    # charity_kitchener DataFrame describes registered charities (Kitchener) from https://apps.cra-arc.gc.ca/ebci/hacc/srch/pub/dsplyBscSrch?request_locale=en
+    # filtered by Status = 'Registered', City = 'Kitchener'
+
+    # 2) PRE-PROCESSING STEP
+    # Done by the loaders (kitchener_inputs.py), once per input file version:
+    # - only the needed columns, with explicit dtypes (categoricals for AGENCY, Category, ...)
+    # - 'Ownername' and 'Organization Name' lower-cased, 'Address' stripped
+    # - 'Civic No' + 'Street' combined into 'Civic No + Street'
+    # Both addresses are canonicalised (street types, directions, units) by address_join below
+
+    ownership = load_ownership(args.ownership, cache_dir)
+    charity_kitchener = load_charities(args.charities, cache_dir)
+
+    # 3) DATA MERGING STEP
+
+    # Compare entries in charity_kitchener DataFrame and ownership DataFrame to get rows that match based on addresses
+    # These rows are charities in Kitchener that own property in Kitchener (based on the public land ownership data for Kitchener)
+    # Addresses are joined on (civic number, canonical street), e.g. "74 WEBER ST W" = "74 Weber Street West",
+    # with a difflib fallback on the street among rows sharing the civic number
+
+    rel_cols = ["Objectid", "Property Unit Id", "Ownername", "AGENCY", "x", "y", "Civic No + Street", "BN/Registration Number", "Organization Name", "Effective Date of Status",
+                "Charity Type", "Category", "Postal Code/Zip Code", "Address Match"]
+
+    ownership_charity = address_join(ownership, charity_kitchener, left_on="Civic No + Street", right_on="Address")
+
+    final_df = ownership_charity.loc[:, rel_cols]
+    final_df['Matched On'] = 'address'
+
+    # Compare entries based on Ownername and Organization Name
+    # Blocked fuzzy name matching (see name_matching.py) instead of difflib over every owner/charity pair
+    charity_names = NameIndex(charity_kitchener['Organization Name'].fillna('').tolist())
+    name_pairs = pd.DataFrame(
+        [(owner, charity_names.names[position], score)
+         for owner in ownership['Ownername'].dropna().unique()
+         for position, score in charity_names.query(owner, NAME_THRESHOLD)],
+        columns=['Ownername', 'Organization Name', 'Name Score']
+    ).drop_duplicates(subset=['Ownername', 'Organization Name'])
+    name_pairs = name_pairs.astype({'Ownername': ownership['Ownername'].dtype,
+                                    'Organization Name': charity_kitchener['Organization Name'].dtype})
+
+    ownership_charity_by_name = ownership.merge(name_pairs, on='Ownername').merge(charity_kitchener, on='Organization Name')
+    name_df = ownership_charity_by_name.loc[:, [col for col in rel_cols if col != "Address Match"]]
+    name_df['Matched On'] = 'name'
+
+    # Address matches first, so a row matched both ways is reported as an address match
+    final_df = pd.concat([final_df, name_df], ignore_index=True).drop_duplicates(subset=['Objectid', 'BN/Registration Number'])
+
+    # 4) DATA POST-PROCESSING STEP
+    # - rename columns in DataFrame to be more human-friendly
+    # - reorganize columns in DataFrame
+
+    col_dict = {'Objectid': 'object_id', 'Property Unit Id': 'property_unit_id', 'Ownername': 'owner_name', 'AGENCY': 'agency', 'Civic No + Street': 'address', 'BN/Registration Number': 'business_registration_number',
+                'Organization Name': 'organization_name', 'Effective Date of Status': 'effective_date_of_status', 'Matched On': 'matched_on', 'Address Match': 'address_match'}
+
+    reorder = ['object_id', 'property_unit_id', 'business_registration_number', 'owner_name', 'organization_name', 'address', 'agency', 'effective_date_of_status', 'matched_on', 'address_match']
+
+    final_df = final_df.rename(col_dict, axis=1)
+    final_df = final_df[reorder]
+
+    # 5) DATA EXPORT
+    # Export data as csv so other team members can use it
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    final_df.to_csv(os.path.join(args.output_dir, 'kitchener_charities_land.csv'), index=False)
+
+    # 6) PROXIMITY ANALYSIS
+    # Charities and co-ops in Kitchener within PROXIMITY_METRES of a public parcel, and the nearest parcel to each
+    # Organisations are placed by postal code from a local lookup table (GeoNames CA_full.txt); skipped without it
+    # All organisations are queried in one batch against a grid index over the parcel points
+
+    if not os.path.exists(args.postal_codes):
+        print(f"Postal code table not found at {args.postal_codes}; skipping proximity analysis")
+        return
+    if not looks_like_degrees(ownership['x'], ownership['y']):
+        print("Parcel x/y are not longitude/latitude; skipping proximity analysis")
+        return
+
+    geocoder = PostalCodeGeocoder.from_file(args.postal_codes)
+    coops = load_coops(args.coops, cache_dir)
+    coops = coops[coops['City / town'].str.lower() == 'kitchener']
+
+    organisations = pd.concat([
+        pd.DataFrame({'organization_type': 'charity',
+                      'organization_name': charity_kitchener['Organization Name'],
+                      'registration_number': charity_kitchener['BN/Registration Number'],
+                      'postal_code': charity_kitchener['Postal Code/Zip Code']}),
+        pd.DataFrame({'organization_type': 'co-op',
+                      'organization_name': coops['Co-operative name'],
+                      'registration_number': coops['Ontario corporation number'],
+                      'postal_code': coops['Postal code']}),
+    ], ignore_index=True)
+    organisations = pd.concat([organisations, geocoder.geocode(organisations['postal_code'])], axis=1)
+
+    # Project parcels and organisations to metres around the parcels' mean latitude
+    origin_lat = ownership['y'].mean()
+    parcel_x, parcel_y = project_to_metres(ownership['x'], ownership['y'], origin_lat)
+    org_x, org_y = project_to_metres(organisations['longitude'].astype(float), organisations['latitude'].astype(float), origin_lat)
+    parcels = GridIndex(parcel_x, parcel_y)
+
+    nearest, nearest_distance = parcels.nearest(org_x, org_y)
+    found = nearest >= 0
+    organisations['nearest_object_id'] = pd.Series(ownership['Objectid'].to_numpy()[nearest], dtype='object').where(found)
+    organisations['nearest_owner_name'] = pd.Series(ownership['Ownername'].to_numpy()[nearest], dtype='object').where(found)
+    organisations['nearest_distance_m'] = np.where(found, nearest_distance.round(1), np.nan)
+
+    org_index, _, _ = parcels.within(org_x, org_y, PROXIMITY_METRES)
+    organisations[f'parcels_within_{PROXIMITY_METRES}m'] = np.bincount(org_index, minlength=len(organisations))
+
+    organisations.to_csv(os.path.join(args.output_dir, 'kitchener_organisations_near_land.csv'), index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Grid spatial index over parcel points, and postal-code geocoding.
+
+Questions like "which organisations are within N metres of public land" or
+"what is the nearest parcel to each organisation" need no pairwise distance
+loop:
+1. Points are projected to metres (an equirectangular projection around the
+   data's mean latitude, accurate to well under a metre at city scale) and
+   bucketed into square grid cells, stored as one array sorted by cell.
+2. A batch of queries looks up every neighbouring cell of every query at once
+   (numpy `searchsorted` over the sorted cell keys) and only computes
+   distances to the points in those cells.
+3. Nearest-point queries run the same batched radius search, doubling the
+   radius only for the queries that have not found a point yet (queries far
+   outside the data fall back to a direct scan).
+
+Organisations are placed with a local postal code table (GeoNames
+`CA_full.txt`, or any CSV with postal code, latitude and longitude columns),
+falling back to the centroid of the forward sortation area (first three
+characters) when the full code is missing.
+"""
+
+import csv
+import math
+import re
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+EARTH_RADIUS_METRES = 6371008.8
+DEFAULT_CELL_SIZE = 250.0  # Metres
+# Nearest queries widen the grid search up to this many cells, then scan the points directly
+MAX_GRID_SEARCH_CELLS = 16
+NEAREST_SCAN_CHUNK = 1000
+
+_POSTAL_CODE = re.compile(r"^([A-Z]\d[A-Z])\s*(\d[A-Z]\d)$")
+
+
+def project_to_metres(lon, lat, origin_lat: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Equirectangular projection of degrees to metres around `origin_lat` (default: mean latitude)."""
+    lon = np.asarray(lon, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+    if origin_lat is None:
+        origin_lat = float(np.nanmean(lat)) if lat.size else 0.0
+    x = EARTH_RADIUS_METRES * np.radians(lon) * math.cos(math.radians(origin_lat))
+    y = EARTH_RADIUS_METRES * np.radians(lat)
+    return x, y
+
+
+def looks_like_degrees(x, y) -> bool:
+    """True if coordinates fit longitude/latitude ranges (ArcGIS CSV exports are usually WGS84)."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    return bool(np.nanmax(np.abs(x)) <= 180 and np.nanmax(np.abs(y)) <= 90)
+
+
+class GridIndex:
+    """
+    Uniform grid over 2-D points in metres, with batched radius and nearest queries.
+    """
+
+    def __init__(self, x, y, cell_size: float = DEFAULT_CELL_SIZE):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        valid = ~(np.isnan(x) | np.isnan(y))
+        # Positions of the indexed points in the caller's arrays
+        self.ids = np.flatnonzero(valid)
+        self.x = x[valid]
+        self.y = y[valid]
+        self.cell_size = cell_size
+
+        keys = self._keys(self._cells(self.x), self._cells(self.y))
+        order = np.argsort(keys, kind='stable')
+        self.ids, self.x, self.y = self.ids[order], self.x[order], self.y[order]
+        # Points of cell_keys[i] are points[cell_starts[i]:cell_starts[i] + cell_counts[i]]
+        self.cell_keys, self.cell_starts, self.cell_counts = np.unique(keys[order], return_index=True, return_counts=True)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _cells(self, values: np.ndarray) -> np.ndarray:
+        return np.floor(values / self.cell_size).astype(np.int64)
+
+    @staticmethod
+    def _keys(cx: np.ndarray, cy: np.ndarray) -> np.ndarray:
+        # Interleave two signed 32-bit cell coordinates into one sortable key
+        return (cx << 32) + (cy & 0xFFFFFFFF)
+
+    def within(self, qx, qy, radius: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Every (query, point) pair closer than `radius` metres, for all queries at once.
+        Returns (query positions, point positions in the original arrays, distances).
+        """
+        qx = np.asarray(qx, dtype=float)
+        qy = np.asarray(qy, dtype=float)
+        queries = np.flatnonzero(~(np.isnan(qx) | np.isnan(qy)))
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0))
+        if len(queries) == 0 or len(self) == 0:
+            return empty
+
+        reach = int(math.ceil(radius / self.cell_size))
+        qcx, qcy = self._cells(qx[queries]), self._cells(qy[queries])
+        pair_queries, pair_points = [], []
+        for dx in range(-reach, reach + 1):
+            for dy in range(-reach, reach + 1):
+                keys = self._keys(qcx + dx, qcy + dy)
+                slots = np.searchsorted(self.cell_keys, keys)
+                slots = np.minimum(slots, len(self.cell_keys) - 1)
+                hit = self.cell_keys[slots] == keys
+                if not hit.any():
+                    continue
+                starts = self.cell_starts[slots[hit]]
+                counts = self.cell_counts[slots[hit]]
+                # Expand each hit cell into the positions of its points
+                offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(counts)[:-1])), counts)
+                pair_points.append(offsets + np.arange(counts.sum()))
+                pair_queries.append(np.repeat(queries[hit], counts))
+        if not pair_points:
+            return empty
+
+        query_index = np.concatenate(pair_queries)
+        point_index = np.concatenate(pair_points)
+        distances = np.hypot(self.x[point_index] - qx[query_index], self.y[point_index] - qy[query_index])
+        close = distances <= radius
+        return query_index[close], self.ids[point_index[close]], distances[close]
+
+    def nearest(self, qx, qy, max_radius: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Nearest point to every query: (point positions, distances), -1/inf where
+        nothing lies within `max_radius`.
+        """
+        qx = np.asarray(qx, dtype=float)
+        qy = np.asarray(qy, dtype=float)
+        best = np.full(len(qx), -1, dtype=np.int64)
+        best_distance = np.full(len(qx), np.inf)
+        if len(self) == 0:
+            return best, best_distance
+
+        limit = max_radius if max_radius is not None else math.inf
+        pending = np.flatnonzero(~(np.isnan(qx) | np.isnan(qy)))
+        radius = self.cell_size
+        while len(pending):
+            radius = min(radius, limit)
+            query_index, point_index, distances = self.within(qx[pending], qy[pending], radius)
+            if len(query_index):
+                # Closest pair per query: sort by distance, keep the first row of each query
+                order = np.lexsort((distances, query_index))
+                first = np.concatenate(([True], np.diff(query_index[order]) != 0))
+                found = pending[query_index[order][first]]
+                best[found] = point_index[order][first]
+                best_distance[found] = distances[order][first]
+                pending = pending[best[pending] < 0]
+            if radius >= limit or radius >= MAX_GRID_SEARCH_CELLS * self.cell_size:
+                break
+            radius *= 2
+
+        # Queries far from every point: plain distance scan, a chunk of queries at a time
+        if len(pending) and radius < limit:
+            for chunk in np.array_split(pending, max(1, len(pending) // NEAREST_SCAN_CHUNK + 1)):
+                distances = np.hypot(self.x[None, :] - qx[chunk, None], self.y[None, :] - qy[chunk, None])
+                closest = distances.argmin(axis=1)
+                closest_distance = distances[np.arange(len(chunk)), closest]
+                ok = closest_distance <= limit
+                best[chunk[ok]] = self.ids[closest[ok]]
+                best_distance[chunk[ok]] = closest_distance[ok]
+        return best, best_distance
+
+
+def normalize_postal_code(code) -> Optional[str]:
+    """'n2n 2n8' / 'N2N2N8' -> 'N2N 2N8'; None if it is not a Canadian postal code."""
+    if not isinstance(code, str):
+        return None
+    match = _POSTAL_CODE.match(code.strip().upper())
+    return f"{match.group(1)} {match.group(2)}" if match else None
+
+
+class PostalCodeGeocoder:
+    """
+    Latitude/longitude of Canadian postal codes from a local table, with FSA-centroid fallback.
+    """
+
+    def __init__(self, points: Dict[str, Tuple[float, float]]):
+        self.points = points
+        fsa = {}
+        for code, (lat, lon) in points.items():
+            fsa.setdefault(code[:3], []).append((lat, lon))
+        self.fsa_centroids = {key: tuple(np.mean(values, axis=0)) for key, values in fsa.items()}
+
+    @classmethod
+    def from_file(cls, path: str) -> "PostalCodeGeocoder":
+        """Load GeoNames postal codes (tab-separated, no header) or a CSV with postal code/latitude/longitude columns."""
+        points = {}
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            first = f.readline()
+            f.seek(0)
+            if len(first.split('\t')) > 10:
+                # GeoNames: country, postal code, place, ..., latitude (9), longitude (10)
+                for parts in csv.reader(f, delimiter='\t'):
+                    code = normalize_postal_code(parts[1]) if len(parts) > 10 else None
+                    if code:
+                        points[code] = (float(parts[9]), float(parts[10]))
+            else:
+                reader = csv.DictReader(f)
+                columns = {name.lower(): name for name in reader.fieldnames or []}
+                postal = next(columns[c] for c in columns if 'postal' in c)
+                lat = next(columns[c] for c in columns if c.startswith('lat'))
+                lon = next(columns[c] for c in columns if c.startswith(('lon', 'lng')))
+                for row in reader:
+                    code = normalize_postal_code(row[postal])
+                    if code and row[lat] and row[lon]:
+                        points[code] = (float(row[lat]), float(row[lon]))
+        return cls(points)
+
+    def locate(self, code) -> Tuple[Optional[float], Optional[float], Optional[str]]:
+        """(latitude, longitude, precision) where precision is 'postal_code', 'fsa' or None."""
+        code = normalize_postal_code(code)
+        if code is None:
+            return None, None, None
+        if code in self.points:
+            return (*self.points[code], 'postal_code')
+        centroid = self.fsa_centroids.get(code[:3])
+        if centroid:
+            return (*centroid, 'fsa')
+        return None, None, None
+
+    def geocode(self, codes: pd.Series) -> pd.DataFrame:
+        """latitude, longitude and geocode_precision for a column of postal codes (each distinct code once)."""
+        located = {code: self.locate(code) for code in codes.dropna().unique()}
+        rows = [located.get(code, (None, None, None)) for code in codes]
+        return pd.DataFrame(rows, columns=['latitude', 'longitude', 'geocode_precision'], index=codes.index)
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Runs the ETL pipeline: crawls, cross-checks and analyses, in dependency order.
+
+1. Every stage declares the files it reads and the files it writes. A stage
+   runs after the stages that write its inputs; stages with nothing between
+   them (the federal and Ontario crawls, say) run at the same time, each in
+   its own process.
+2. Before a stage runs, its code (the .py files of its directories), its
+   arguments and its input files are hashed. When that key matches the last
+   successful run and the outputs are still the files that run wrote, the
+   stage is skipped.
+3. Crawl stages read nothing from disk, so they only run when their output
+   is missing or they are asked for by name (--stages) or with --force;
+   --offline never runs them.
+4. Intermediate files (stage logs, the Ontario scraper's page archive) are
+   written to debug/<stage>/ only with --debug or ETL_DEBUG=1. Otherwise
+   stages are run with ETL_DEBUG=0 and keep no debug files.
+5. The outputs of every successful run are also kept in a size-limited
+   cache by key (build_cache.py). A stage whose key was seen before, say
+   after an input was switched back, gets its outputs copied back instead
+   of running.
+
+Usage:
+    python main.py                                  # every stage that is out of date
+    python main.py --offline --debug                # no crawling, keep logs in debug/
+    python main.py --stages cross_check --force     # re-run one stage
+    python main.py --kitchener-ownership Property_Ownership_Public.csv
+    python main.py --no-cache                       # run stages even if their outputs are cached
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from build_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, ArtifactCache
+
+ETL_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(ETL_DIR)
+DEBUG_DIR = os.path.join(ETL_DIR, 'debug')
+DEFAULT_STATE_FILE = os.path.join(ETL_DIR, 'output', 'cache', 'pipeline_state.json')
+
+# Stage files, relative to ETL_DIR
+CHARITIES_FILE = 'pre_req_input/Charities_results_2025-11-09-14-17-45.txt'
+POSTAL_CODES_FILE = 'pre_req_input/CA_full.txt'
+COOPS_FILE = 'data_analysis/mgcs-masterlist-active-co-ops-en-utf8-2021-08-18.csv'
+NONPROFITS_FILE = 'output/federal-non-for-profit-Ontario.csv'
+COOPERATIVES_FILE = 'output/federal-cooperative-Ontario.csv'
+BUSINESSES_FILE = 'output/all_businesses.json'
+OVERLAPS_FILE = 'output/charity_business_overlaps.csv'
+ALL_OVERLAPS_FILE = 'output/business_number_overlaps.csv'
+NAME_MATCHES_FILE = 'output/charity_business_name_matches.csv'
+BN_INDEX_FILE = 'output/cache/bn_index.pkl'
+KITCHENER_LAND_FILE = 'output/kitchener_charities_land.csv'
+
+HASH_CHUNK_SIZE = 1024 * 1024
+# Lines of a failed stage's output to show
+LOG_TAIL_LINES = 20
+
+# Stage outcomes
+RAN = 'ran'
+RESTORED = 'restored from cache'
+UP_TO_DATE = 'up to date'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+
+@dataclass
+class Stage:
+    """One pipeline step: a script run in its own process."""
+    name: str
+    script: str
+    args: List[str] = field(default_factory=list)
+    inputs: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+    # Directories whose .py files count as the stage's code (default: the script's directory)
+    code: List[str] = field(default_factory=list)
+    # Crawls a website instead of reading files
+    network: bool = False
+    # Extra arguments when the outputs are gone or were changed and must be rebuilt from scratch
+    rebuild_args: List[str] = field(default_factory=list)
+    cwd: str = ETL_DIR
+
+
+def _path(path: str) -> str:
+    """Absolute path of a stage file (absolute paths are kept as they are)."""
+    return os.path.normpath(os.path.join(ETL_DIR, path))
+
+
+def file_hash(path: str) -> Optional[str]:
+    """SHA-1 of a file's bytes, or None if it does not exist."""
+    digest = hashlib.sha1()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+def code_hash(stage: Stage) -> str:
+    """Hash of every .py file in the stage's code directories."""
+    digest = hashlib.sha1()
+    for directory in stage.code or [os.path.dirname(stage.script)]:
+        directory = _path(directory)
+        for name in sorted(os.listdir(directory)):
+            if name.endswith('.py'):
+                digest.update(name.encode('utf-8') + b'\0')
+                digest.update((file_hash(os.path.join(directory, name)) or '').encode('ascii'))
+    return digest.hexdigest()
+
+
+def stage_key(stage: Stage) -> str:
+    """Hash of the stage's code, arguments and inputs: equal keys produce equal outputs."""
+    key = {
+        'code': code_hash(stage),
+        'args': stage.args,
+        'inputs': {path: file_hash(_path(path)) for path in stage.inputs},
+    }
+    return hashlib.sha1(json.dumps(key, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def output_hashes(stage: Stage) -> Dict[str, Optional[str]]:
+    return {path: file_hash(_path(path)) for path in stage.outputs}
+
+
+def pipeline_stages(ownership_file: Optional[str] = None) -> List[Stage]:
+    """The ETL stages. The Kitchener land analysis needs the ownership CSV, so it is only added with one."""
+    stages = [
+        Stage('federal_nonprofits', 'data_collection/scrape_federal_corporations.py',
+              args=['--act', 'nonprofit', '--province', 'ON', '--output', _path(NONPROFITS_FILE)],
+              outputs=[NONPROFITS_FILE], network=True),
+        Stage('federal_cooperatives', 'data_collection/scrape_federal_corporations.py',
+              args=['--act', 'cooperative', '--province', 'ON', '--output', _path(COOPERATIVES_FILE)],
+              outputs=[COOPERATIVES_FILE], network=True),
+        # Run from the repository root, where the scraper keeps its search reports
+        Stage('ontario_businesses', 'data_collection/scrape_ontario_corporations.py',
+              outputs=[BUSINESSES_FILE], network=True, cwd=REPO_DIR),
+        Stage('cross_check', 'data_collection/cross_check_federal_vs_charities.py',
+              args=['--charities', _path(CHARITIES_FILE), '--nonprofits', _path(NONPROFITS_FILE),
+                    '--cooperatives', _path(COOPERATIVES_FILE), '--output', _path(OVERLAPS_FILE),
+                    '--all-overlaps', _path(ALL_OVERLAPS_FILE), '--name-matches', _path(NAME_MATCHES_FILE),
+                    '--state', _path(BN_INDEX_FILE)],
+              inputs=[CHARITIES_FILE, NONPROFITS_FILE, COOPERATIVES_FILE],
+              # The saved index is an output too, so a cache restore brings back the index that
+              # matches the restored CSVs; the changelog is a history, not a snapshot, and stays as it is
+              outputs=[OVERLAPS_FILE, ALL_OVERLAPS_FILE, NAME_MATCHES_FILE, BN_INDEX_FILE],
+              # Its saved index would otherwise say "nothing changed" and not rewrite them
+              rebuild_args=['--full']),
+        # Writes a timestamped report next to the script, so there is no fixed output to declare
+        Stage('json_stats', 'data_analysis/analyze_json_stats.py', inputs=[BUSINESSES_FILE]),
+    ]
+    if ownership_file:
+        inputs = [os.path.abspath(ownership_file), CHARITIES_FILE, COOPS_FILE]
+        outputs = [KITCHENER_LAND_FILE]
+        # The proximity step only runs with a postal code table
+        if os.path.exists(_path(POSTAL_CODES_FILE)):
+            inputs.append(POSTAL_CODES_FILE)
+            outputs.append('output/kitchener_organisations_near_land.csv')
+        stages.append(Stage('kitchener_land', 'dynamic_analysis/kitchener_land_analysis.py',
+                            args=['--ownership', os.path.abspath(ownership_file), '--output-dir', _path('output')],
+                            inputs=inputs, outputs=outputs, code=['dynamic_analysis', 'data_collection']))
+    return stages
+
+
+def stage_dependencies(stages: List[Stage]) -> Dict[str, Set[str]]:
+    """Stage name -> names of the stages that write its inputs. Raises ValueError on conflicts or cycles."""
+    writers: Dict[str, str] = {}
+    for stage in stages:
+        for path in stage.outputs:
+            path = _path(path)
+            if path in writers:
+                raise ValueError(f"{path} is written by both '{writers[path]}' and '{stage.name}'")
+            writers[path] = stage.name
+    dependencies = {stage.name: {writers[_path(path)] for path in stage.inputs if _path(path) in writers}
+                    for stage in stages}
+
+    # Depth-first search for cycles
+    visiting, visited = set(), set()
+
+    def visit(name: str, chain: Tuple[str, ...]):
+        if name in visited:
+            return
+        if name in visiting:
+            raise ValueError(f"Stage dependency cycle: {' -> '.join(chain + (name,))}")
+        visiting.add(name)
+        for dependency in sorted(dependencies[name]):
+            visit(dependency, chain + (name,))
+        visiting.discard(name)
+        visited.add(name)
+
+    for name in dependencies:
+        visit(name, ())
+    return dependencies
+
+
+def load_state(path: str) -> Dict[str, Dict]:
+    """Key and output hashes of each stage's last successful run."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(path: str, state: Dict[str, Dict]):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+@dataclass
+class Decision:
+    """Whether a stage has to run, and why."""
+    run: bool
+    reason: str
+    key: Optional[str] = None
+    rebuild: bool = False
+
+
+def decide(stage: Stage, state: Dict[str, Dict], force: bool = False, requested: bool = False,
+           offline: bool = False) -> Decision:
+    missing = [path for path in stage.inputs if not os.path.exists(_path(path))]
+    if missing:
+        return Decision(False, f"missing input {', '.join(missing)}")
+
+    if stage.network:
+        if offline:
+            return Decision(False, "offline")
+        if force or requested:
+            return Decision(True, "crawl requested")
+        if all(os.path.exists(_path(path)) for path in stage.outputs):
+            return Decision(False, "crawl output present")
+        return Decision(True, "no crawl output yet")
+
+    key = stage_key(stage)
+    last = state.get(stage.name)
+    outputs_intact = bool(last) and output_hashes(stage) == last.get('outputs')
+    if force:
+        return Decision(True, "forced", key, rebuild=not outputs_intact)
+    if not last:
+        return Decision(True, "never run", key, rebuild=True)
+    if not outputs_intact:
+        return Decision(True, "outputs missing or changed", key, rebuild=True)
+    if last.get('key') != key:
+        return Decision(True, "code, arguments or inputs changed", key)
+    return Decision(False, UP_TO_DATE, key)
+
+
+def run_stage(stage: Stage, extra_args: List[str], debug: bool) -> Tuple[int, float, List[str]]:
+    """Run the stage's script; returns (exit code, seconds, output lines)."""
+    env = dict(os.environ, ETL_DEBUG='1' if debug else '0', PYTHONUNBUFFERED='1')
+    if debug:
+        env['ETL_DEBUG_DIR'] = os.path.join(DEBUG_DIR, stage.name)
+        os.makedirs(env['ETL_DEBUG_DIR'], exist_ok=True)
+    else:
+        env.pop('ETL_DEBUG_DIR', None)
+
+    command = [sys.executable, _path(stage.script)] + stage.args + extra_args
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=stage.cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            text=True, encoding='utf-8', errors='replace')
+    seconds = time.perf_counter() - start
+    if debug:
+        with open(os.path.join(env['ETL_DEBUG_DIR'], 'stage.log'), 'w', encoding='utf-8') as f:
+            f.write(' '.join(command) + '\n\n' + result.stdout)
+    return result.returncode, seconds, result.stdout.splitlines()
+
+
+def run_pipeline(stages: List[Stage], state_file: str = DEFAULT_STATE_FILE, selected: Optional[Set[str]] = None,
+                 force: bool = False, offline: bool = False, debug: bool = False, jobs: int = 4,
+                 dry_run: bool = False, cache: Optional[ArtifactCache] = None) -> Dict[str, str]:
+    """
+    Run the selected stages (default: all) as their dependencies finish, up to `jobs` at a time,
+    restoring outputs from `cache` where it has them (unless forced).
+    Returns stage name -> outcome.
+    """
+    dependencies = stage_dependencies(stages)
+    by_name = {stage.name: stage for stage in stages}
+    requested = set(selected or ())
+    pending = [stage.name for stage in stages if not selected or stage.name in selected]
+    state = load_state(state_file)
+    outcomes: Dict[str, str] = {}
+    keys: Dict[str, Optional[str]] = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        running = {}
+        while pending or running:
+            # Start every stage whose selected dependencies have all finished
+            for name in list(pending):
+                if any(dependency in pending or dependency in running.values() for dependency in dependencies[name]):
+                    continue
+                pending.remove(name)
+                stage = by_name[name]
+                failed = sorted(d for d in dependencies[name] if outcomes.get(d) == FAILED)
+                if failed:
+                    outcomes[name] = SKIPPED
+                    print(f"[{name}] skipped: {', '.join(failed)} failed")
+                    continue
+                decision = decide(stage, state, force, name in requested, offline)
+                if not decision.run:
+                    outcomes[name] = UP_TO_DATE if decision.reason == UP_TO_DATE else SKIPPED
+                    print(f"[{name}] {'skipped: ' if outcomes[name] == SKIPPED else ''}{decision.reason}")
+                    continue
+                if dry_run:
+                    outcomes[name] = SKIPPED
+                    print(f"[{name}] would run ({decision.reason})")
+                    continue
+                cacheable = cache is not None and decision.key is not None and bool(stage.outputs)
+                if cacheable and not force:
+                    if cache.restore(f"{name}-{decision.key}", {path: _path(path) for path in stage.outputs}):
+                        outcomes[name] = RESTORED
+                        state[name] = {'key': decision.key, 'outputs': output_hashes(stage)}
+                        save_state(state_file, state)
+                        print(f"[{name}] restored from cache ({decision.reason})")
+                        continue
+                print(f"[{name}] running ({decision.reason})")
+                keys[name] = decision.key
+                extra_args = stage.rebuild_args if decision.rebuild else []
+                running[executor.submit(run_stage, stage, extra_args, debug)] = name
+
+            if not running:
+                continue
+            finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                stage = by_name[name]
+                try:
+                    returncode, seconds, lines = future.result()
+                except OSError as e:
+                    returncode, seconds, lines = -1, 0.0, [str(e)]
+                missing = [path for path in stage.outputs if not os.path.exists(_path(path))]
+                if returncode != 0 or missing:
+                    outcomes[name] = FAILED
+                    problem = f"exit code {returncode}" if returncode != 0 else f"did not write {', '.join(missing)}"
+                    print(f"[{name}] failed after {seconds:.1f}s ({problem}); last output:")
+                    for line in lines[-LOG_TAIL_LINES:]:
+                        print(f"[{name}]   {line}")
+                    state.pop(name, None)
+                else:
+                    outcomes[name] = RAN
+                    print(f"[{name}] done in {seconds:.1f}s")
+                    if keys[name] is not None:
+                        state[name] = {'key': keys[name], 'outputs': output_hashes(stage)}
+                        if cache is not None and stage.outputs:
+                            cache.store(f"{name}-{keys[name]}", {path: _path(path) for path in stage.outputs})
+                save_state(state_file, state)
+
+    return outcomes
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Run the ETL pipeline, skipping stages whose inputs are unchanged.")
+    parser.add_argument('--stages', type=lambda value: [name.strip() for name in value.split(',') if name.strip()],
+                        help="Comma-separated stages to run (default: all); other stages' outputs are used as they are")
+    parser.add_argument('--force', action='store_true', help="Run the selected stages even if they are up to date")
+    parser.add_argument('--offline', action='store_true', help="Never run the crawl stages")
+    parser.add_argument('--debug', action='store_true', default=os.environ.get('ETL_DEBUG', '0') not in ('', '0'),
+                        help=f"Keep stage logs and intermediate files in {DEBUG_DIR} (also ETL_DEBUG=1)")
+    parser.add_argument('--jobs', type=int, default=4, help="Stages run at the same time (default 4)")
+    parser.add_argument('--kitchener-ownership', help="Property Ownership (Public) CSV; adds the Kitchener land analysis")
+    parser.add_argument('--state', default=DEFAULT_STATE_FILE, help="Where stage keys from the last runs are kept")
+    parser.add_argument('--no-cache', action='store_true', help="Do not restore or store stage outputs in the cache")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="Where stage outputs are cached")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="Cache size limit in MB; least recently used outputs are evicted beyond it")
+    parser.add_argument('--dry-run', action='store_true', help="Show what would run without running it")
+    parser.add_argument('--list', action='store_true', help="List the stages with their inputs and outputs")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    stages = pipeline_stages(args.kitchener_ownership)
+    dependencies = stage_dependencies(stages)
+
+    if args.list:
+        for stage in stages:
+            print(f"{stage.name}{' (crawl)' if stage.network else ''}: {stage.script}")
+            print(f"  after:   {', '.join(sorted(dependencies[stage.name])) or '-'}")
+            print(f"  inputs:  {', '.join(stage.inputs) or '-'}")
+            print(f"  outputs: {', '.join(stage.outputs) or '-'}")
+        return 0
+
+    names = {stage.name for stage in stages}
+    unknown = [name for name in args.stages or [] if name not in names]
+    if unknown:
+        print(f"Unknown stage(s): {', '.join(unknown)}. Stages: {', '.join(sorted(names))}")
+        return 2
+
+    print("=" * 80)
+    print("ETL Pipeline")
+    print("=" * 80)
+    start = time.perf_counter()
+    cache = None if args.no_cache else ArtifactCache(args.cache_dir, args.cache_size * 1024 * 1024)
+    outcomes = run_pipeline(stages, args.state, set(args.stages or ()), args.force, args.offline,
+                            args.debug, args.jobs, args.dry_run, cache)
+
+    print("\n" + "=" * 80)
+    print(f"Summary ({time.perf_counter() - start:.1f}s):")
+    print("=" * 80)
+    for stage in stages:
+        if stage.name in outcomes:
+            print(f"  {stage.name}: {outcomes[stage.name]}")
+    return 1 if FAILED in outcomes.values() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())